@@ -0,0 +1,179 @@
+"""
+Bundle versionado de modelos.
+
+Todos os artefatos de um treinamento (modelos e scaler) são gravados em um
+único arquivo joblib sem compressão, acompanhado de um manifesto JSON com
+checksum SHA-256, ordem das features, medianas de referência e métricas.
+
+Sem compressão, os arrays numpy ficam contíguos no arquivo e são carregados
+via memory-map (`mmap_mode="r"`), sem descompressão. Isso vale só para os
+coeficientes da Regressão Logística e do SGD e para os parâmetros do scaler.
+Os Random Forests são carregados inteiros em memória: `Tree.__setstate__` do
+scikit-learn copia os arrays `nodes` e `value` de cada árvore para buffers
+próprios.
+
+No Azure Storage, o manifesto é publicado por último e aponta para o bundle
+pelo hash do conteúdo. Uma instância só baixa o bundle quando o hash do
+manifesto remoto difere do que já está em disco e o remoto não é mais
+antigo que o local (um treino cuja publicação falhou não é sobrescrito).
+"""
+import hashlib
+import json
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import joblib
+import pandas as pd
+
+from api.metricas import cronometrar
+
+logger = logging.getLogger("api.artefatos")
+
+VERSAO_FORMATO = 1
+MANIFESTO = "manifest.json"
+PREFIXO_BLOB = "bundle/"
+
+
+def calcular_sha256(caminho: Path) -> str:
+    """SHA-256 do arquivo, lido em blocos."""
+    sha = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            sha.update(bloco)
+    return sha.hexdigest()
+
+
+def _gravar_json(caminho: Path, dados: Dict) -> None:
+    temporario = caminho.with_suffix(".tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(dados, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def salvar_bundle(diretorio: Path, modelos: Dict[str, object], features: List[str],
+                  medianas: pd.Series, metricas: Optional[Dict] = None,
+                  parametros: Optional[Dict] = None) -> Dict:
+    """
+    Grava o bundle e o manifesto em `diretorio`.
+    Retorna o manifesto.
+    """
+    diretorio.mkdir(parents=True, exist_ok=True)
+
+    temporario = diretorio / "modelos.joblib.tmp"
+    joblib.dump(modelos, temporario, compress=0)
+
+    sha256 = calcular_sha256(temporario)
+    arquivo = f"modelos-{sha256[:16]}.joblib"
+    os.replace(temporario, diretorio / arquivo)
+
+    manifesto = {
+        "versao_formato": VERSAO_FORMATO,
+        "versao": time.strftime("%Y%m%d%H%M%S"),
+        "arquivo": arquivo,
+        "sha256": sha256,
+        "tamanho_bytes": (diretorio / arquivo).stat().st_size,
+        "modelos": sorted(modelos),
+        "features": list(features),
+        "medianas": {k: float(v) for k, v in medianas.items()},
+        "metricas": metricas or {},
+        "melhores_parametros": parametros or {},
+        "criado_em": time.time(),
+    }
+    _gravar_json(diretorio / MANIFESTO, manifesto)
+    _remover_bundles_antigos(diretorio, arquivo)
+
+    logger.info(f"Bundle de modelos salvo: {arquivo} ({manifesto['tamanho_bytes'] / 1024:.0f} KB)")
+    return manifesto
+
+
+def _remover_bundles_antigos(diretorio: Path, atual: str) -> None:
+    for caminho in diretorio.glob("modelos-*.joblib"):
+        if caminho.name != atual:
+            try:
+                caminho.unlink()
+            except OSError as e:
+                # No Windows, arquivos ainda mapeados em memória não podem ser removidos
+                logger.warning(f"Não foi possível remover bundle antigo {caminho.name}: {e}")
+
+
+def ler_manifesto(diretorio: Path) -> Optional[Dict]:
+    caminho = diretorio / MANIFESTO
+    if not caminho.exists():
+        return None
+    with open(caminho, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def publicar_bundle(container_client, diretorio: Path, manifesto: Dict) -> None:
+    """
+    Envia bundle e manifesto para o Azure Storage (manifesto por último, para
+    que leitores nunca vejam um manifesto apontando para um bundle ausente).
+    """
+    with open(diretorio / manifesto["arquivo"], "rb") as f:
+        container_client.upload_blob(name=PREFIXO_BLOB + manifesto["arquivo"], data=f, overwrite=True)
+    container_client.upload_blob(
+        name=PREFIXO_BLOB + MANIFESTO,
+        data=json.dumps(manifesto, ensure_ascii=False, indent=2).encode("utf-8"),
+        overwrite=True
+    )
+    logger.info(f"Bundle {manifesto['arquivo']} publicado no Azure Storage")
+
+
+def sincronizar_bundle(container_client, diretorio: Path) -> Optional[Dict]:
+    """
+    Garante em `diretorio` o bundle descrito pelo manifesto remoto, baixando-o
+    apenas se o hash mudou. Sem Azure (ou sem manifesto remoto), usa o local.
+    Retorna o manifesto vigente ou None se não houver bundle.
+    """
+    local = ler_manifesto(diretorio)
+    if container_client is None:
+        return local
+
+    try:
+        remoto = json.loads(container_client.download_blob(PREFIXO_BLOB + MANIFESTO).readall())
+    except Exception as e:
+        logger.warning(f"Manifesto remoto indisponível, usando bundle local: {e}")
+        return local
+
+    caminho = diretorio / remoto["arquivo"]
+    if local and local["sha256"] == remoto["sha256"] and caminho.exists():
+        logger.info(f"Bundle {remoto['arquivo']} já está atualizado, download ignorado")
+        return local
+
+    # Versões são timestamps "%Y%m%d%H%M%S": a comparação de strings ordena no tempo.
+    # Um bundle local mais novo vem de um treino cuja publicação falhou; não descartá-lo.
+    if local and (diretorio / local["arquivo"]).exists() and local["versao"] > remoto["versao"]:
+        logger.warning(
+            f"Bundle local {local['arquivo']} (versão {local['versao']}) é mais novo que o "
+            f"remoto (versão {remoto['versao']}); mantendo o local. Republique o bundle."
+        )
+        return local
+
+    diretorio.mkdir(parents=True, exist_ok=True)
+    temporario = caminho.with_suffix(".download")
+    with cronometrar("download_blob", "bundle"), open(temporario, "wb") as f:
+        container_client.download_blob(PREFIXO_BLOB + remoto["arquivo"]).readinto(f)
+
+    if calcular_sha256(temporario) != remoto["sha256"]:
+        temporario.unlink(missing_ok=True)
+        raise ValueError(f"Checksum inválido para o bundle {remoto['arquivo']}")
+
+    os.replace(temporario, caminho)
+    _gravar_json(diretorio / MANIFESTO, remoto)
+    _remover_bundles_antigos(diretorio, remoto["arquivo"])
+    logger.info(f"Bundle {remoto['arquivo']} baixado do Azure Storage")
+    return remoto
+
+
+def carregar_bundle(diretorio: Path, manifesto: Dict) -> Dict[str, object]:
+    """Carrega os modelos do bundle (memory-map dos arrays fora das árvores)."""
+    if manifesto.get("versao_formato") != VERSAO_FORMATO:
+        raise ValueError(f"Formato de bundle não suportado: {manifesto.get('versao_formato')}")
+
+    inicio = time.time()
+    modelos = joblib.load(diretorio / manifesto["arquivo"], mmap_mode="r")
+    logger.info(f"Bundle {manifesto['arquivo']} carregado em {(time.time() - inicio) * 1000:.1f} ms")
+    return modelos
@@ -0,0 +1,147 @@
+"""
+Geração assíncrona de explicações por LLM.
+
+Controla a concorrência das chamadas à OpenAI (semáforo), aplica um orçamento
+de tempo por explicação, reaproveita explicações de pacientes praticamente
+idênticos (cache LRU) e permite entregar a explicação depois da predição,
+via consulta por id.
+"""
+import asyncio
+import logging
+import os
+import sys
+import time
+import uuid
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
+
+from utils import gerar_explicacao_llm_async
+from api.metricas import cronometrar
+
+logger = logging.getLogger("api.explicacoes")
+
+# Casas decimais usadas para arredondar cada feature na chave do cache
+CASAS_DECIMAIS_CACHE = {
+    "BMI": 1,
+    "DiabetesPedigreeFunction": 2,
+}
+
+# Largura da faixa de probabilidade de diabetes na chave do cache
+FAIXA_PROBABILIDADE = 0.1
+
+
+class ServicoExplicacoes:
+    """
+    Serviço de explicações LLM compartilhado pelas requisições da API.
+    """
+
+    def __init__(self, max_concorrencia: int = 4, timeout: float = 20.0,
+                 tamanho_cache: int = 1024, ttl_pendentes: float = 600.0):
+        self.timeout = timeout
+        self.tamanho_cache = tamanho_cache
+        self.ttl_pendentes = ttl_pendentes
+        self._semaforo = asyncio.Semaphore(max_concorrencia)
+        self._cache: "OrderedDict[Tuple, str]" = OrderedDict()
+        self._em_andamento: Dict[Tuple, asyncio.Task] = {}
+        self._pendentes: Dict[str, Dict] = {}
+        self.acertos_cache = 0
+        self.falhas_cache = 0
+
+    @staticmethod
+    def chave_cache(parametros: Dict) -> Tuple:
+        """
+        Chave do cache: vetor de features arredondado + faixa de probabilidade.
+        """
+        paciente = parametros["paciente_info"]
+        features = tuple(
+            round(float(valor), CASAS_DECIMAIS_CACHE.get(nome, 0))
+            for nome, valor in sorted(paciente.items())
+        )
+        faixa = int(parametros["probabilidades"]["Diabetes"] // FAIXA_PROBABILIDADE)
+        return features, parametros["predicao"], faixa
+
+    async def gerar(self, parametros: Dict) -> Optional[str]:
+        """
+        Retorna a explicação (do cache ou do LLM) ou None em caso de erro/timeout.
+        Requisições idênticas simultâneas compartilham a mesma chamada ao LLM.
+        """
+        chave = self.chave_cache(parametros)
+
+        if chave in self._cache:
+            self._cache.move_to_end(chave)
+            self.acertos_cache += 1
+            return self._cache[chave]
+
+        self.falhas_cache += 1
+        tarefa = self._em_andamento.get(chave)
+        if tarefa is None:
+            tarefa = asyncio.ensure_future(self._chamar_llm(chave, parametros))
+            self._em_andamento[chave] = tarefa
+            tarefa.add_done_callback(lambda _: self._em_andamento.pop(chave, None))
+
+        return await asyncio.shield(tarefa)
+
+    async def _chamar_llm(self, chave: Tuple, parametros: Dict) -> Optional[str]:
+        inicio = time.time()
+        try:
+            # O orçamento de tempo inclui a espera por uma vaga no semáforo
+            explicacao = await asyncio.wait_for(self._chamar_com_limite(parametros), self.timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Explicação LLM excedeu o tempo limite de {self.timeout:.0f}s")
+            return None
+        except Exception as e:
+            logger.warning(f"Erro ao gerar explicação LLM: {e}")
+            return None
+
+        logger.info(f"Explicação LLM gerada em {time.time() - inicio:.2f}s")
+        self._cache[chave] = explicacao
+        if len(self._cache) > self.tamanho_cache:
+            self._cache.popitem(last=False)
+        return explicacao
+
+    async def _chamar_com_limite(self, parametros: Dict) -> str:
+        async with self._semaforo:
+            with cronometrar("llm", "gpt-4o-mini"):
+                return await gerar_explicacao_llm_async(**parametros, timeout=self.timeout)
+
+    def agendar(self, parametros: Dict) -> str:
+        """
+        Agenda a geração em segundo plano e retorna o id para consulta.
+        """
+        self._limpar_pendentes()
+
+        explicacao_id = uuid.uuid4().hex
+        registro = {"status": "processando", "explicacao_ia": None, "criado_em": time.time()}
+        self._pendentes[explicacao_id] = registro
+
+        async def executar():
+            explicacao = await self.gerar(parametros)
+            registro["explicacao_ia"] = explicacao
+            registro["status"] = "concluido" if explicacao is not None else "erro"
+
+        # Mantém referência à tarefa para que não seja coletada antes de terminar
+        registro["tarefa"] = asyncio.ensure_future(executar())
+        return explicacao_id
+
+    def consultar(self, explicacao_id: str) -> Optional[Dict]:
+        """Retorna o estado de uma explicação agendada (ou None se desconhecida/expirada)."""
+        registro = self._pendentes.get(explicacao_id)
+        if registro is None:
+            return None
+        return {"id": explicacao_id, "status": registro["status"], "explicacao_ia": registro["explicacao_ia"]}
+
+    def _limpar_pendentes(self) -> None:
+        limite = time.time() - self.ttl_pendentes
+        expirados = [i for i, r in self._pendentes.items() if r["criado_em"] < limite]
+        for explicacao_id in expirados:
+            del self._pendentes[explicacao_id]
+
+
+servico_explicacoes = ServicoExplicacoes(
+    max_concorrencia=int(os.getenv("LLM_MAX_CONCORRENCIA", "4")),
+    timeout=float(os.getenv("LLM_TIMEOUT_SEGUNDOS", "20")),
+    tamanho_cache=int(os.getenv("LLM_CACHE_TAMANHO", "1024"))
+)
@@ -0,0 +1,142 @@
+"""
+Fila de jobs de treinamento.
+
+O treinamento roda em um único processo worker separado da API, de modo que
+nunca disputa o event loop (nem o GIL) com as avaliações. O estado de cada job
+(fase, geração do algoritmo genético, resultado) é persistido em JSON em
+`outputs/jobs/`, escrito pelo worker e lido pela API.
+"""
+import json
+import logging
+import multiprocessing
+import os
+import time
+import traceback
+import uuid
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+logger = logging.getLogger("api.jobs")
+
+
+def _salvar_estado(caminho: Path, estado: Dict) -> None:
+    """Grava o estado de forma atômica (arquivo temporário + rename)."""
+    temporario = caminho.with_suffix(".tmp")
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(estado, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, caminho)
+
+
+def _inicializar_worker() -> None:
+    """Configura o logging no processo worker (o "spawn" não herda a configuração da API)."""
+    logging.basicConfig(
+        level=logging.INFO,
+        format="%(asctime)s | %(levelname)s | %(name)s | %(message)s"
+    )
+
+
+def _executar_job(job_id: str, jobs_dir: str) -> Dict:
+    """
+    Executa o treinamento no processo worker, atualizando o estado do job.
+    """
+    from api.services import treinar_modelos
+
+    caminho = Path(jobs_dir) / f"{job_id}.json"
+    with open(caminho, encoding="utf-8") as f:
+        estado = json.load(f)
+
+    estado.update({"status": "executando", "iniciado_em": time.time()})
+    _salvar_estado(caminho, estado)
+
+    def progresso(fase: str, **detalhes) -> None:
+        estado["fase"] = fase
+        estado.update(detalhes)
+        _salvar_estado(caminho, estado)
+
+    try:
+        resultado = treinar_modelos(progresso=progresso)
+        estado.update({"status": "concluido", "fase": "concluido", "resultado": resultado})
+    except Exception as e:
+        logger.error(f"Erro no job de treinamento {job_id}: {e}")
+        logger.error(traceback.format_exc())
+        estado.update({"status": "erro", "erro": str(e)})
+
+    estado["finalizado_em"] = time.time()
+    _salvar_estado(caminho, estado)
+    return estado
+
+
+class FilaTreinamento:
+    """
+    Fila de treinamento com um único processo worker.
+
+    Jobs enviados enquanto outro executa aguardam na fila do executor. Ao
+    concluir um job com sucesso, ``ao_concluir`` é chamado no processo da API
+    (ex.: recarregar o registro de modelos).
+    """
+
+    def __init__(self, jobs_dir: Path, ao_concluir: Optional[Callable[[Dict], None]] = None):
+        self.jobs_dir = Path(jobs_dir)
+        self.ao_concluir = ao_concluir
+        self._executor: Optional[ProcessPoolExecutor] = None
+
+    def _obter_executor(self) -> ProcessPoolExecutor:
+        if self._executor is None:
+            # "spawn" evita herdar threads e sockets do servidor via fork
+            self._executor = ProcessPoolExecutor(
+                max_workers=1,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_inicializar_worker
+            )
+        return self._executor
+
+    def enviar(self) -> Dict:
+        """Cria um job na fila e retorna seu estado inicial."""
+        self.jobs_dir.mkdir(parents=True, exist_ok=True)
+
+        job_id = uuid.uuid4().hex
+        estado = {
+            "id": job_id,
+            "status": "na_fila",
+            "fase": None,
+            "criado_em": time.time(),
+        }
+        _salvar_estado(self.jobs_dir / f"{job_id}.json", estado)
+
+        futuro = self._obter_executor().submit(_executar_job, job_id, str(self.jobs_dir))
+        futuro.add_done_callback(lambda f: self._finalizar(job_id, f))
+
+        logger.info(f"Job de treinamento {job_id} enviado para a fila")
+        return estado
+
+    def _finalizar(self, job_id: str, futuro) -> None:
+        try:
+            estado = futuro.result()
+        except Exception as e:
+            # Worker encerrado de forma anormal (ex.: falta de memória)
+            logger.error(f"Worker de treinamento falhou no job {job_id}: {e}")
+            estado = self.consultar(job_id) or {"id": job_id}
+            estado.update({"status": "erro", "erro": str(e) or type(e).__name__, "finalizado_em": time.time()})
+            _salvar_estado(self.jobs_dir / f"{job_id}.json", estado)
+            return
+
+        logger.info(f"Job de treinamento {estado['id']} finalizado com status {estado['status']}")
+        if estado["status"] == "concluido" and self.ao_concluir:
+            try:
+                self.ao_concluir(estado)
+            except Exception as e:
+                logger.error(f"Erro ao publicar modelos do job {estado['id']}: {e}")
+
+    def consultar(self, job_id: str) -> Optional[Dict]:
+        """Lê o estado persistido do job (None se não existir)."""
+        caminho = self.jobs_dir / f"{Path(job_id).name}.json"
+        if not caminho.exists():
+            return None
+        with open(caminho, encoding="utf-8") as f:
+            return json.load(f)
+
+    def encerrar(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -4,23 +4,43 @@ API FastAPI para treinamento e avaliação de modelos de diabetes.
 Esta API expõe funcionalidades dos scripts de treinamento e avaliação
 de forma RESTful, com documentação automática via Swagger.
 """
-from fastapi import FastAPI, HTTPException
-from fastapi.responses import JSONResponse
+from fastapi import FastAPI, HTTPException, UploadFile, File, Request
+from fastapi.responses import JSONResponse, StreamingResponse, PlainTextResponse
 from fastapi.middleware.cors import CORSMiddleware
+from starlette.background import BackgroundTask
+from starlette.concurrency import run_in_threadpool
 from fastapi.responses import FileResponse
 from pathlib import Path
+import itertools
 import logging
+import shutil
+import tempfile
+import time
 import traceback
 import os
 
 from api.schemas import (
     PacienteInput,
     AvaliacaoResponse,
-    TreinamentoResponse,
+    AvaliacaoLoteInput,
+    AvaliacaoLoteResponse,
+    ExplicacaoResponse,
+    JobTreinamentoResponse,
     HealthResponse,
     PredicaoResultado
 )
-from api.services import avaliar_paciente, treinar_modelos
+from api.services import (
+    avaliar_paciente,
+    avaliar_lote,
+    avaliar_lotes_ndjson,
+    ler_arquivo_em_lotes,
+    parametros_explicacao,
+    registro_modelos,
+    OUTPUT_DIR
+)
+from api.explicacoes import servico_explicacoes
+from api.metricas import requisicoes, gerar_texto_prometheus
+from api.jobs import FilaTreinamento
 
 # Configuração de logging
 logging.basicConfig(
@@ -62,6 +82,58 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+@app.middleware("http")
+async def medir_requisicao(request: Request, call_next):
+    """
+    Registra a duração de cada requisição no histograma por rota.
+    Para respostas em streaming, mede até o envio dos cabeçalhos.
+    """
+    inicio = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+        return response
+    finally:
+        # Template da rota (ex.: /treinamento/{job_id}) para não explodir a cardinalidade
+        rota = request.scope.get("route")
+        requisicoes.observar(
+            time.perf_counter() - inicio,
+            rota=getattr(rota, "path", "desconhecida"),
+            metodo=request.method,
+            status=status
+        )
+
+
+# Treinamento em processo worker separado; ao concluir, publica a nova versão
+# dos modelos no registro desta instância
+fila_treinamento = FilaTreinamento(
+    OUTPUT_DIR / "jobs",
+    ao_concluir=lambda _: registro_modelos.recarregar()
+)
+
+
+@app.on_event("startup")
+async def carregar_modelos_startup():
+    """
+    Carrega os modelos em memória uma única vez ao iniciar a API.
+    Se ainda não houver modelos treinados, o carregamento é adiado para a
+    primeira avaliação.
+    """
+    try:
+        registro_modelos.atual()
+    except FileNotFoundError:
+        logger.warning("Modelos ainda não disponíveis. Execute o treinamento.")
+    except Exception as e:
+        logger.error(f"Erro ao carregar modelos no startup: {e}")
+
+
+@app.on_event("shutdown")
+async def encerrar_fila_treinamento():
+    """Encerra o processo worker de treinamento."""
+    fila_treinamento.encerrar()
+
+
 # Define o caminho para o arquivo de log. 
 # Como o main.py está em /api, subimos um nível para encontrar o log na raiz.
 LOG_FILE_PATH = Path(__file__).resolve().parent.parent / "pipeline.log"
@@ -84,6 +156,16 @@ async def download_log():
     )
 
 
+@app.get("/metrics", response_class=PlainTextResponse, tags=["Health"])
+async def metricas():
+    """
+    Métricas de latência no formato texto do Prometheus: histogramas por rota
+    HTTP e por etapa interna/modelo (download do blob, leitura de CSV,
+    imputação, normalização, predict de cada modelo e chamada ao LLM).
+    """
+    return PlainTextResponse(gerar_texto_prometheus(), media_type="text/plain; version=0.0.4; charset=utf-8")
+
+
 @app.get("/", response_model=HealthResponse, tags=["Health"])
 async def root():
     """
@@ -110,12 +192,13 @@ async def health_check():
     )
 
 
-@app.post("/treinamento", response_model=TreinamentoResponse, tags=["Treinamento"])
+@app.post("/treinamento", response_model=JobTreinamentoResponse, status_code=202, tags=["Treinamento"])
 async def treinar():
     """
-    Treina os modelos de machine learning.
+    Inicia o treinamento dos modelos de machine learning em segundo plano.
     
-    Este endpoint executa o processo completo de treinamento:
+    O job é executado em um processo worker separado da API (um job por vez;
+    os demais aguardam na fila) e passa pelas fases:
     
     1. Carrega e prepara o dataset
     2. Treina modelos base (Logistic Regression e Random Forest)
@@ -123,31 +206,61 @@ async def treinar():
     4. Salva os modelos treinados
     5. Faz upload dos modelos para Azure Storage (se configurado)
     
-    **Nota**: Este processo pode levar alguns minutos para completar.
+    Ao concluir, a nova versão dos modelos é publicada em memória.
     
     **Retorna**:
-    - Métricas de performance dos modelos
-    - Melhores parâmetros encontrados pelo algoritmo genético
-    - Tempo de execução
+    - Id do job; acompanhe o progresso em `GET /treinamento/{job_id}`
     """
     try:
-        logger.info("Iniciando treinamento via API...")
-        resultado = treinar_modelos()
-        logger.info("Treinamento concluído com sucesso")
-        return TreinamentoResponse(**resultado)
+        estado = fila_treinamento.enviar()
+        return JobTreinamentoResponse(**estado)
     except Exception as e:
-        logger.error(f"Erro no treinamento: {e}")
+        logger.error(f"Erro ao enfileirar treinamento: {e}")
         logger.error(traceback.format_exc())
         raise HTTPException(
             status_code=500,
-            detail=f"Erro ao treinar modelos: {str(e)}"
+            detail=f"Erro ao iniciar treinamento: {str(e)}"
+        )
+
+
+@app.get("/treinamento/{job_id}", response_model=JobTreinamentoResponse, tags=["Treinamento"])
+async def consultar_treinamento(job_id: str):
+    """
+    Consulta o estado de um job de treinamento.
+    
+    **Retorna**:
+    - Status e fase atual (com a geração do algoritmo genético)
+    - Métricas, melhores parâmetros e tempo de execução, quando concluído
+    """
+    estado = fila_treinamento.consultar(job_id)
+    if estado is None:
+        raise HTTPException(status_code=404, detail="Job de treinamento não encontrado")
+    return JobTreinamentoResponse(**estado)
+
+
+@app.post("/modelos/recarregar", tags=["Modelos"])
+def recarregar_modelos():
+    """
+    Recarrega os modelos do Azure Storage (ou locais) e publica a nova versão
+    em memória.
+    
+    Útil quando outra instância publicou um novo treinamento.
+    """
+    try:
+        versao = registro_modelos.recarregar()
+        return {"status": "sucesso", "versao": versao.versao}
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Modelos não encontrados. Execute o treinamento primeiro através do endpoint /treinamento"
         )
 
 
 @app.post("/avaliacao", response_model=AvaliacaoResponse, tags=["Avaliação"])
 async def avaliar(
     paciente: PacienteInput,
-    incluir_explicacao: bool = True
+    incluir_explicacao: bool = True,
+    explicacao_assincrona: bool = False
 ):
     """
     Avalia um paciente e retorna predições de risco de diabetes.
@@ -158,11 +271,14 @@ async def avaliar(
     **Parâmetros**:
     - **paciente**: Dados clínicos do paciente (Pregnancies, Glucose, BloodPressure, etc.)
     - **incluir_explicacao**: Se True, gera explicação usando LLM (padrão: True)
+    - **explicacao_assincrona**: Se True, retorna a predição imediatamente e a
+      explicação é gerada em segundo plano; consulte-a em
+      `/avaliacao/explicacao/{explicacao_id}` (padrão: False)
     
     **Retorna**:
     - Predições de ambos os modelos (Logistic Regression e Random Forest)
     - Probabilidades de cada classe
-    - Explicação gerada por IA (se solicitado)
+    - Explicação gerada por IA (se solicitado) ou `explicacao_id`
     
     **Exemplo de uso**:
     ```json
@@ -189,8 +305,15 @@ async def avaliar(
             # Pydantic v1
             paciente_dict = paciente.dict()
         
-        # Avalia paciente
-        resultado = avaliar_paciente(paciente_dict, incluir_explicacao)
+        # Avalia paciente (fora do event loop; a explicação é gerada de forma assíncrona)
+        resultado = await run_in_threadpool(avaliar_paciente, paciente_dict, False)
+        
+        if incluir_explicacao:
+            parametros = parametros_explicacao(resultado["paciente"], resultado["resultados"])
+            if explicacao_assincrona:
+                resultado["explicacao_id"] = servico_explicacoes.agendar(parametros)
+            else:
+                resultado["explicacao_ia"] = await servico_explicacoes.gerar(parametros)
         
         logger.info("Avaliação concluída com sucesso")
         return AvaliacaoResponse(**resultado)
@@ -210,6 +333,102 @@ async def avaliar(
         )
 
 
+@app.get("/avaliacao/explicacao/{explicacao_id}", response_model=ExplicacaoResponse, tags=["Avaliação"])
+async def consultar_explicacao(explicacao_id: str):
+    """
+    Consulta uma explicação agendada com `explicacao_assincrona=true`.
+    
+    O status é `processando` até a explicação ficar pronta (`concluido`) ou
+    falhar (`erro`). Explicações ficam disponíveis por 10 minutos.
+    """
+    registro = servico_explicacoes.consultar(explicacao_id)
+    if registro is None:
+        raise HTTPException(status_code=404, detail="Explicação não encontrada ou expirada")
+    return ExplicacaoResponse(**registro)
+
+
+@app.post("/avaliacao/lote", response_model=AvaliacaoLoteResponse, tags=["Avaliação"])
+def avaliar_em_lote(lote: AvaliacaoLoteInput):
+    """
+    Avalia N pacientes em uma única requisição.
+    
+    Os pacientes são imputados, normalizados e preditos juntos (uma chamada de
+    `predict_proba` por modelo sobre a matriz N x 8). Os resultados são
+    retornados na mesma ordem da entrada, sem explicação por IA.
+    """
+    try:
+        pacientes = []
+        for paciente in lote.pacientes:
+            try:
+                pacientes.append(paciente.model_dump())
+            except AttributeError:
+                pacientes.append(paciente.dict())
+        
+        avaliacoes = avaliar_lote(pacientes)
+        logger.info(f"Avaliação em lote concluída: {len(avaliacoes)} pacientes")
+        return AvaliacaoLoteResponse(total=len(avaliacoes), avaliacoes=avaliacoes)
+        
+    except FileNotFoundError as e:
+        logger.error(f"Modelos não encontrados: {e}")
+        raise HTTPException(
+            status_code=404,
+            detail="Modelos não encontrados. Execute o treinamento primeiro através do endpoint /treinamento"
+        )
+    except Exception as e:
+        logger.error(f"Erro na avaliação em lote: {e}")
+        logger.error(traceback.format_exc())
+        raise HTTPException(
+            status_code=500,
+            detail=f"Erro ao avaliar pacientes: {str(e)}"
+        )
+
+
+@app.post("/avaliacao/lote/arquivo", tags=["Avaliação"])
+def avaliar_arquivo(arquivo: UploadFile = File(...)):
+    """
+    Avalia um arquivo CSV ou NDJSON (`.ndjson`/`.jsonl`) com milhares de pacientes.
+    
+    O arquivo é lido em lotes e a resposta é enviada em streaming, no formato
+    NDJSON, com uma linha por paciente na ordem do arquivo (campo `indice`).
+    Colunas extras (ex.: `Outcome`) são ignoradas.
+    """
+    nome = (arquivo.filename or "").lower()
+    formato = "ndjson" if nome.endswith((".ndjson", ".jsonl")) else "csv"
+    
+    try:
+        versao = registro_modelos.atual()
+    except FileNotFoundError:
+        raise HTTPException(
+            status_code=404,
+            detail="Modelos não encontrados. Execute o treinamento primeiro através do endpoint /treinamento"
+        )
+    
+    # Cópia própria do upload: o UploadFile é fechado ao fim do handler,
+    # antes de o streaming da resposta terminar
+    temporario = tempfile.TemporaryFile()
+    shutil.copyfileobj(arquivo.file, temporario)
+    temporario.seek(0)
+    
+    # Lê o primeiro lote antes de iniciar o streaming para validar o arquivo
+    lotes = ler_arquivo_em_lotes(temporario, formato)
+    try:
+        primeiro = next(lotes, None)
+    except ValueError as e:
+        temporario.close()
+        raise HTTPException(status_code=400, detail=f"Arquivo inválido: {str(e)}")
+    
+    if primeiro is None:
+        temporario.close()
+        raise HTTPException(status_code=400, detail="Arquivo vazio")
+    
+    logger.info(f"Avaliando arquivo {arquivo.filename} ({formato}) em lotes...")
+    return StreamingResponse(
+        avaliar_lotes_ndjson(itertools.chain([primeiro], lotes), versao),
+        media_type="application/x-ndjson",
+        background=BackgroundTask(temporario.close)
+    )
+
+
 @app.exception_handler(Exception)
 async def global_exception_handler(request, exc):
     """
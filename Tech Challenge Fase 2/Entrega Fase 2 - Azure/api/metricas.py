@@ -0,0 +1,98 @@
+"""
+Métricas de latência da API no formato texto do Prometheus.
+
+Dois histogramas são mantidos em memória (por processo):
+
+- `diabetes_api_requisicao_segundos{rota, metodo, status}`: duração de cada
+  requisição HTTP, agrupada pelo template da rota (ex.: `/treinamento/{job_id}`);
+- `diabetes_api_etapa_segundos{etapa, modelo}`: duração de cada etapa interna
+  (download do blob, leitura de CSV, imputação, normalização, predict de cada
+  modelo e chamada ao LLM).
+
+Expostos em `GET /metrics`.
+"""
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Sequence, Tuple
+
+# Limites dos buckets (segundos): de 1 ms (predict) a 30 s (LLM/download)
+BUCKETS_PADRAO = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histograma:
+    """Histograma cumulativo com labels, seguro para uso entre threads."""
+
+    def __init__(self, nome: str, descricao: str, labels: Sequence[str],
+                 buckets: Sequence[float] = BUCKETS_PADRAO):
+        self.nome = nome
+        self.descricao = descricao
+        self.labels = tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._series: Dict[Tuple[str, ...], Dict] = {}
+        self._lock = threading.Lock()
+
+    def observar(self, valor: float, **labels) -> None:
+        chave = tuple(str(labels.get(label, "")) for label in self.labels)
+        with self._lock:
+            serie = self._series.get(chave)
+            if serie is None:
+                serie = {"contagens": [0] * len(self.buckets), "soma": 0.0, "total": 0}
+                self._series[chave] = serie
+            for i, limite in enumerate(self.buckets):
+                if valor <= limite:
+                    serie["contagens"][i] += 1
+            serie["soma"] += valor
+            serie["total"] += 1
+
+    def _formatar_labels(self, chave: Tuple[str, ...], extra: str = "") -> str:
+        pares = [f'{nome}="{_escapar(valor)}"' for nome, valor in zip(self.labels, chave)]
+        if extra:
+            pares.append(extra)
+        return "{" + ",".join(pares) + "}" if pares else ""
+
+    def exportar(self) -> List[str]:
+        linhas = [f"# HELP {self.nome} {self.descricao}", f"# TYPE {self.nome} histogram"]
+        with self._lock:
+            series = {chave: dict(serie, contagens=list(serie["contagens"])) for chave, serie in self._series.items()}
+        for chave, serie in sorted(series.items()):
+            for limite, contagem in zip(self.buckets, serie["contagens"]):
+                labels = self._formatar_labels(chave, 'le="%s"' % limite)
+                linhas.append(f"{self.nome}_bucket{labels} {contagem}")
+            labels = self._formatar_labels(chave, 'le="+Inf"')
+            linhas.append(f"{self.nome}_bucket{labels} {serie['total']}")
+            linhas.append(f"{self.nome}_sum{self._formatar_labels(chave)} {serie['soma']}")
+            linhas.append(f"{self.nome}_count{self._formatar_labels(chave)} {serie['total']}")
+        return linhas
+
+
+def _escapar(valor: str) -> str:
+    return valor.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+requisicoes = Histograma(
+    "diabetes_api_requisicao_segundos",
+    "Duração das requisições HTTP por rota.",
+    ("rota", "metodo", "status")
+)
+
+etapas = Histograma(
+    "diabetes_api_etapa_segundos",
+    "Duração das etapas internas por modelo.",
+    ("etapa", "modelo")
+)
+
+
+@contextmanager
+def cronometrar(etapa: str, modelo: str = "") -> Iterator[None]:
+    """Mede o bloco e registra a duração no histograma de etapas."""
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        etapas.observar(time.perf_counter() - inicio, etapa=etapa, modelo=modelo)
+
+
+def gerar_texto_prometheus() -> str:
+    """Conteúdo de `GET /metrics` (text/plain; version=0.0.4)."""
+    return "\n".join(requisicoes.exportar() + etapas.exportar()) + "\n"
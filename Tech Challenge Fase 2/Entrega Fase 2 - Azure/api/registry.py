@@ -0,0 +1,76 @@
+"""
+Registro de modelos em memória.
+
+Mantém os estimadores, o scaler e as medianas de referência carregados uma
+única vez por processo. Um novo treinamento publica uma nova versão, que
+substitui a anterior de forma atômica (troca de referência sob lock), sem
+interromper as requisições que ainda usam a versão antiga.
+"""
+import logging
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Optional
+
+import pandas as pd
+
+logger = logging.getLogger("api.registry")
+
+
+@dataclass(frozen=True)
+class VersaoModelos:
+    """Conjunto imutável de artefatos usados na avaliação."""
+
+    lr: object
+    rf: object
+    scaler: object
+    medianas: pd.Series
+    versao: str = field(default_factory=lambda: time.strftime("%Y%m%d%H%M%S"))
+    carregado_em: float = field(default_factory=time.time)
+    manifesto: Optional[Dict] = None
+
+
+class RegistroModelos:
+    """
+    Guarda a versão ativa dos modelos.
+
+    O ``carregador`` é chamado apenas quando não há versão ativa (startup ou
+    primeira requisição) e em recargas explícitas.
+    """
+
+    def __init__(self, carregador: Callable[[], VersaoModelos]):
+        self._carregador = carregador
+        self._atual: Optional[VersaoModelos] = None
+        self._lock = threading.Lock()
+
+    @property
+    def carregado(self) -> bool:
+        return self._atual is not None
+
+    def atual(self) -> VersaoModelos:
+        """Retorna a versão ativa, carregando-a na primeira chamada."""
+        versao = self._atual
+        if versao is not None:
+            return versao
+
+        with self._lock:
+            if self._atual is None:
+                self._atual = self._carregador()
+                logger.info(f"Modelos carregados em memória (versão {self._atual.versao})")
+            return self._atual
+
+    def publicar(self, versao: VersaoModelos) -> None:
+        """Substitui atomicamente a versão ativa."""
+        with self._lock:
+            anterior = self._atual
+            self._atual = versao
+        logger.info(
+            f"Nova versão de modelos publicada: {versao.versao} "
+            f"(anterior: {anterior.versao if anterior else '-'})"
+        )
+
+    def recarregar(self) -> VersaoModelos:
+        """Recarrega os artefatos do armazenamento e publica como versão ativa."""
+        versao = self._carregador()
+        self.publicar(versao)
+        return versao
@@ -48,6 +48,28 @@ class AvaliacaoResponse(BaseModel):
     paciente: Dict = Field(..., description="Dados do paciente processados")
     resultados: List[PredicaoResultado] = Field(..., description="Resultados de predição de cada modelo")
     explicacao_ia: Optional[str] = Field(None, description="Explicação gerada por IA (se disponível)")
+    explicacao_id: Optional[str] = Field(None, description="Id para consultar a explicação gerada em segundo plano")
+
+
+class ExplicacaoResponse(BaseModel):
+    """Schema para consulta de explicação gerada em segundo plano."""
+    
+    id: str = Field(..., description="Id da explicação")
+    status: str = Field(..., description="Status da geração (processando, concluido, erro)")
+    explicacao_ia: Optional[str] = Field(None, description="Explicação gerada por IA (quando concluída)")
+
+
+class AvaliacaoLoteInput(BaseModel):
+    """Schema para entrada de vários pacientes em uma única requisição."""
+    
+    pacientes: List[PacienteInput] = Field(..., description="Lista de pacientes a avaliar")
+
+
+class AvaliacaoLoteResponse(BaseModel):
+    """Schema para resposta da avaliação em lote (mesma ordem da entrada)."""
+    
+    total: int = Field(..., description="Quantidade de pacientes avaliados")
+    avaliacoes: List[AvaliacaoResponse] = Field(..., description="Avaliações na mesma ordem da entrada")
 
 
 class TreinamentoResponse(BaseModel):
@@ -58,10 +80,26 @@ class TreinamentoResponse(BaseModel):
     metricas_base_lr: Optional[Dict] = Field(None, description="Métricas do modelo Logistic Regression base")
     metricas_base_rf: Optional[Dict] = Field(None, description="Métricas do modelo Random Forest base")
     metricas_otimizado_rf: Optional[Dict] = Field(None, description="Métricas do modelo Random Forest otimizado")
+    metricas_incremental_sgd: Optional[Dict] = Field(None, description="Métricas do modelo incremental (SGD) treinado em lotes")
     melhores_parametros: Optional[Dict] = Field(None, description="Melhores parâmetros encontrados pelo algoritmo genético")
     tempo_execucao: Optional[float] = Field(None, description="Tempo de execução em segundos")
 
 
+class JobTreinamentoResponse(BaseModel):
+    """Schema para estado de um job de treinamento em segundo plano."""
+    
+    id: str = Field(..., description="Id do job")
+    status: str = Field(..., description="Status do job (na_fila, executando, concluido, erro)")
+    fase: Optional[str] = Field(None, description="Fase atual do pipeline de treinamento")
+    geracao: Optional[int] = Field(None, description="Geração atual do algoritmo genético")
+    total_geracoes: Optional[int] = Field(None, description="Total de gerações do algoritmo genético")
+    criado_em: Optional[float] = Field(None, description="Timestamp de criação do job")
+    iniciado_em: Optional[float] = Field(None, description="Timestamp de início da execução")
+    finalizado_em: Optional[float] = Field(None, description="Timestamp de término da execução")
+    resultado: Optional[TreinamentoResponse] = Field(None, description="Resultado do treinamento (quando concluído)")
+    erro: Optional[str] = Field(None, description="Mensagem de erro (quando falhou)")
+
+
 class HealthResponse(BaseModel):
     """Schema para resposta de health check."""
     
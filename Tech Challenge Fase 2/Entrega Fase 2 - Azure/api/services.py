@@ -3,20 +3,25 @@ Serviços de negócio extraídos dos scripts originais.
 """
 import os
 import sys
+import json
 import logging
 import pandas as pd
 import numpy as np
 import joblib
 from pathlib import Path
-from typing import Dict, Tuple, Optional
+from typing import Dict, Tuple, Optional, List, Iterator, Iterable, BinaryIO, Callable
 import traceback
 
 # Adiciona o diretório src ao path para importar utils
 sys.path.insert(0, str(Path(__file__).resolve().parent.parent / "src"))
 
 from utils import medir_tempo, gerar_explicacao_llm
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler
+from genetico import criar_avaliador
+from ingestao import ingerir_csv, treinar_incremental
+from api.registry import RegistroModelos, VersaoModelos
+from api.metricas import cronometrar
+from api.artefatos import salvar_bundle, publicar_bundle, sincronizar_bundle, carregar_bundle
+from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, recall_score, f1_score
@@ -27,6 +32,21 @@ from azure.storage.blob import BlobServiceClient
 BASE_DIR = Path(__file__).resolve().parent.parent
 DATA_DIR = BASE_DIR / "data"
 OUTPUT_DIR = BASE_DIR / "outputs"
+BUNDLE_DIR = OUTPUT_DIR / "bundle"
+
+# Ordem das features esperada pelo scaler e pelos modelos
+FEATURES = [
+    'Pregnancies', 'Glucose', 'BloodPressure', 'SkinThickness',
+    'Insulin', 'BMI', 'DiabetesPedigreeFunction', 'Age'
+]
+COLS_ZERO = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
+
+# Tamanho dos lotes lidos de arquivos enviados para /avaliacao/lote/arquivo
+TAMANHO_LOTE_ARQUIVO = 5000
+
+# Ingestão do dataset de treinamento em lotes (linhas por lote e amostra em memória)
+TAMANHO_LOTE_INGESTAO = int(os.getenv("INGESTAO_TAMANHO_LOTE", "50000"))
+TAMANHO_AMOSTRA_INGESTAO = int(os.getenv("INGESTAO_TAMANHO_AMOSTRA", "200000"))
 
 # Configuração de logging
 logger = logging.getLogger("api.services")
@@ -72,7 +92,7 @@ def download_model(blob_name: str, local_path: Path):
         return False
     
     try:
-        with open(local_path, "wb") as f:
+        with cronometrar("download_blob", blob_name), open(local_path, "wb") as f:
             f.write(container_client.download_blob(blob_name).readall())
         logger.info(f"Modelo {blob_name} baixado do Azure Storage")
         return True
@@ -107,29 +127,183 @@ def carregar_modelos() -> Tuple[object, object, object]:
     return lr, rf, scaler
 
 
-def preparar_dados_paciente(paciente_data: Dict, df_referencia: pd.DataFrame) -> Tuple[pd.DataFrame, np.ndarray]:
+def calcular_medianas_referencia(df_referencia: pd.DataFrame) -> pd.Series:
+    """Medianas das features do dataset de referência, usadas na imputação."""
+    return df_referencia.drop(columns="Outcome", errors="ignore").median()
+
+
+def carregar_versao_modelos() -> VersaoModelos:
+    """
+    Carrega modelos, scaler e medianas de referência.
+    Usado pelo registro de modelos no startup e em recargas.
+    
+    Usa o bundle versionado (baixado apenas se o hash mudou); se ainda não
+    existir bundle, recorre aos arquivos .pkl individuais.
+    """
+    manifesto = sincronizar_bundle(get_azure_client(), BUNDLE_DIR)
+    
+    if manifesto is not None:
+        if manifesto["features"] != FEATURES:
+            raise ValueError(f"Ordem de features do bundle incompatível: {manifesto['features']}")
+        
+        modelos = carregar_bundle(BUNDLE_DIR, manifesto)
+        return VersaoModelos(
+            lr=modelos["lr"],
+            rf=modelos["rf"],
+            scaler=modelos["scaler"],
+            medianas=pd.Series(manifesto["medianas"]),
+            versao=manifesto["versao"],
+            manifesto=manifesto
+        )
+    
+    lr, rf, scaler = carregar_modelos()
+    with cronometrar("leitura_csv"):
+        df = pd.read_csv(DATA_DIR / "diabetes.csv")
+    return VersaoModelos(
+        lr=lr,
+        rf=rf,
+        scaler=scaler,
+        medianas=calcular_medianas_referencia(df)
+    )
+
+
+# Registro único por processo (carregado no startup da API)
+registro_modelos = RegistroModelos(carregar_versao_modelos)
+
+
+def preparar_dados_lote(pacientes: pd.DataFrame, versao: VersaoModelos) -> Tuple[pd.DataFrame, np.ndarray]:
+    """
+    Prepara N pacientes de uma vez para predição.
+    Retorna: (pacientes_raw, pacientes_scaled) com shape (N, 8)
+    """
+    with cronometrar("imputacao"):
+        pacientes = pacientes[FEATURES].copy()
+        
+        # Substitui valores impossíveis
+        pacientes[COLS_ZERO] = pacientes[COLS_ZERO].replace(0, np.nan)
+        
+        # Preenche com medianas do dataset
+        pacientes.fillna(versao.medianas, inplace=True)
+    
+    with cronometrar("normalizacao"):
+        pacientes_scaled = versao.scaler.transform(pacientes)
+    
+    return pacientes, pacientes_scaled
+
+
+def preparar_dados_paciente(paciente_data: Dict, versao: VersaoModelos) -> Tuple[pd.DataFrame, np.ndarray]:
     """
     Prepara dados do paciente para predição.
     Retorna: (paciente_raw, paciente_scaled)
     """
-    paciente = pd.DataFrame([paciente_data])
+    return preparar_dados_lote(pd.DataFrame([paciente_data]), versao)
+
+
+def predizer_lote(versao: VersaoModelos, pacientes_scaled: np.ndarray) -> List[List[Dict]]:
+    """
+    Executa cada modelo uma única vez sobre a matriz (N, 8).
+    Retorna, para cada paciente (na mesma ordem), a lista de resultados por modelo.
+    """
+    modelos = {
+        'Regressão Logística': ("lr", versao.lr),
+        'Random Forest': ("rf", versao.rf)
+    }
     
-    # Substitui valores impossíveis
-    cols_zero = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
-    paciente[cols_zero] = paciente[cols_zero].replace(0, np.nan)
+    resultados = [[] for _ in range(len(pacientes_scaled))]
     
-    # Preenche com medianas do dataset
-    paciente.fillna(df_referencia.median(), inplace=True)
+    for nome, (rotulo, modelo) in modelos.items():
+        with cronometrar("predicao", rotulo):
+            proba = modelo.predict_proba(pacientes_scaled)
+        pred = modelo.classes_[np.argmax(proba, axis=1)]
+        
+        for i, (p0, p1, binaria) in enumerate(zip(proba[:, 0].tolist(), proba[:, 1].tolist(), pred.tolist())):
+            resultados[i].append({
+                "modelo": nome,
+                "predicao": "Positivo para risco de diabetes" if binaria == 1 else "Negativo para risco de diabetes",
+                "probabilidade_nao_diabetes": p0,
+                "probabilidade_diabetes": p1,
+                "predicao_binaria": int(binaria)
+            })
     
-    # Carrega scaler e aplica
-    scaler_path = OUTPUT_DIR / "scaler.pkl"
-    if not scaler_path.exists():
-        download_model("scaler.pkl", scaler_path)
+    return resultados
+
+
+def avaliar_dataframe(pacientes: pd.DataFrame, versao: VersaoModelos) -> List[Dict]:
+    """Avalia um DataFrame de pacientes (sem explicação LLM), preservando a ordem."""
+    pacientes_raw, pacientes_scaled = preparar_dados_lote(pacientes, versao)
+    resultados = predizer_lote(versao, pacientes_scaled)
     
-    scaler = joblib.load(scaler_path)
-    paciente_scaled = scaler.transform(paciente)
+    return [
+        {"paciente": paciente, "resultados": resultado, "explicacao_ia": None}
+        for paciente, resultado in zip(pacientes_raw.to_dict(orient="records"), resultados)
+    ]
+
+
+def avaliar_lote(pacientes_data: List[Dict]) -> List[Dict]:
+    """
+    Avalia N pacientes em uma única chamada de predict_proba por modelo.
+    """
+    if not pacientes_data:
+        return []
     
-    return paciente, paciente_scaled
+    versao = registro_modelos.atual()
+    return avaliar_dataframe(pd.DataFrame(pacientes_data), versao)
+
+
+def ler_arquivo_em_lotes(arquivo: BinaryIO, formato: str,
+                         tamanho_lote: int = TAMANHO_LOTE_ARQUIVO) -> Iterator[pd.DataFrame]:
+    """
+    Lê um arquivo CSV ou NDJSON em lotes, sem carregar o arquivo inteiro em memória.
+    """
+    if formato == "csv":
+        leitor = pd.read_csv(arquivo, chunksize=tamanho_lote)
+    elif formato == "ndjson":
+        leitor = pd.read_json(arquivo, lines=True, chunksize=tamanho_lote)
+    else:
+        raise ValueError(f"Formato não suportado: {formato}")
+    
+    etapa = f"leitura_{formato}"
+    while True:
+        with cronometrar(etapa):
+            lote = next(leitor, None)
+        if lote is None:
+            break
+        
+        faltantes = [c for c in FEATURES if c not in lote.columns]
+        if faltantes:
+            raise ValueError(f"Colunas ausentes no arquivo: {', '.join(faltantes)}")
+        yield lote
+
+
+def avaliar_lotes_ndjson(lotes: Iterable[pd.DataFrame], versao: VersaoModelos) -> Iterator[str]:
+    """
+    Avalia lotes de pacientes e gera uma linha NDJSON por paciente, na ordem de entrada.
+    Toda a execução usa a mesma versão de modelos, mesmo que haja hot-swap no meio.
+    """
+    indice = 0
+    for lote in lotes:
+        for avaliacao in avaliar_dataframe(lote, versao):
+            avaliacao["indice"] = indice
+            indice += 1
+            yield json.dumps(avaliacao, ensure_ascii=False) + "\n"
+    
+    logger.info(f"Avaliação de arquivo concluída: {indice} pacientes")
+
+
+def parametros_explicacao(paciente: Dict, resultados: List[Dict]) -> Dict:
+    """
+    Monta os parâmetros da explicação LLM a partir do resultado do Random Forest.
+    """
+    resultado_rf = resultados[-1]
+    return {
+        "predicao": resultado_rf["predicao"],
+        "probabilidades": {
+            'Não Diabetes': resultado_rf["probabilidade_nao_diabetes"],
+            'Diabetes': resultado_rf["probabilidade_diabetes"]
+        },
+        "paciente_info": paciente,
+        "metricas_modelo": "Avaliação baseada no modelo treinado."
+    }
 
 
 def avaliar_paciente(paciente_data: Dict, incluir_explicacao: bool = True) -> Dict:
@@ -137,59 +311,28 @@ def avaliar_paciente(paciente_data: Dict, incluir_explicacao: bool = True) -> Di
     Avalia um paciente usando os modelos treinados.
     """
     try:
-        # Carrega dataset de referência
-        df = pd.read_csv(DATA_DIR / "diabetes.csv")
-        
-        # Carrega modelos
-        lr, rf, _ = carregar_modelos()
+        # Modelos já carregados em memória (sem download por requisição)
+        versao = registro_modelos.atual()
         
         # Prepara dados do paciente
-        paciente_raw, paciente_scaled = preparar_dados_paciente(paciente_data, df)
+        paciente_raw, paciente_scaled = preparar_dados_paciente(paciente_data, versao)
         
         # Faz predições
-        modelos = {
-            'Regressão Logística': lr,
-            'Random Forest': rf
-        }
+        resultados = predizer_lote(versao, paciente_scaled)[0]
         
-        resultados = []
-        
-        for nome, modelo in modelos.items():
-            pred = modelo.predict(paciente_scaled)
-            proba = modelo.predict_proba(paciente_scaled)
-            
-            pred_texto = "Positivo para risco de diabetes" if pred[0] == 1 else "Negativo para risco de diabetes"
-            
-            resultados.append({
-                "modelo": nome,
-                "predicao": pred_texto,
-                "probabilidade_nao_diabetes": float(proba[0][0]),
-                "probabilidade_diabetes": float(proba[0][1]),
-                "predicao_binaria": int(pred[0])
-            })
+        paciente = paciente_raw.to_dict(orient="records")[0]
         
         # Gera explicação com LLM (usando Random Forest)
         explicacao_ia = None
         if incluir_explicacao:
             try:
-                pred_rf = rf.predict(paciente_scaled)
-                proba_rf = rf.predict_proba(paciente_scaled)
-                pred_texto_rf = "Positivo para risco de diabetes" if pred_rf[0] == 1 else "Negativo para risco de diabetes"
-                
-                classes = ['Não Diabetes', 'Diabetes']
-                probabilidades = {classes[i]: float(proba_rf[0][i]) for i in range(len(classes))}
-                
-                explicacao_ia = gerar_explicacao_llm(
-                    predicao=pred_texto_rf,
-                    probabilidades=probabilidades,
-                    paciente_info=paciente_raw.to_dict(orient="records")[0],
-                    metricas_modelo="Avaliação baseada no modelo treinado."
-                )
+                with cronometrar("llm", "gpt-4o-mini"):
+                    explicacao_ia = gerar_explicacao_llm(**parametros_explicacao(paciente, resultados))
             except Exception as e:
                 logger.warning(f"Erro ao gerar explicação LLM: {e}")
         
         return {
-            "paciente": paciente_raw.to_dict(orient="records")[0],
+            "paciente": paciente,
             "resultados": resultados,
             "explicacao_ia": explicacao_ia
         }
@@ -200,10 +343,13 @@ def avaliar_paciente(paciente_data: Dict, incluir_explicacao: bool = True) -> Di
         raise
 
 
-def treinar_modelos() -> Dict:
+def treinar_modelos(progresso: Optional[Callable[..., None]] = None) -> Dict:
     """
     Treina os modelos de machine learning.
     Retorna métricas e informações do treinamento.
+    
+    `progresso(fase, **detalhes)` é chamado a cada etapa (usado pelos jobs de
+    treinamento para reportar fase e geração do algoritmo genético).
     """
     import time
     import random
@@ -211,56 +357,46 @@ def treinar_modelos() -> Dict:
     logger.info("===== INICIO DO TREINAMENTO =====")
     inicio_total = time.time()
     
+    def reportar(fase: str, **detalhes):
+        if progresso is not None:
+            progresso(fase, **detalhes)
+    
     try:
         # Carregamento e preparação
-        logger.info("Carregando dataset...")
-        df = pd.read_csv(DATA_DIR / "diabetes.csv")
-        logger.info(f"Dataset carregado com {df.shape[0]} linhas e {df.shape[1]} colunas.")
-        
-        # Tratamento de valores zero
-        cols_zero = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
-        df[cols_zero] = df[cols_zero].replace(0, np.nan)
-        df.fillna(df.median(), inplace=True)
-        
-        # Processamento em lotes
-        @medir_tempo("treinamento_random_forest")
-        def processar_em_lotes(dataset, lote_inicial=150):
-            lote = lote_inicial
-            dados_processados = []
-            
-            for inicio in range(0, len(dataset), lote):
-                fim = min(inicio + lote, len(dataset))
-                lote_df = dataset.iloc[inicio:fim]
-                
-                if len(lote_df) > 120:
-                    lote += 50
-                else:
-                    lote = max(100, lote - 20)
-                
-                dados_processados.append(lote_df)
-            
-            return pd.concat(dados_processados, axis=0)
-        
-        df = processar_em_lotes(df)
+        reportar("carregando_dados")
+        logger.info("Carregando dataset em lotes...")
+        ingestao = ingerir_csv(
+            DATA_DIR / "diabetes.csv",
+            tamanho_lote=TAMANHO_LOTE_INGESTAO,
+            tamanho_amostra=TAMANHO_AMOSTRA_INGESTAO
+        )
+        df = ingestao.amostra
+        logger.info(
+            f"Dataset carregado com {ingestao.total_linhas} linhas e {df.shape[1]} colunas "
+            f"(amostra em memória: {df.shape[0]} linhas)."
+        )
+        medianas_referencia = ingestao.medianas_brutas
         
         # Preparação normal
         X = df.drop("Outcome", axis=1)
         y = df["Outcome"]
         
         logger.info("Normalizando variáveis...")
-        scaler = StandardScaler()
-        X_scaled = scaler.fit_transform(X)
+        scaler = ingestao.scaler
+        X_scaled = scaler.transform(X)
         
         logger.info("Separando treino e teste...")
         X_train, X_test, y_train, y_test = train_test_split(
             X_scaled, y, test_size=0.2, random_state=42, stratify=y
         )
         
+        reportar("balanceamento_smote")
         logger.info("Aplicando SMOTE (balanceamento)...")
         smote = SMOTE(random_state=42)
         X_train_res, y_train_res = smote.fit_resample(X_train, y_train)
         
         # Treinamento modelos base
+        reportar("modelos_base")
         logger.info("Treinando modelos base...")
         lr_base = LogisticRegression(max_iter=500, random_state=42)
         rf_base = RandomForestClassifier(n_estimators=100, random_state=42)
@@ -286,15 +422,26 @@ def treinar_modelos() -> Dict:
         logger.info(f"BASE LR -> {metricas_lr}")
         logger.info(f"BASE RF -> {metricas_rf}")
         
-        # Algoritmo Genético
-        def fitness(model, X, y):
-            try:
-                scores = cross_val_score(model, X, y, cv=3, scoring="f1")
-                return scores.mean()
-            except Exception as e:
-                logger.error(f"Erro ao calcular fitness: {e}")
-                return 0
+        # Modelo incremental: arquivo completo em lotes, exceto as linhas de teste
+        reportar("modelo_incremental")
+        logger.info("Treinando modelo incremental (SGD) em lotes...")
+        sgd_incremental = treinar_incremental(
+            DATA_DIR / "diabetes.csv",
+            ingestao,
+            linhas_ignoradas=y_test.index,
+            tamanho_lote=TAMANHO_LOTE_INGESTAO
+        )
+        y_pred_sgd = sgd_incremental.predict(X_test)
+        
+        metricas_sgd = {
+            "accuracy": float(accuracy_score(y_test, y_pred_sgd)),
+            "recall": float(recall_score(y_test, y_pred_sgd)),
+            "f1": float(f1_score(y_test, y_pred_sgd))
+        }
         
+        logger.info(f"INCREMENTAL SGD -> {metricas_sgd}")
+        
+        # Algoritmo Genético
         def gerar_individuo():
             return {
                 "n_estimators": random.randint(50, 200),
@@ -309,7 +456,6 @@ def treinar_modelos() -> Dict:
                 ind["min_samples_split"] = random.randint(2, 10)
             return ind
         
-        @medir_tempo("treinamento_random_forest")
         def crossover(pai, mae):
             filho = {}
             for k in pai:
@@ -317,38 +463,47 @@ def treinar_modelos() -> Dict:
             return filho
         
         logger.info("Iniciando otimização genética...")
-        POP = 5
-        GERACOES = 3
+        POP = int(os.getenv("GA_POPULACAO", "5"))
+        GERACOES = int(os.getenv("GA_GERACOES", "3"))
+        N_JOBS = int(os.getenv("GA_N_JOBS", "-1"))
+        MODO_BUSCA = os.getenv("GA_MODO", "padrao")
         
         populacao = [gerar_individuo() for _ in range(POP)]
         inicio_ga = time.time()
         
-        for g in range(GERACOES):
-            logger.info(f"--- Geração {g+1}/{GERACOES} ---")
-            
-            avaliacoes = []
-            for individuo in populacao:
-                modelo = RandomForestClassifier(
-                    n_estimators=individuo["n_estimators"],
-                    max_depth=individuo["max_depth"],
-                    min_samples_split=individuo["min_samples_split"],
-                    random_state=42
+        with criar_avaliador(MODO_BUSCA, X_train_res, y_train_res, cv=3, n_jobs=N_JOBS) as avaliador:
+            for g in range(GERACOES):
+                logger.info(f"--- Geração {g+1}/{GERACOES} ---")
+                reportar("algoritmo_genetico", geracao=g + 1, total_geracoes=GERACOES)
+                inicio_geracao = time.time()
+                
+                avaliacoes, estatisticas = avaliador.avaliar(populacao)
+                
+                avaliacoes.sort(reverse=True, key=lambda x: x[0])
+                melhores = avaliacoes[:3]
+                
+                inicio_reproducao = time.time()
+                nova_pop = [i[1] for i in melhores]
+                
+                # no modo rápido, geramos mais candidatos e o modelo substituto escolhe os melhores
+                vagas = POP - len(nova_pop)
+                candidatos = []
+                while len(candidatos) < vagas * avaliador.fator_candidatos:
+                    pai, mae = random.sample(melhores, 2)
+                    filho = crossover(pai[1], mae[1])
+                    filho = mutacao(filho)
+                    candidatos.append(filho)
+                nova_pop.extend(avaliador.selecionar_candidatos(candidatos, vagas))
+                
+                populacao = nova_pop
+                
+                logger.info(
+                    f"Tempo geração {g+1}: total={time.time() - inicio_geracao:.2f}s | "
+                    f"avaliação={estatisticas['tempo_avaliacao']:.2f}s "
+                    f"({estatisticas['avaliados']} avaliados, {estatisticas['memo']} do memo, "
+                    f"{estatisticas['podados']} podados) | "
+                    f"reprodução={time.time() - inicio_reproducao:.2f}s"
                 )
-                score = fitness(modelo, X_train_res, y_train_res)
-                avaliacoes.append((score, individuo))
-            
-            avaliacoes.sort(reverse=True, key=lambda x: x[0])
-            melhores = avaliacoes[:3]
-            
-            nova_pop = [i[1] for i in melhores]
-            
-            while len(nova_pop) < POP:
-                pai, mae = random.sample(melhores, 2)
-                filho = crossover(pai[1], mae[1])
-                filho = mutacao(filho)
-                nova_pop.append(filho)
-            
-            populacao = nova_pop
         
         fim_ga = time.time()
         logger.info(f"Tempo total de execução do GA: {(fim_ga - inicio_ga):.2f} segundos")
@@ -357,8 +512,9 @@ def treinar_modelos() -> Dict:
         best_params = melhores[0][1]
         logger.info(f"Melhores parâmetros encontrados: {best_params}")
         
+        reportar("modelo_otimizado")
         rf_otimizado = RandomForestClassifier(**best_params, random_state=42)
-        rf_otimizado.fit(X_train_res, y_train_res)
+        medir_tempo("treinamento_random_forest")(rf_otimizado.fit)(X_train_res, y_train_res)
         y_pred_rf_opt = rf_otimizado.predict(X_test)
         
         metricas_rf_opt = {
@@ -370,19 +526,54 @@ def treinar_modelos() -> Dict:
         logger.info(f"OTIMIZADO RF -> {metricas_rf_opt}")
         
         # Salvar modelos
+        reportar("salvando_modelos")
         OUTPUT_DIR.mkdir(exist_ok=True)
         joblib.dump(lr_base, OUTPUT_DIR / "lr_model.pkl")
         joblib.dump(rf_base, OUTPUT_DIR / "rf_model.pkl")
         joblib.dump(rf_otimizado, OUTPUT_DIR / "rf_optimized.pkl")
         joblib.dump(scaler, OUTPUT_DIR / "scaler.pkl")
+        joblib.dump(sgd_incremental, OUTPUT_DIR / "sgd_model.pkl")
         
         logger.info("Modelos salvos com sucesso!")
         
         # Upload para Azure
+        reportar("upload_azure")
         upload_model(OUTPUT_DIR / "lr_model.pkl", "lr_model.pkl")
         upload_model(OUTPUT_DIR / "rf_model.pkl", "rf_model.pkl")
         upload_model(OUTPUT_DIR / "rf_optimized.pkl", "rf_optimized.pkl")
         upload_model(OUTPUT_DIR / "scaler.pkl", "scaler.pkl")
+        upload_model(OUTPUT_DIR / "sgd_model.pkl", "sgd_model.pkl")
+        
+        # Bundle versionado (arquivo único + manifesto)
+        manifesto = salvar_bundle(
+            BUNDLE_DIR,
+            modelos={
+                "lr": lr_base,
+                "rf": rf_base,
+                "rf_otimizado": rf_otimizado,
+                "sgd": sgd_incremental,
+                "scaler": scaler
+            },
+            features=list(X.columns),
+            medianas=medianas_referencia,
+            metricas={
+                "base_lr": metricas_lr,
+                "base_rf": metricas_rf,
+                "otimizado_rf": metricas_rf_opt,
+                "incremental_sgd": metricas_sgd
+            },
+            parametros=best_params
+        )
+        
+        container_client = get_azure_client()
+        if container_client:
+            try:
+                publicar_bundle(container_client, BUNDLE_DIR, manifesto)
+            except Exception as e:
+                logger.error(f"Erro ao publicar bundle de modelos: {e}")
+        
+        # Este código roda no processo worker: o registro em memória da API é
+        # atualizado por FilaTreinamento.ao_concluir (recarregar), não aqui
         
         fim_total = time.time()
         tempo_execucao = fim_total - inicio_total
@@ -395,6 +586,7 @@ def treinar_modelos() -> Dict:
             "metricas_base_lr": metricas_lr,
             "metricas_base_rf": metricas_rf,
             "metricas_otimizado_rf": metricas_rf_opt,
+            "metricas_incremental_sgd": metricas_sgd,
             "melhores_parametros": best_params,
             "tempo_execucao": tempo_execucao
         }
@@ -333,6 +333,31 @@ function exibirErroTreinamento(mensagem) {
     document.getElementById('treinamento-erro-mensagem').textContent = mensagem;
 }
 
+// Descrição das fases reportadas pelo job de treinamento
+const FASES_TREINAMENTO = {
+    carregando_dados: 'Carregando e preparando o dataset',
+    balanceamento_smote: 'Aplicando SMOTE (balanceamento)',
+    modelos_base: 'Treinando modelos base',
+    algoritmo_genetico: 'Otimizando Random Forest (algoritmo genético)',
+    modelo_incremental: 'Treinando modelo incremental (SGD) em lotes',
+    modelo_otimizado: 'Treinando Random Forest otimizado',
+    salvando_modelos: 'Salvando modelos',
+    upload_azure: 'Enviando modelos para o Azure Storage',
+    concluido: 'Concluído'
+};
+
+// Atualiza o texto de progresso do treinamento
+function exibirProgressoTreinamento(job) {
+    let texto = job.status === 'na_fila' ? 'Job na fila, aguardando execução...' : 'Iniciando...';
+    if (job.fase) {
+        texto = FASES_TREINAMENTO[job.fase] || job.fase;
+        if (job.fase === 'algoritmo_genetico' && job.geracao) {
+            texto += ` — geração ${job.geracao}/${job.total_geracoes}`;
+        }
+    }
+    document.getElementById('treinamento-progresso').textContent = texto;
+}
+
 // Função para treinar modelos
 async function treinarModelos() {
     // Mostra loading e esconde outros elementos
@@ -341,7 +366,7 @@ async function treinarModelos() {
     document.getElementById('treinamento-erro').classList.add('hidden');
     
     try {
-        // Faz requisição para API
+        // Inicia o job de treinamento
         const response = await fetch(`${API_BASE_URL}/treinamento`, {
             method: 'POST',
             headers: {
@@ -354,8 +379,28 @@ async function treinarModelos() {
             throw new Error(errorData.detail || 'Erro ao treinar modelos');
         }
         
-        const data = await response.json();
-        exibirResultadosTreinamento(data);
+        let job = await response.json();
+        exibirProgressoTreinamento(job);
+        
+        // Acompanha o progresso até o job terminar
+        while (job.status === 'na_fila' || job.status === 'executando') {
+            await new Promise(resolve => setTimeout(resolve, 3000));
+            
+            const statusResponse = await fetch(`${API_BASE_URL}/treinamento/${job.id}`);
+            if (!statusResponse.ok) {
+                const errorData = await statusResponse.json();
+                throw new Error(errorData.detail || 'Erro ao consultar treinamento');
+            }
+            
+            job = await statusResponse.json();
+            exibirProgressoTreinamento(job);
+        }
+        
+        if (job.status === 'erro') {
+            throw new Error(job.erro || 'Erro ao treinar modelos');
+        }
+        
+        exibirResultadosTreinamento(job.resultado);
         
     } catch (error) {
         exibirErroTreinamento(error.message);
@@ -0,0 +1,104 @@
+"""
+Gerador de carga para /avaliacao
+Reenvia, de forma concorrente, os pacientes usados nos scripts de teste
+(teste_01 a teste_07) e reporta vazão e latência (p50/p95/p99).
+
+Uso:
+    python script_teste/carga_avaliacao.py --requisicoes 500 --concorrencia 20
+    python script_teste/carga_avaliacao.py --url https://fiap-techchallengefiap-fase2.azurewebsites.net --explicacao
+"""
+import argparse
+import ast
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+import requests
+
+# URL da API
+API_URL = "http://localhost:8000"
+#API_URL = "https://fiap-techchallengefiap-fase2.azurewebsites.net"
+
+FEATURES = {
+    "Pregnancies", "Glucose", "BloodPressure", "SkinThickness",
+    "Insulin", "BMI", "DiabetesPedigreeFunction", "Age"
+}
+
+
+def carregar_pacientes():
+    """Extrai os dicionários de pacientes dos scripts teste_*.py."""
+    pacientes = []
+    for script in sorted(Path(__file__).resolve().parent.glob("teste_*.py")):
+        arvore = ast.parse(script.read_text(encoding="utf-8"))
+        for no in ast.walk(arvore):
+            if isinstance(no, ast.Dict) and all(isinstance(k, ast.Constant) for k in no.keys):
+                if {k.value for k in no.keys} == FEATURES:
+                    pacientes.append(ast.literal_eval(no))
+    return pacientes
+
+
+def percentil(valores, p):
+    ordenados = sorted(valores)
+    indice = min(len(ordenados) - 1, max(0, round(p / 100 * len(ordenados)) - 1))
+    return ordenados[indice]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", default=API_URL)
+    parser.add_argument("--requisicoes", type=int, default=200)
+    parser.add_argument("--concorrencia", type=int, default=10)
+    parser.add_argument("--explicacao", action="store_true", help="Inclui a explicação por IA (chama o LLM)")
+    args = parser.parse_args()
+
+    pacientes = carregar_pacientes()
+    if not pacientes:
+        raise SystemExit("Nenhum paciente encontrado nos scripts de teste")
+
+    print("=" * 60)
+    print("CARGA: /avaliacao")
+    print("=" * 60)
+    print(f"{len(pacientes)} pacientes dos scripts de teste | {args.requisicoes} requisições | "
+          f"concorrência {args.concorrencia} | explicação IA: {args.explicacao}")
+
+    sessao = requests.Session()
+    adaptador = requests.adapters.HTTPAdapter(pool_maxsize=args.concorrencia)
+    sessao.mount("http://", adaptador)
+    sessao.mount("https://", adaptador)
+
+    def enviar(i):
+        inicio = time.perf_counter()
+        try:
+            resposta = sessao.post(
+                f"{args.url}/avaliacao",
+                json=pacientes[i % len(pacientes)],
+                params={"incluir_explicacao": args.explicacao},
+                timeout=60
+            )
+            status = resposta.status_code
+        except requests.exceptions.RequestException:
+            status = None
+        return time.perf_counter() - inicio, status
+
+    inicio = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=args.concorrencia) as executor:
+        resultados = list(executor.map(enviar, range(args.requisicoes)))
+    duracao = time.perf_counter() - inicio
+
+    latencias = [latencia * 1000 for latencia, status in resultados if status == 200]
+    erros = [status for _, status in resultados if status != 200]
+
+    print(f"\n✅ Sucesso: {len(latencias)} | ❌ Erros: {len(erros)}"
+          + (f" (status: {sorted(set(map(str, erros)))})" if erros else ""))
+    print(f"⏱️  Duração: {duracao:.2f}s | Vazão: {len(resultados) / duracao:.1f} req/s")
+
+    if latencias:
+        print(f"📊 Latência (ms): p50={percentil(latencias, 50):.1f} "
+              f"p95={percentil(latencias, 95):.1f} p99={percentil(latencias, 99):.1f} "
+              f"máx={max(latencias):.1f}")
+
+    print(f"\nMétricas por rota e etapa: {args.url}/metrics")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,92 @@
+"""
+Script de teste 07: Avaliação em lote
+Este teste envia vários pacientes em uma única requisição para /avaliacao/lote
+e, em seguida, o dataset completo como arquivo CSV para /avaliacao/lote/arquivo,
+lendo a resposta NDJSON em streaming.
+"""
+import requests
+import json
+import time
+from pathlib import Path
+
+# URL da API
+API_URL = "http://localhost:8000"
+#API_URL = "https://fiap-techchallengefiap-fase2.azurewebsites.net"
+
+CSV_PATH = Path(__file__).resolve().parent.parent / "data" / "diabetes.csv"
+
+
+def testar_avaliacao_lote():
+    """Testa avaliação de múltiplos pacientes em uma única requisição."""
+
+    print("=" * 60)
+    print("TESTE 07: Avaliação em Lote")
+    print("=" * 60)
+
+    pacientes = [
+        {"Pregnancies": 0, "Glucose": 80, "BloodPressure": 65, "SkinThickness": 20,
+         "Insulin": 0, "BMI": 22.0, "DiabetesPedigreeFunction": 0.200, "Age": 28},
+        {"Pregnancies": 8, "Glucose": 183, "BloodPressure": 64, "SkinThickness": 0,
+         "Insulin": 0, "BMI": 23.3, "DiabetesPedigreeFunction": 0.672, "Age": 32},
+        {"Pregnancies": 1, "Glucose": 89, "BloodPressure": 66, "SkinThickness": 23,
+         "Insulin": 94, "BMI": 28.1, "DiabetesPedigreeFunction": 0.167, "Age": 21},
+        {"Pregnancies": 0, "Glucose": 137, "BloodPressure": 40, "SkinThickness": 35,
+         "Insulin": 168, "BMI": 43.1, "DiabetesPedigreeFunction": 2.288, "Age": 33},
+        {"Pregnancies": 5, "Glucose": 116, "BloodPressure": 74, "SkinThickness": 0,
+         "Insulin": 0, "BMI": 25.6, "DiabetesPedigreeFunction": 0.201, "Age": 30},
+    ]
+
+    try:
+        print(f"\n🔄 Enviando {len(pacientes)} pacientes para /avaliacao/lote...")
+        inicio = time.time()
+        response = requests.post(f"{API_URL}/avaliacao/lote", json={"pacientes": pacientes})
+
+        if response.status_code == 200:
+            resultado = response.json()
+            print(f"✅ {resultado['total']} pacientes avaliados em {time.time() - inicio:.2f}s")
+
+            for i, avaliacao in enumerate(resultado["avaliacoes"], 1):
+                pred_rf = avaliacao["resultados"][1]
+                print(f"   Paciente {i}: {pred_rf['predicao']} "
+                      f"(Prob. Diabetes: {pred_rf['probabilidade_diabetes']:.2%})")
+        else:
+            print(f"❌ Erro na requisição: {response.status_code}")
+            print(f"Detalhes: {response.text}")
+
+    except requests.exceptions.ConnectionError:
+        print("\n❌ ERRO: Não foi possível conectar à API.")
+        print(f"Certifique-se de que a API está rodando em {API_URL}")
+        return
+
+    print(f"\n🔄 Enviando arquivo {CSV_PATH.name} para /avaliacao/lote/arquivo...")
+    inicio = time.time()
+    total = 0
+    positivos = 0
+
+    with open(CSV_PATH, "rb") as f:
+        response = requests.post(
+            f"{API_URL}/avaliacao/lote/arquivo",
+            files={"arquivo": (CSV_PATH.name, f, "text/csv")},
+            stream=True
+        )
+
+        if response.status_code != 200:
+            print(f"❌ Erro na requisição: {response.status_code}")
+            print(f"Detalhes: {response.text}")
+            return
+
+        for linha in response.iter_lines():
+            if not linha:
+                continue
+            avaliacao = json.loads(linha)
+            total += 1
+            positivos += avaliacao["resultados"][1]["predicao_binaria"]
+
+    duracao = time.time() - inicio
+    print(f"✅ {total} pacientes avaliados em {duracao:.2f}s "
+          f"({total / duracao if duracao > 0 else 0:.0f} pacientes/s)")
+    print(f"   Positivos (Random Forest): {positivos}")
+
+
+if __name__ == "__main__":
+    testar_avaliacao_lote()
@@ -0,0 +1,134 @@
+"""
+Benchmark do algoritmo genético: modo padrão x modo rápido.
+
+Executa a mesma busca (mesma semente, população e gerações) com os dois
+avaliadores de fitness e compara F1 (validação cruzada e teste), tempo e
+número de árvores treinadas (proxy do custo de CPU).
+
+Uso:
+    python src/benchmark_genetico.py --populacao 20 --geracoes 10 --sementes 3
+"""
+import argparse
+import random
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+from imblearn.over_sampling import SMOTE
+from sklearn.ensemble import RandomForestClassifier
+from sklearn.metrics import f1_score
+from sklearn.model_selection import train_test_split
+from sklearn.preprocessing import StandardScaler
+
+from genetico import criar_avaliador
+
+DATA_DIR = Path(__file__).resolve().parent.parent / "data"
+
+
+# mesmos operadores de treinamento.py
+def gerar_individuo():
+    return {
+        "n_estimators": random.randint(50, 200),
+        "max_depth": random.choice([None, 4, 6, 8, 10]),
+        "min_samples_split": random.randint(2, 10)
+    }
+
+
+def mutacao(ind):
+    if random.random() < 0.5:
+        ind["n_estimators"] = random.randint(50, 200)
+    else:
+        ind["min_samples_split"] = random.randint(2, 10)
+    return ind
+
+
+def crossover(pai, mae):
+    return {k: random.choice([pai[k], mae[k]]) for k in pai}
+
+
+def preparar_dados():
+    df = pd.read_csv(DATA_DIR / "diabetes.csv")
+    cols_zero = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
+    df[cols_zero] = df[cols_zero].replace(0, np.nan)
+    df.fillna(df.median(), inplace=True)
+
+    X = StandardScaler().fit_transform(df.drop("Outcome", axis=1))
+    y = df["Outcome"]
+    X_train, X_test, y_train, y_test = train_test_split(
+        X, y, test_size=0.2, random_state=42, stratify=y
+    )
+    X_train_res, y_train_res = SMOTE(random_state=42).fit_resample(X_train, y_train)
+    return X_train_res, y_train_res, X_test, y_test
+
+
+def executar_busca(modo, X, y, populacao_tamanho, geracoes, semente, n_jobs):
+    random.seed(semente)
+    populacao = [gerar_individuo() for _ in range(populacao_tamanho)]
+
+    inicio = time.time()
+    with criar_avaliador(modo, X, y, cv=3, n_jobs=n_jobs) as avaliador:
+        for _ in range(geracoes):
+            avaliacoes, _ = avaliador.avaliar(populacao)
+            avaliacoes.sort(reverse=True, key=lambda x: x[0])
+            melhores = avaliacoes[:3]
+
+            nova_pop = [i[1] for i in melhores]
+            vagas = populacao_tamanho - len(nova_pop)
+            candidatos = []
+            while len(candidatos) < vagas * avaliador.fator_candidatos:
+                pai, mae = random.sample(melhores, 2)
+                candidatos.append(mutacao(crossover(pai[1], mae[1])))
+            nova_pop.extend(avaliador.selecionar_candidatos(candidatos, vagas))
+            populacao = nova_pop
+
+        # fitness exata (3 folds completos) do melhor genoma, para comparação justa
+        melhor = melhores[0][1]
+        f1_cv = criar_avaliador("padrao", X, y, cv=3, n_jobs=n_jobs).avaliar([melhor])[0][0][0]
+
+    return {
+        "melhor": melhor,
+        "f1_cv": f1_cv,
+        "tempo": time.time() - inicio,
+        "arvores": avaliador.arvores_treinadas,
+        "podados": len(getattr(avaliador, "podados", ())),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--populacao", type=int, default=20)
+    parser.add_argument("--geracoes", type=int, default=10)
+    parser.add_argument("--sementes", type=int, default=3)
+    parser.add_argument("--n-jobs", type=int, default=-1)
+    args = parser.parse_args()
+
+    X_train, y_train, X_test, y_test = preparar_dados()
+
+    resultados = {"padrao": [], "rapido": []}
+    for semente in range(args.sementes):
+        for modo in resultados:
+            r = executar_busca(modo, X_train, y_train, args.populacao, args.geracoes, semente, args.n_jobs)
+
+            modelo = RandomForestClassifier(**r["melhor"], random_state=42).fit(X_train, y_train)
+            r["f1_teste"] = f1_score(y_test, modelo.predict(X_test))
+            resultados[modo].append(r)
+
+            print(f"semente={semente} modo={modo:<6} f1_cv={r['f1_cv']:.4f} f1_teste={r['f1_teste']:.4f} "
+                  f"tempo={r['tempo']:.1f}s arvores={r['arvores']} podados={r['podados']} melhor={r['melhor']}")
+
+    print("\nResumo (médias)")
+    print(f"{'modo':<8}{'f1_cv':>8}{'f1_teste':>10}{'tempo(s)':>10}{'arvores':>10}")
+    for modo, lista in resultados.items():
+        print(f"{modo:<8}"
+              f"{np.mean([r['f1_cv'] for r in lista]):>8.4f}"
+              f"{np.mean([r['f1_teste'] for r in lista]):>10.4f}"
+              f"{np.mean([r['tempo'] for r in lista]):>10.1f}"
+              f"{np.mean([r['arvores'] for r in lista]):>10.0f}")
+
+    economia = 1 - np.mean([r["arvores"] for r in resultados["rapido"]]) / np.mean([r["arvores"] for r in resultados["padrao"]])
+    print(f"\nÁrvores treinadas a menos no modo rápido: {economia:.0%}")
+
+
+if __name__ == "__main__":
+    main()
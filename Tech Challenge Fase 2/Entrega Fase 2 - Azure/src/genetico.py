@@ -0,0 +1,237 @@
+import time
+import logging
+
+import numpy as np
+from joblib import Parallel, delayed
+from sklearn.model_selection import StratifiedKFold
+from sklearn.ensemble import RandomForestClassifier, RandomForestRegressor
+from sklearn.metrics import f1_score
+
+logger = logging.getLogger(__name__)
+
+
+# chave do memo de fitness: genoma (hiperparâmetros) do indivíduo
+def chave_genoma(individuo):
+    return tuple(sorted(individuo.items()))
+
+
+# treina e pontua um único fold (executado nos processos do pool)
+def _f1_fold(params, X, y, idx_treino, idx_teste, random_state):
+    try:
+        modelo = RandomForestClassifier(**params, random_state=random_state)
+        modelo.fit(X[idx_treino], y[idx_treino])
+        return f1_score(y[idx_teste], modelo.predict(X[idx_teste]))
+    except Exception as e:
+        logger.error(f"Erro ao calcular fitness: {e}")
+        return np.nan
+
+
+# pontua um fold para vários n_estimators reaproveitando as árvores já treinadas
+# (warm_start); a floresta de n árvores é idêntica à treinada do zero
+def _f1_fold_warm(params, lista_n_estimators, X, y, idx_treino, idx_teste, random_state):
+    scores = []
+    modelo = RandomForestClassifier(**params, warm_start=True, random_state=random_state)
+    for n_estimators in lista_n_estimators:
+        try:
+            modelo.set_params(n_estimators=n_estimators)
+            modelo.fit(X[idx_treino], y[idx_treino])
+            scores.append(f1_score(y[idx_teste], modelo.predict(X[idx_teste])))
+        except Exception as e:
+            logger.error(f"Erro ao calcular fitness: {e}")
+            scores.append(np.nan)
+    return scores
+
+
+# vetor numérico do genoma para o modelo substituto (max_depth=None -> sem limite)
+def _codificar_genoma(individuo):
+    max_depth = individuo["max_depth"] if individuo["max_depth"] is not None else 50
+    return [individuo["n_estimators"], max_depth, individuo["min_samples_split"]]
+
+
+class AvaliadorFitness:
+    """
+    Avalia a fitness (F1 médio em validação cruzada) de uma população inteira
+    em paralelo: cada par (indivíduo, fold) vira uma tarefa no pool de processos.
+    Genomas já avaliados (ex.: elite da geração anterior) saem do memo sem custo.
+    Equivale a cross_val_score(model, X, y, cv=cv, scoring="f1").
+    """
+
+    # quantos candidatos gerar por vaga de filho (ver selecionar_candidatos)
+    fator_candidatos = 1
+
+    def __init__(self, X, y, cv=3, n_jobs=-1, random_state=42):
+        self.X = np.asarray(X)
+        self.y = np.asarray(y)
+        self.folds = list(StratifiedKFold(n_splits=cv).split(self.X, self.y))
+        self.n_jobs = n_jobs
+        self.random_state = random_state
+        self.memo = {}
+        self.pool = Parallel(n_jobs=n_jobs)
+        self.arvores_treinadas = 0
+
+    def avaliar(self, populacao):
+        """
+        Retorna [(score, individuo), ...] na ordem da população e as
+        estatísticas de tempo da geração.
+        """
+        inicio = time.time()
+
+        pendentes = []
+        for individuo in populacao:
+            chave = chave_genoma(individuo)
+            if chave not in self.memo and chave not in pendentes:
+                pendentes.append(chave)
+
+        estatisticas = {
+            "individuos": len(populacao),
+            "avaliados": len(pendentes),
+            "memo": len(populacao) - len(pendentes),
+            "podados": 0,
+        }
+
+        if pendentes:
+            estatisticas.update(self._pontuar(pendentes))
+
+        avaliacoes = [(self.memo[chave_genoma(ind)], ind) for ind in populacao]
+
+        estatisticas["tempo_avaliacao"] = time.time() - inicio
+        return avaliacoes, estatisticas
+
+    def _pontuar(self, pendentes):
+        scores = self.pool(
+            delayed(_f1_fold)(dict(chave), self.X, self.y, idx_treino, idx_teste, self.random_state)
+            for chave in pendentes
+            for idx_treino, idx_teste in self.folds
+        )
+        n_folds = len(self.folds)
+        for i, chave in enumerate(pendentes):
+            scores_individuo = scores[i * n_folds:(i + 1) * n_folds]
+            self.memo[chave] = 0 if np.isnan(scores_individuo).any() else float(np.mean(scores_individuo))
+            self.arvores_treinadas += dict(chave)["n_estimators"] * n_folds
+        return {}
+
+    def selecionar_candidatos(self, candidatos, n):
+        """Escolhe os n filhos que entram na próxima geração."""
+        return candidatos[:n]
+
+    def __enter__(self):
+        self.pool.__enter__()
+        return self
+
+    def __exit__(self, *args):
+        self.pool.__exit__(*args)
+
+
+class AvaliadorFitnessRapido(AvaliadorFitness):
+    """
+    Modo de busca rápida do algoritmo genético:
+
+    - warm start: indivíduos que diferem apenas em n_estimators compartilham a
+      mesma floresta por fold, que cresce de um tamanho ao seguinte;
+    - poda antecipada: todos são avaliados primeiro no fold 1; quem fica abaixo
+      do limiar da elite atual (menos `margem_poda`) não treina os demais folds
+      e recebe como fitness o score parcial;
+    - modelo substituto: um RandomForestRegressor treinado com o histórico
+      (genoma -> fitness) ordena `fator_candidatos` vezes mais filhos do que
+      as vagas, e apenas os mais promissores são avaliados.
+    """
+
+    fator_candidatos = 3
+
+    def __init__(self, X, y, cv=3, n_jobs=-1, random_state=42,
+                 tamanho_elite=3, margem_poda=0.02, min_historico_substituto=6):
+        super().__init__(X, y, cv=cv, n_jobs=n_jobs, random_state=random_state)
+        self.tamanho_elite = tamanho_elite
+        self.margem_poda = margem_poda
+        self.min_historico_substituto = min_historico_substituto
+        self.podados = set()
+
+    def _limiar_elite(self):
+        completos = sorted(
+            (score for chave, score in self.memo.items() if chave not in self.podados),
+            reverse=True
+        )
+        if len(completos) < self.tamanho_elite:
+            return None
+        return completos[self.tamanho_elite - 1] - self.margem_poda
+
+    def _pontuar_folds(self, chaves, indices_folds):
+        """
+        Retorna {chave: [score_fold, ...]} para os folds pedidos, agrupando
+        os genomas que diferem apenas em n_estimators em uma tarefa warm start.
+        """
+        grupos = {}
+        for chave in chaves:
+            params = dict(chave)
+            n_estimators = params.pop("n_estimators")
+            grupos.setdefault(chave_genoma(params), set()).add(n_estimators)
+
+        tarefas = [
+            (base, sorted(lista_n), indice)
+            for base, lista_n in grupos.items()
+            for indice in indices_folds
+        ]
+        resultados = self.pool(
+            delayed(_f1_fold_warm)(dict(base), lista_n, self.X, self.y, *self.folds[indice], self.random_state)
+            for base, lista_n, indice in tarefas
+        )
+
+        scores = {chave: [] for chave in chaves}
+        for (base, lista_n, _), scores_tarefa in zip(tarefas, resultados):
+            self.arvores_treinadas += lista_n[-1]
+            for n_estimators, score in zip(lista_n, scores_tarefa):
+                scores[chave_genoma({**dict(base), "n_estimators": n_estimators})].append(score)
+        return scores
+
+    def _pontuar(self, pendentes):
+        limiar = self._limiar_elite()
+        todos_folds = range(len(self.folds))
+
+        if limiar is None or len(self.folds) == 1:
+            scores = self._pontuar_folds(pendentes, todos_folds)
+            for chave in pendentes:
+                self.memo[chave] = 0 if np.isnan(scores[chave]).any() else float(np.mean(scores[chave]))
+            return {}
+
+        primeiro_fold = self._pontuar_folds(pendentes, [0])
+        sobreviventes = []
+        for chave in pendentes:
+            score = primeiro_fold[chave][0]
+            if np.isnan(score) or score < limiar:
+                self.memo[chave] = 0 if np.isnan(score) else float(score)
+                self.podados.add(chave)
+            else:
+                sobreviventes.append(chave)
+
+        if sobreviventes:
+            demais_folds = self._pontuar_folds(sobreviventes, todos_folds[1:])
+            for chave in sobreviventes:
+                scores_individuo = primeiro_fold[chave] + demais_folds[chave]
+                self.memo[chave] = 0 if np.isnan(scores_individuo).any() else float(np.mean(scores_individuo))
+
+        return {"podados": len(pendentes) - len(sobreviventes)}
+
+    def selecionar_candidatos(self, candidatos, n):
+        """Ordena os candidatos pela fitness prevista pelo modelo substituto."""
+        historico = [(dict(chave), score) for chave, score in self.memo.items() if chave not in self.podados]
+        if len(historico) < self.min_historico_substituto:
+            return candidatos[:n]
+
+        substituto = RandomForestRegressor(n_estimators=50, random_state=self.random_state)
+        substituto.fit(
+            [_codificar_genoma(genoma) for genoma, _ in historico],
+            [score for _, score in historico]
+        )
+        previsto = substituto.predict([_codificar_genoma(c) for c in candidatos])
+
+        ordem = np.argsort(-previsto, kind="stable")
+        return [candidatos[i] for i in ordem[:n]]
+
+
+def criar_avaliador(modo, X, y, cv=3, n_jobs=-1, random_state=42):
+    """Cria o avaliador de fitness do modo escolhido ("padrao" ou "rapido")."""
+    if modo == "rapido":
+        return AvaliadorFitnessRapido(X, y, cv=cv, n_jobs=n_jobs, random_state=random_state)
+    if modo == "padrao":
+        return AvaliadorFitness(X, y, cv=cv, n_jobs=n_jobs, random_state=random_state)
+    raise ValueError(f"Modo de busca desconhecido: {modo}")
@@ -0,0 +1,226 @@
+"""
+Ingestão do dataset em lotes (streaming), sem carregar o CSV inteiro em memória.
+
+Em uma única leitura do arquivo são calculados:
+- medianas por coluna, a partir de um reservatório (amostragem uniforme de
+  tamanho fixo) por coluna;
+- média e variância das colunas já imputadas (para o StandardScaler),
+  combinando as estatísticas de cada lote (Welford/Chan);
+- contagem das classes;
+- uma amostra uniforme de linhas (reservatório), usada para os modelos que
+  precisam dos dados em memória (Random Forest, SMOTE, algoritmo genético).
+
+Uma segunda leitura treina um modelo incremental (SGDClassifier.partial_fit)
+com todas as linhas do arquivo, exceto as reservadas para teste.
+"""
+import logging
+from dataclasses import dataclass
+from typing import Dict, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+from sklearn.linear_model import SGDClassifier
+from sklearn.preprocessing import StandardScaler
+
+logger = logging.getLogger(__name__)
+
+COLS_ZERO = ['Glucose', 'BloodPressure', 'SkinThickness', 'Insulin', 'BMI']
+ALVO = "Outcome"
+
+
+class Reservatorio:
+    """
+    Amostragem por reservatório (algoritmo R), vetorizada por lote.
+    Mantém no máximo `capacidade` itens escolhidos uniformemente do fluxo.
+    """
+
+    def __init__(self, capacidade: int, semente: int = 42):
+        self.capacidade = capacidade
+        self.vistos = 0
+        self.itens = None
+        self._rng = np.random.default_rng(semente)
+
+    def adicionar(self, valores: np.ndarray) -> None:
+        valores = np.asarray(valores)
+        if len(valores) == 0:
+            return
+
+        if self.itens is None:
+            self.itens = valores[:0].copy()
+
+        # fase de preenchimento
+        livres = max(0, self.capacidade - len(self.itens))
+        if livres:
+            self.itens = np.concatenate([self.itens, valores[:livres]])
+            self.vistos += min(livres, len(valores))
+            valores = valores[livres:]
+
+        if len(valores) == 0:
+            return
+
+        # item i do lote substitui a posição j ~ U[0, vistos + i] se j < capacidade
+        posicoes = self._rng.integers(0, self.vistos + np.arange(1, len(valores) + 1))
+        aceitos = posicoes < self.capacidade
+        self.itens[posicoes[aceitos]] = valores[aceitos]
+        self.vistos += len(valores)
+
+
+class EstatisticasColuna:
+    """Média/variância (Welford/Chan, por lote) e reservatório de uma coluna."""
+
+    def __init__(self, capacidade_reservatorio: int, semente: int):
+        self.n = 0
+        self.media = 0.0
+        self.m2 = 0.0
+        self.faltantes = 0
+        self.reservatorio = Reservatorio(capacidade_reservatorio, semente)
+
+    def adicionar(self, observados: np.ndarray, faltantes: int) -> None:
+        self.faltantes += faltantes
+        self.reservatorio.adicionar(observados)
+        self._combinar(len(observados), float(np.mean(observados)) if len(observados) else 0.0,
+                       float(np.var(observados) * len(observados)) if len(observados) else 0.0)
+
+    def _combinar(self, n_b: int, media_b: float, m2_b: float) -> None:
+        if n_b == 0:
+            return
+        n = self.n + n_b
+        delta = media_b - self.media
+        self.media += delta * n_b / n
+        self.m2 += m2_b + delta ** 2 * self.n * n_b / n
+        self.n = n
+
+    @property
+    def mediana(self) -> float:
+        return float(np.median(self.reservatorio.itens)) if self.reservatorio.itens is not None else np.nan
+
+    def media_variancia_imputada(self, valor_imputado: float):
+        """Média e variância após preencher os faltantes com `valor_imputado`."""
+        n_total = self.n + self.faltantes
+        if self.faltantes == 0 or n_total == 0:
+            return self.media, self.m2 / max(self.n, 1)
+        delta = valor_imputado - self.media
+        media = self.media + delta * self.faltantes / n_total
+        m2 = self.m2 + delta ** 2 * self.n * self.faltantes / n_total
+        return media, m2 / n_total
+
+
+@dataclass
+class ResultadoIngestao:
+    """Resultado da primeira leitura do arquivo."""
+
+    amostra: pd.DataFrame
+    medianas: pd.Series
+    medianas_brutas: pd.Series
+    scaler: StandardScaler
+    classes: Dict[int, int]
+    total_linhas: int
+
+
+def ler_em_lotes(caminho, tamanho_lote: int) -> Iterable[pd.DataFrame]:
+    """Lê o CSV em lotes; o índice de cada linha é sua posição no arquivo."""
+    return pd.read_csv(caminho, chunksize=tamanho_lote)
+
+
+def imputar(lote: pd.DataFrame, medianas: pd.Series) -> pd.DataFrame:
+    """Substitui zeros impossíveis e faltantes pelas medianas."""
+    lote = lote.copy()
+    lote[COLS_ZERO] = lote[COLS_ZERO].replace(0, np.nan)
+    return lote.fillna(medianas)
+
+
+def ingerir_csv(caminho, tamanho_lote: int = 50000, tamanho_amostra: int = 200000,
+                tamanho_reservatorio: int = 100000, semente: int = 42) -> ResultadoIngestao:
+    """
+    Primeira leitura do arquivo: estatísticas por coluna e amostra de linhas.
+    Se o arquivo tiver até `tamanho_amostra` linhas, a amostra é o arquivo inteiro
+    (na ordem original) e as medianas são exatas até `tamanho_reservatorio` linhas.
+    """
+    estatisticas: Optional[Dict[str, EstatisticasColuna]] = None
+    brutos: Optional[Dict[str, Reservatorio]] = None
+    amostra_linhas = Reservatorio(tamanho_amostra, semente)
+    lotes_amostra = []
+    classes: Dict[int, int] = {}
+    colunas = None
+    total = 0
+
+    for numero, lote in enumerate(ler_em_lotes(caminho, tamanho_lote), 1):
+        if colunas is None:
+            colunas = list(lote.columns)
+            features = [c for c in colunas if c != ALVO]
+            estatisticas = {c: EstatisticasColuna(tamanho_reservatorio, semente + i) for i, c in enumerate(features)}
+            brutos = {c: Reservatorio(tamanho_reservatorio, semente + i) for i, c in enumerate(features)}
+
+        for coluna, stats in estatisticas.items():
+            valores = lote[coluna].to_numpy(dtype=float)
+            brutos[coluna].adicionar(valores[~np.isnan(valores)])
+            faltante = np.isnan(valores)
+            if coluna in COLS_ZERO:
+                faltante |= valores == 0
+            stats.adicionar(valores[~faltante], int(faltante.sum()))
+
+        for classe, contagem in lote[ALVO].value_counts().items():
+            classes[int(classe)] = classes.get(int(classe), 0) + int(contagem)
+
+        # amostra de linhas: o reservatório guarda posições; as linhas ficam no lote
+        amostra_linhas.adicionar(lote.index.to_numpy())
+        lotes_amostra.append(lote)
+        selecionadas = set(amostra_linhas.itens.tolist())
+        lotes_amostra = [l[l.index.isin(selecionadas)] for l in lotes_amostra]
+
+        total += len(lote)
+        logger.info(f"Lote {numero} ingerido: linhas {total - len(lote)} a {total}")
+
+    if colunas is None:
+        raise ValueError(f"Arquivo vazio: {caminho}")
+
+    medianas = pd.Series({c: s.mediana for c, s in estatisticas.items()})
+    medianas_brutas = pd.Series({c: float(np.median(r.itens)) for c, r in brutos.items()})
+
+    # StandardScaler a partir das estatísticas (equivalente a fit no arquivo imputado)
+    medias, variancias = zip(*(s.media_variancia_imputada(medianas[c]) for c, s in estatisticas.items()))
+    scaler = StandardScaler()
+    scaler.mean_ = np.array(medias)
+    scaler.var_ = np.array(variancias)
+    scaler.scale_ = np.where(scaler.var_ > 0, np.sqrt(scaler.var_), 1.0)
+    scaler.n_samples_seen_ = total
+    scaler.n_features_in_ = len(estatisticas)
+    scaler.feature_names_in_ = np.array(list(estatisticas), dtype=object)
+
+    amostra = imputar(pd.concat(lotes_amostra).sort_index(), medianas)
+    logger.info(f"Ingestão concluída: {total} linhas, amostra em memória de {len(amostra)} linhas")
+
+    return ResultadoIngestao(
+        amostra=amostra,
+        medianas=medianas,
+        medianas_brutas=medianas_brutas,
+        scaler=scaler,
+        classes=classes,
+        total_linhas=total,
+    )
+
+
+def treinar_incremental(caminho, ingestao: ResultadoIngestao, linhas_ignoradas=(),
+                        tamanho_lote: int = 50000, random_state: int = 42) -> SGDClassifier:
+    """
+    Segunda leitura do arquivo: treina um SGDClassifier (regressão logística)
+    com partial_fit em todos os lotes, ignorando as linhas reservadas para teste.
+    As classes são balanceadas por peso (equivalente a class_weight="balanced").
+    """
+    classes = np.array(sorted(ingestao.classes))
+    total = sum(ingestao.classes.values())
+    pesos = {int(c): total / (len(classes) * ingestao.classes[c]) for c in classes}
+
+    modelo = SGDClassifier(loss="log_loss", class_weight=pesos, random_state=random_state)
+    ignoradas = set(linhas_ignoradas)
+
+    for lote in ler_em_lotes(caminho, tamanho_lote):
+        if ignoradas:
+            lote = lote[~lote.index.isin(ignoradas)]
+        if lote.empty:
+            continue
+        lote = imputar(lote, ingestao.medianas)
+        X = ingestao.scaler.transform(lote.drop(ALVO, axis=1))
+        modelo.partial_fit(X, lote[ALVO].to_numpy(), classes=classes)
+
+    return modelo
@@ -3,19 +3,18 @@ import logging
 from pathlib import Path
 import pathlib
 import random
-import numpy as np
-import pandas as pd
 import joblib
 import time
 import sys
 
-from sklearn.model_selection import train_test_split, cross_val_score
-from sklearn.preprocessing import StandardScaler
+from sklearn.model_selection import train_test_split
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier
 from sklearn.metrics import accuracy_score, recall_score, f1_score
 from imblearn.over_sampling import SMOTE
 from utils import medir_tempo
+from genetico import criar_avaliador
+from ingestao import ingerir_csv, treinar_incremental
 
 from azure.storage.blob import BlobServiceClient
 
@@ -55,68 +54,24 @@ logging.basicConfig(
 logger = logging.getLogger("treinamento")
 logger.info("===== INICIO DA EXECUCAO =====")
 
-# FUNÇÃO FITNESS
+#  CARREGAMENTO E PREPARAÇÃO (INGESTÃO EM LOTES)
 
-def fitness(model, X, y):
-    try:
-        scores = cross_val_score(model, X, y, cv=3, scoring="f1")
-        logger.info(f"Fitness calculado: {scores.mean():.4f}")
-        return scores.mean()
-    except Exception as e:
-        logger.error(f"Erro ao calcular fitness: {e}")
-        return 0
+TAMANHO_LOTE = int(os.getenv("INGESTAO_TAMANHO_LOTE", "50000"))
+TAMANHO_AMOSTRA = int(os.getenv("INGESTAO_TAMANHO_AMOSTRA", "200000"))
 
-
-#  CARREGAMENTO E PREPARAÇÃO
-
-logger.info("Carregando dataset...")
+logger.info("Carregando dataset em lotes...")
 
 try:
-    df = pd.read_csv(DATA_DIR / "diabetes.csv")
+    ingestao = ingerir_csv(DATA_DIR / "diabetes.csv", tamanho_lote=TAMANHO_LOTE, tamanho_amostra=TAMANHO_AMOSTRA)
 except Exception as e:
     logger.exception("Erro ao carregar dataset")
     raise e
 
-logger.info(f"Dataset carregado com {df.shape[0]} linhas e {df.shape[1]} colunas.")
-
-cols_zero = ['Glucose','BloodPressure','SkinThickness','Insulin','BMI']
-df[cols_zero] = df[cols_zero].replace(0, np.nan)
-df.fillna(df.median(), inplace=True)
-
-
-#  FUNÇÃO PROCESSAMENTO EM LOTES
-
-@medir_tempo("treinamento_random_forest")
-def processar_em_lotes(dataset, lote_inicial=150):
-    """
-    Processa o dataset em lotes simulando carga variável.
-    """
-
-    lote = lote_inicial
-    dados_processados = []
-
-    logger.info("Iniciando processamento em lotes...")
-
-    for inicio in range(0, len(dataset), lote):
-        fim = min(inicio + lote, len(dataset))
-        lote_df = dataset.iloc[inicio:fim]
-
-        logger.info(f"Processando lote {inicio//lote + 1} -> linhas {inicio} a {fim}")
-
-        # simula maior carga — aumentando lote dinamicamente
-        if len(lote_df) > 120:
-            lote += 50
-            logger.info(f"Carga alta detectada — aumentando lote para {lote}")
-        else:
-            lote = max(100, lote - 20)
-            logger.info(f"Carga baixa — reduzindo lote para {lote}")
-
-        dados_processados.append(lote_df)
-
-    logger.info("Processamento em lotes finalizado.")
-    return pd.concat(dados_processados, axis=0)
-
-df = processar_em_lotes(df)
+df = ingestao.amostra
+logger.info(
+    f"Dataset carregado com {ingestao.total_linhas} linhas e {df.shape[1]} colunas "
+    f"(amostra em memória: {df.shape[0]} linhas)."
+)
 
 
 #  CONTINUA PREPARAÇÃO NORMAL
@@ -125,8 +80,8 @@ X = df.drop("Outcome", axis=1)
 y = df["Outcome"]
 
 logger.info("Normalizando variáveis...")
-scaler = StandardScaler()
-X_scaled = scaler.fit_transform(X)
+scaler = ingestao.scaler
+X_scaled = scaler.transform(X)
 
 logger.info("Separando treino e teste...")
 X_train, X_test, y_train, y_test = train_test_split(
@@ -165,6 +120,21 @@ logger.info(
     f"f1={f1_score(y_test,y_pred_rf):.3f}"
 )
 
+# MODELO INCREMENTAL (arquivo completo em lotes, exceto as linhas de teste)
+
+logger.info("Treinando modelo incremental (SGD) em lotes...")
+
+sgd_incremental = treinar_incremental(
+    DATA_DIR / "diabetes.csv", ingestao, linhas_ignoradas=y_test.index, tamanho_lote=TAMANHO_LOTE
+)
+y_pred_sgd = sgd_incremental.predict(X_test)
+
+logger.info(
+    f"INCREMENTAL SGD -> acc={accuracy_score(y_test,y_pred_sgd):.3f} "
+    f"recall={recall_score(y_test,y_pred_sgd):.3f} "
+    f"f1={f1_score(y_test,y_pred_sgd):.3f}"
+)
+
 logger.info({
     "evento": "metricas_finais",
     "modelo": "RandomForest_Otimizado",
@@ -191,7 +161,6 @@ def mutacao(ind):
         ind["min_samples_split"] = random.randint(2, 10)
     return ind
 
-@medir_tempo("treinamento_random_forest")
 def crossover(pai, mae):
     filho = {}
     for k in pai:
@@ -202,46 +171,52 @@ def crossover(pai, mae):
 
 logger.info("Iniciando otimizacao genetica...")
 
-POP = 5
-GERACOES = 3
+POP = int(os.getenv("GA_POPULACAO", "5"))
+GERACOES = int(os.getenv("GA_GERACOES", "3"))
+N_JOBS = int(os.getenv("GA_N_JOBS", "-1"))
+MODO_BUSCA = os.getenv("GA_MODO", "padrao")
 
 populacao = [gerar_individuo() for _ in range(POP)]
 
 inicio = time.time()
 
-for g in range(GERACOES):
-    logger.info(f"--- Geracao {g+1}/{GERACOES} ---")
-
-    avaliacoes = []
-
-    for individuo in populacao:
-        logger.info(f"Avaliando individuo: {individuo}")
-
-        modelo = RandomForestClassifier(
-            n_estimators=individuo["n_estimators"],
-            max_depth=individuo["max_depth"],
-            min_samples_split=individuo["min_samples_split"],
-            random_state=42
+with criar_avaliador(MODO_BUSCA, X_train_res, y_train_res, cv=3, n_jobs=N_JOBS) as avaliador:
+    for g in range(GERACOES):
+        logger.info(f"--- Geracao {g+1}/{GERACOES} ---")
+        inicio_geracao = time.time()
+
+        avaliacoes, estatisticas = avaliador.avaliar(populacao)
+        for score, individuo in avaliacoes:
+            logger.info(f"Fitness calculado: {score:.4f} -> {individuo}")
+
+        avaliacoes.sort(reverse=True, key=lambda x: x[0])
+        melhores = avaliacoes[:3]
+
+        logger.info(f"Melhor indivíduo da geracao: {melhores[0]}")
+
+        inicio_reproducao = time.time()
+        nova_pop = [i[1] for i in melhores]
+
+        # no modo rápido, geramos mais candidatos e o modelo substituto escolhe os melhores
+        vagas = POP - len(nova_pop)
+        candidatos = []
+        while len(candidatos) < vagas * avaliador.fator_candidatos:
+            pai, mae = random.sample(melhores, 2)
+            filho = crossover(pai[1], mae[1])
+            filho = mutacao(filho)
+            candidatos.append(filho)
+        nova_pop.extend(avaliador.selecionar_candidatos(candidatos, vagas))
+
+        populacao = nova_pop
+
+        logger.info(
+            f"Tempo geracao {g+1}: total={time.time() - inicio_geracao:.2f}s | "
+            f"avaliacao={estatisticas['tempo_avaliacao']:.2f}s "
+            f"({estatisticas['avaliados']} avaliados, {estatisticas['memo']} do memo, "
+            f"{estatisticas['podados']} podados) | "
+            f"reproducao={time.time() - inicio_reproducao:.2f}s"
         )
 
-        score = fitness(modelo, X_train_res, y_train_res)
-        avaliacoes.append((score, individuo))
-
-    avaliacoes.sort(reverse=True, key=lambda x: x[0])
-    melhores = avaliacoes[:3]
-
-    logger.info(f"Melhor indivíduo da geracao: {melhores[0]}")
-
-    nova_pop = [i[1] for i in melhores]
-
-    while len(nova_pop) < POP:
-        pai, mae = random.sample(melhores, 2)
-        filho = crossover(pai[1], mae[1])
-        filho = mutacao(filho)
-        nova_pop.append(filho)
-
-    populacao = nova_pop
-
 fim = time.time()
 logger.info(f"Tempo total de execucao do GA: {(fim - inicio):.2f} segundos")
 
@@ -253,7 +228,7 @@ logger.info(f"Melhores parametros encontrados: {best_params}")
 
 rf_otimizado = RandomForestClassifier(**best_params, random_state=42)
 
-rf_otimizado.fit(X_train_res, y_train_res)
+medir_tempo("treinamento_random_forest")(rf_otimizado.fit)(X_train_res, y_train_res)
 y_pred_rf_opt = rf_otimizado.predict(X_test)
 
 logger.info(
@@ -271,6 +246,7 @@ joblib.dump(lr_base, OUTPUT_DIR /"lr_model.pkl")
 joblib.dump(rf_base, OUTPUT_DIR / "rf_model.pkl")
 joblib.dump(rf_otimizado, OUTPUT_DIR / "rf_optimized.pkl")
 joblib.dump(scaler, OUTPUT_DIR / "scaler.pkl")
+joblib.dump(sgd_incremental, OUTPUT_DIR / "sgd_model.pkl")
 
 logger.info("Modelos salvos com sucesso!")
 logger.info("===== FIM DA EXECUCAO =====")
@@ -278,4 +254,5 @@ logger.info("===== FIM DA EXECUCAO =====")
 upload_model(OUTPUT_DIR / "lr_model.pkl",  "lr_model.pkl")
 upload_model(OUTPUT_DIR / "rf_model.pkl", "rf_model.pkl")
 upload_model(OUTPUT_DIR / "rf_optimized.pkl", "rf_optimized.pkl")
-upload_model(OUTPUT_DIR / "scaler.pkl", "scaler.pkl")
\ No newline at end of file
+upload_model(OUTPUT_DIR / "scaler.pkl", "scaler.pkl")
+upload_model(OUTPUT_DIR / "sgd_model.pkl", "sgd_model.pkl")
\ No newline at end of file
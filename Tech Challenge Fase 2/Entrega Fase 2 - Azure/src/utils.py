@@ -1,7 +1,8 @@
 import os
 import json
 import logging
-from openai import OpenAI
+import functools
+from openai import OpenAI, AsyncOpenAI
 from dotenv import load_dotenv
 import time
 from sklearn.metrics import accuracy_score, recall_score, f1_score
@@ -9,14 +10,15 @@ from sklearn.metrics import accuracy_score, recall_score, f1_score
 # LOGGING
 logger = logging.getLogger(__name__)
 
-# função para medir tempo de execução
+# função para medir tempo de execução (loga no logger deste módulo, não no root)
 def medir_tempo(etapa):
     def decorator(func):
+        @functools.wraps(func)
         def wrapper(*args, **kwargs):
-            inicio = time.time()
+            inicio = time.perf_counter()
             resultado = func(*args, **kwargs)
-            fim = time.time()
-            logging.info(f"ETAPA={etapa} | TEMPO={fim - inicio:.2f}s")
+            fim = time.perf_counter()
+            logger.info(f"ETAPA={etapa} | TEMPO={fim - inicio:.2f}s")
             return resultado
         return wrapper
     return decorator
@@ -34,14 +36,15 @@ def calcular_metricas(y_true, y_pred):
 #  conexao com openai e llm
 load_dotenv()
 client = OpenAI(api_key=os.getenv("OPENAI_API_KEY"))
+async_client = AsyncOpenAI(api_key=os.getenv("OPENAI_API_KEY"))
 
 
-def gerar_explicacao_llm(predicao, probabilidades, paciente_info, metricas_modelo):
+def montar_prompt_explicacao(predicao, probabilidades, paciente_info, metricas_modelo):
     """
-    Gera explicações em linguagem natural usando LLM.
+    Monta o prompt usado na explicação do LLM.
     """
 
-    prompt = f"""
+    return f"""
 Você é um assistente médico que apoia um(a) profissional de saúde.
 
 Objetivo: gerar um resumo CLÍNICO, conciso e objetivo (máx. 6-8 linhas).
@@ -66,6 +69,14 @@ MÉTRICAS DO MODELO
 Produza o texto em formato de parágrafo único, claro e técnico.
 """
 
+
+def gerar_explicacao_llm(predicao, probabilidades, paciente_info, metricas_modelo):
+    """
+    Gera explicações em linguagem natural usando LLM.
+    """
+
+    prompt = montar_prompt_explicacao(predicao, probabilidades, paciente_info, metricas_modelo)
+
     resposta = client.chat.completions.create(
         model="gpt-4o-mini",
         messages=[
@@ -76,3 +87,23 @@ Produza o texto em formato de parágrafo único, claro e técnico.
     )
 
     return resposta.choices[0].message.content.strip()
+
+
+async def gerar_explicacao_llm_async(predicao, probabilidades, paciente_info, metricas_modelo, timeout=None):
+    """
+    Versão assíncrona de gerar_explicacao_llm (não bloqueia o event loop).
+    """
+
+    prompt = montar_prompt_explicacao(predicao, probabilidades, paciente_info, metricas_modelo)
+
+    resposta = await async_client.chat.completions.create(
+        model="gpt-4o-mini",
+        messages=[
+            {"role": "user", "content": prompt}
+        ],
+        temperature=0.3,
+        max_tokens=450,
+        timeout=timeout
+    )
+
+    return resposta.choices[0].message.content.strip()
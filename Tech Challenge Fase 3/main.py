@@ -12,6 +12,8 @@ Como funciona:
   usando busca semantica (FAISS + embeddings multilinguais).
 - A resposta e gerada pelo LLM com base no contexto recuperado.
 - Toda interacao e registrada em logs/audit.jsonl para auditoria.
+- Com STREAM_RESPONSES=true (padrao), a resposta aparece token a token,
+  a medida que o LLM gera, em vez de so ao final da geracao.
 
 Comandos disponiveis no terminal:
 - "sair": encerra o assistente
@@ -35,6 +37,7 @@ from dotenv import load_dotenv
 load_dotenv(override=True)
 
 from src.assistant.pipeline import MedicalAssistantPipeline
+from src.utils.config import Config
 
 
 HEADER = """
@@ -107,6 +110,56 @@ def show_log(n: int = 3) -> None:
             pass
 
 
+def print_details(response: dict) -> None:
+    """Exibe alertas, fontes, confianca e ID de auditoria de uma resposta."""
+    if response["warnings"]:
+        print()
+        print("Alertas de seguranca:")
+        for w in response["warnings"]:
+            print(f"  - {w}")
+
+    print()
+    print(f"Fontes MedQuAD utilizadas: {len(response['sources'])}")
+    for s in response["sources"]:
+        print(f"  - {s['title']} (relevancia: {s['score']})")
+
+    print()
+    print(f"Confianca    : {response['confidence']}")
+    if response.get("cache_hit"):
+        print("Cache        : resposta reaproveitada de pergunta similar")
+    print(f"Interaction ID: {response['interaction_id']}")
+    print("-" * 65)
+    print()
+
+
+def print_streaming(pipeline: MedicalAssistantPipeline, query: str, user_id: str) -> None:
+    """
+    Exibe a resposta token a token. Ao final, completa com o que o
+    pos-processamento acrescentou (fontes) ou, se a resposta foi
+    bloqueada/reaproveitada do cache, exibe a resposta final inteira.
+    """
+    print("-" * 65)
+    print("Assistente:")
+    print()
+
+    streamed = ""
+    for event in pipeline.stream(query, user_id=user_id):
+        if event["type"] == "token":
+            streamed += event["text"]
+            print(event["text"], end="", flush=True)
+            continue
+
+        answer = event["answer"]
+        if streamed and answer.startswith(streamed):
+            print(answer[len(streamed):])
+        else:
+            if streamed:
+                print()
+                print()
+            print(answer)
+        print_details(event)
+
+
 def run() -> None:
     """
     Loop principal do assistente medico interativo.
@@ -150,6 +203,11 @@ def run() -> None:
             continue
 
         print()
+
+        if Config.STREAM_RESPONSES:
+            print_streaming(pipeline, query, user_id)
+            continue
+
         print("Processando...")
         print()
 
@@ -159,23 +217,7 @@ def run() -> None:
         print("Assistente:")
         print()
         print(response["answer"])
-
-        if response["warnings"]:
-            print()
-            print("Alertas de seguranca:")
-            for w in response["warnings"]:
-                print(f"  - {w}")
-
-        print()
-        print(f"Fontes MedQuAD utilizadas: {len(response['sources'])}")
-        for s in response["sources"]:
-            print(f"  - {s['title']} (relevancia: {s['score']})")
-
-        print()
-        print(f"Confianca    : {response['confidence']}")
-        print(f"Interaction ID: {response['interaction_id']}")
-        print("-" * 65)
-        print()
+        print_details(response)
 
 
 if __name__ == "__main__":
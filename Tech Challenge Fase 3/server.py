@@ -0,0 +1,101 @@
+"""
+Servidor HTTP/WebSocket do Assistente Medico (multiusuario).
+
+Enquanto o main.py atende um unico medico no terminal, este servidor carrega
+o modelo, os embeddings e o indice FAISS uma unica vez e atende varios
+medicos ao mesmo tempo, cada um com seu historico (user_id).
+
+Endpoints:
+- POST /chat                 {"user_id": "dr_silva", "query": "..."}
+- WS   /ws/{user_id}         envia a pergunta como texto, recebe a resposta em JSON
+- GET  /history/{user_id}    historico de mensagens do usuario
+- GET  /health               estado do servico (fila, lotes, usuarios)
+
+Quando a fila de geracao esta cheia, POST /chat responde 503 (com
+Retry-After) e o WebSocket responde {"error": "busy"}; o cliente deve tentar
+novamente em seguida.
+
+Como executar:
+    uvicorn server:app --host 0.0.0.0 --port 8000
+
+Use um unico worker do uvicorn: cada worker carregaria sua propria copia do modelo.
+A fila e o tamanho dos lotes sao configurados na secao `server` de
+configs/pipeline_config.yaml.
+"""
+from dotenv import load_dotenv
+
+# Mesmo motivo do main.py: as variaveis de ambiente precisam estar carregadas
+# antes dos imports do src
+load_dotenv(override=True)
+
+from fastapi import FastAPI, HTTPException, WebSocket, WebSocketDisconnect
+from pydantic import BaseModel, Field
+
+from src.assistant.pipeline import MedicalAssistantPipeline
+from src.assistant.service import AssistantService, QueueFullError
+from src.utils.config import Config
+
+
+class ChatRequest(BaseModel):
+    user_id: str = Field(..., min_length=1, max_length=100)
+    query:   str = Field(..., min_length=1, max_length=4000)
+
+
+app = FastAPI(title="Assistente Medico", version="1.0.0")
+service: AssistantService = None
+
+
+@app.on_event("startup")
+async def startup() -> None:
+    global service
+    service = AssistantService.from_config(MedicalAssistantPipeline(user_id="server"), Config.pipeline)
+    await service.start()
+
+
+@app.on_event("shutdown")
+async def shutdown() -> None:
+    if service is not None:
+        await service.stop()
+
+
+@app.get("/health")
+async def health() -> dict:
+    return {"status": "online", **service.stats()}
+
+
+@app.post("/chat")
+async def chat(request: ChatRequest) -> dict:
+    try:
+        return await service.ask(request.query, request.user_id)
+    except QueueFullError as exc:
+        raise HTTPException(status_code=503, detail=str(exc), headers={"Retry-After": "1"})
+
+
+@app.get("/history/{user_id}")
+async def history(user_id: str) -> dict:
+    messages = service.messages(user_id)
+    return {
+        "user_id": user_id,
+        "messages": [{"role": m.type, "content": m.content} for m in messages],
+    }
+
+
+@app.websocket("/ws/{user_id}")
+async def websocket_chat(websocket: WebSocket, user_id: str) -> None:
+    await websocket.accept()
+    try:
+        while True:
+            query = (await websocket.receive_text()).strip()
+            if not query:
+                continue
+            try:
+                await websocket.send_json(await service.ask(query, user_id))
+            except QueueFullError as exc:
+                await websocket.send_json({"error": "busy", "detail": str(exc)})
+    except WebSocketDisconnect:
+        pass
+
+
+if __name__ == "__main__":
+    import uvicorn
+    uvicorn.run(app, host="0.0.0.0", port=8000)
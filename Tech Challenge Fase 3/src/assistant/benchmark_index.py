@@ -0,0 +1,107 @@
+"""
+Benchmark recall x latencia dos tipos de indice FAISS.
+
+Compara ivfpq, hnsw e sq8 com o indice exato (flat), que serve de gabarito:
+- recall@k: fracao dos k vizinhos exatos que o indice aproximado encontra
+- latencia por busca (p50/p95, uma pergunta por vez, como no assistente)
+- tamanho do indice serializado (proxy da memoria residente)
+- tempo de construcao (treino + insercao)
+
+As perguntas sao as perguntas do usuario extraidas dos proprios registros
+(template LLaMA 3) e os documentos sao os de data/processed/. Para simular
+uma base maior que o MedQuAD, --sinteticos N acrescenta N vetores aleatorios
+com a mesma media e desvio dos embeddings reais.
+
+Uso:
+    python -m src.assistant.benchmark_index --perguntas 200 --k 5
+    python -m src.assistant.benchmark_index --sinteticos 1000000
+"""
+from __future__ import annotations
+import argparse
+import re
+import time
+
+import faiss
+import numpy as np
+from langchain_community.embeddings import HuggingFaceEmbeddings
+
+from src.assistant.retriever import iter_processed_records
+from src.assistant.vector_index import build_index, factory_string, index_config
+from src.utils.config import Config
+
+USER_TURN = re.compile(r"user<\|end_header_id\|>\s*(.*?)<\|eot_id\|>", re.S)
+
+
+def carregar_vetores(processed_dir: str, n_perguntas: int, seed: int = 42):
+    rc = Config.pipeline["retriever"]
+    embeddings = HuggingFaceEmbeddings(model_name=rc["embedding_model"], model_kwargs={"device": "cpu"})
+
+    textos = [r["page_content"] for r in iter_processed_records(processed_dir)]
+    rng = np.random.default_rng(seed)
+    amostra = rng.choice(len(textos), min(n_perguntas, len(textos)), replace=False)
+    perguntas = [
+        (USER_TURN.search(textos[i]) or re.match(r"(.{0,200})", textos[i], re.S)).group(1).strip()
+        for i in amostra
+    ]
+
+    print(f"Gerando embeddings de {len(textos)} documentos e {len(perguntas)} perguntas...")
+    docs = np.asarray(embeddings.embed_documents(textos), dtype=np.float32)
+    queries = np.asarray(embeddings.embed_documents(perguntas), dtype=np.float32)
+    return docs, queries
+
+
+def medir(index, queries: np.ndarray, k: int):
+    latencias = []
+    resultados = []
+    for q in queries:
+        inicio = time.perf_counter()
+        _, ids = index.search(q[None, :], k)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        resultados.append(ids[0])
+    return np.asarray(resultados), np.asarray(latencias)
+
+
+def recall(gabarito: np.ndarray, resultados: np.ndarray) -> float:
+    acertos = sum(len(set(g) & set(r)) for g, r in zip(gabarito, resultados))
+    return acertos / gabarito.size
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--processed-dir", default="./data/processed")
+    parser.add_argument("--perguntas", type=int, default=200)
+    parser.add_argument("--k", type=int, default=Config.pipeline["retriever"]["top_k"])
+    parser.add_argument("--sinteticos", type=int, default=0)
+    parser.add_argument("--tipos", nargs="+", default=["flat", "sq8", "hnsw", "ivfpq"])
+    args = parser.parse_args()
+
+    docs, queries = carregar_vetores(args.processed_dir, args.perguntas)
+    if args.sinteticos:
+        rng = np.random.default_rng(0)
+        extra = rng.normal(docs.mean(axis=0), docs.std(axis=0), size=(args.sinteticos, docs.shape[1]))
+        docs = np.vstack([docs, extra.astype(np.float32)])
+    n, dim = docs.shape
+
+    base_cfg = {**Config.pipeline["retriever"].get("index", {})}
+    gabarito = None
+    print(f"\n{n} vetores de dimensao {dim}, {len(queries)} perguntas, k={args.k}\n")
+    print(f"{'tipo':<8}{'indice':<22}{'recall@k':>10}{'p50 ms':>9}{'p95 ms':>9}{'MB':>9}{'build s':>9}")
+
+    for tipo in ["flat"] + [t for t in args.tipos if t != "flat"]:
+        cfg = index_config({**base_cfg, "type": tipo})
+        inicio = time.perf_counter()
+        index = build_index(docs, cfg)
+        tempo_build = time.perf_counter() - inicio
+
+        resultados, latencias = medir(index, queries, args.k)
+        if gabarito is None:
+            gabarito = resultados
+        tamanho_mb = faiss.serialize_index(index).nbytes / 1e6
+
+        print(f"{tipo:<8}{factory_string(cfg, dim, n):<22}{recall(gabarito, resultados):>10.3f}"
+              f"{np.percentile(latencias, 50):>9.3f}{np.percentile(latencias, 95):>9.3f}"
+              f"{tamanho_mb:>9.1f}{tempo_build:>9.1f}")
+
+
+if __name__ == "__main__":
+    main()
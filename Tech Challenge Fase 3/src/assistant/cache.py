@@ -0,0 +1,142 @@
+"""
+Cache semantico de respostas do assistente.
+
+Medicos do mesmo setor fazem as mesmas perguntas (no estilo MedQuAD) com
+frequencia, e cada uma custa uma geracao completa do LLaMA/Ollama. Este cache
+fica na frente do no de geracao do LangGraph:
+
+- A chave e o embedding da pergunta, o mesmo ja calculado pelo MedicalRetriever
+  para a busca no FAISS (nenhum embedding extra).
+- Ha acerto quando a similaridade de cosseno com uma pergunta anterior passa do
+  limiar configurado E os documentos recuperados sao os mesmos (mesmos IDs, na
+  mesma ordem). Assim, perguntas parecidas com contexto diferente (por exemplo,
+  apos reconstruir o indice) geram uma nova resposta.
+- A memoria e limitada: no maximo `max_entries` respostas, removidas pela
+  politica LRU (menos usada recentemente) ou apos `ttl_seconds`.
+
+Os contadores de acertos e falhas sao gravados no log de auditoria.
+"""
+from __future__ import annotations
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Any, Optional
+
+import numpy as np
+
+
+def doc_ids(docs) -> tuple[str, ...]:
+    """
+    Identificadores dos documentos recuperados (source_id + hash do conteudo).
+    O source_id sozinho nao basta: varios trechos vem do mesmo arquivo MedQuAD.
+    """
+    return tuple(
+        f"{d.metadata.get('source_id', '')}:{hashlib.sha1(d.page_content.encode()).hexdigest()[:12]}"
+        for d in docs
+    )
+
+
+@dataclass
+class CacheEntry:
+    """Resposta armazenada para uma pergunta."""
+    embedding:  np.ndarray
+    doc_ids:    tuple[str, ...]
+    answer:     dict[str, Any]
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class SemanticCache:
+    """
+    Cache LRU/TTL indexado pelo embedding normalizado da pergunta.
+
+    A busca compara o embedding com todas as entradas (produto escalar de
+    vetores normalizados = similaridade de cosseno); com `max_entries` na casa
+    das centenas, isso custa bem menos que a busca no FAISS.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.95,
+        max_entries: int = 512,
+        ttl_seconds: float = 3600.0,
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.max_entries          = max_entries
+        self.ttl_seconds          = ttl_seconds
+        self._entries: OrderedDict[int, CacheEntry] = OrderedDict()
+        self._next_id = 0
+        self.hits     = 0
+        self.misses   = 0
+        # O servidor multiusuario consulta o cache a partir de varias threads
+        self._lock    = threading.Lock()
+
+    @classmethod
+    def from_config(cls, config: Optional[dict]) -> Optional["SemanticCache"]:
+        """Cria o cache a partir da secao `cache` do pipeline_config.yaml."""
+        if not config or not config.get("enabled", False):
+            return None
+        return cls(
+            similarity_threshold=config.get("similarity_threshold", 0.95),
+            max_entries=config.get("max_entries", 512),
+            ttl_seconds=config.get("ttl_seconds", 3600),
+        )
+
+    @staticmethod
+    def _normalize(embedding) -> np.ndarray:
+        vector = np.asarray(embedding, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm > 0 else vector
+
+    def _evict_expired(self) -> None:
+        limit = time.monotonic() - self.ttl_seconds
+        expired = [key for key, entry in self._entries.items() if entry.created_at < limit]
+        for key in expired:
+            del self._entries[key]
+
+    def lookup(self, embedding, ids: tuple[str, ...]) -> Optional[dict[str, Any]]:
+        """
+        Retorna a resposta armazenada mais similar (acima do limiar e com os
+        mesmos documentos) ou None. Atualiza os contadores de acerto/falha.
+        """
+        with self._lock:
+            return self._lookup(embedding, ids)
+
+    def _lookup(self, embedding, ids: tuple[str, ...]) -> Optional[dict[str, Any]]:
+        self._evict_expired()
+
+        best_key, best_sim = None, self.similarity_threshold
+        if self._entries:
+            query = self._normalize(embedding)
+            keys = [key for key, entry in self._entries.items() if entry.doc_ids == ids]
+            if keys:
+                matrix = np.stack([self._entries[key].embedding for key in keys])
+                sims = matrix @ query
+                i = int(np.argmax(sims))
+                if sims[i] >= best_sim:
+                    best_key, best_sim = keys[i], float(sims[i])
+
+        if best_key is None:
+            self.misses += 1
+            return None
+
+        self._entries.move_to_end(best_key)
+        self.hits += 1
+        return dict(self._entries[best_key].answer, cache_similarity=round(best_sim, 4))
+
+    def store(self, embedding, ids: tuple[str, ...], answer: dict[str, Any]) -> None:
+        """Armazena a resposta, removendo a entrada menos usada se o cache estiver cheio."""
+        entry = CacheEntry(self._normalize(embedding), ids, dict(answer))
+        with self._lock:
+            self._entries[self._next_id] = entry
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def stats(self) -> dict[str, int]:
+        """Contadores gravados no log de auditoria."""
+        return {"cache_hits": self.hits, "cache_misses": self.misses, "cache_size": len(self._entries)}
+
+    def __len__(self) -> int:
+        return len(self._entries)
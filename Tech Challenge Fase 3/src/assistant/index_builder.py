@@ -0,0 +1,284 @@
+"""
+Construcao paralela, em lotes e incremental do vector store.
+
+O _build original lia todos os documentos, gerava os embeddings em uma unica
+passada serial e gravava o indice apenas no final: uma falha no meio obrigava
+a recomecar do zero, e adicionar um arquivo de protocolo novo exigia
+recalcular os ~14 mil embeddings.
+
+Este builder:
+1. Le os documentos em streaming (um registro por vez), gravando o docstore
+   e calculando o hash do conteudo de cada documento (junto com o nome do
+   modelo de embeddings).
+2. Reaproveita o embedding de todo documento cujo hash ja foi visto em um
+   build anterior; apenas documentos novos ou alterados sao embeddados. Como
+   o modelo entra no hash, trocar o embedding_model invalida todos os shards.
+3. Embedda os documentos pendentes em lotes de tamanho fixo, distribuidos
+   entre processos worker (cada um com sua copia do modelo de embeddings).
+4. Grava cada lote concluido como um shard em disco (checkpoint). Se o build
+   for interrompido, a proxima execucao reaproveita os shards ja gravados.
+5. Junta os shards na ordem do docstore, constroi o indice FAISS e o indice
+   BM25 (sparse_index.py) e so entao substitui os arquivos do vector store
+   (o indice atual continua valido ate o fim do build). Por fim, compacta os
+   shards em um unico arquivo.
+
+Layout dos checkpoints em data/vectorstore/shards/:
+    shard-<id>.npy          vetores float32 do lote
+    shard-<id>.hashes.json  hash do conteudo de cada vetor, na mesma ordem
+"""
+from __future__ import annotations
+import hashlib
+import json
+import multiprocessing
+import os
+import shutil
+import uuid
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+from src.assistant.vector_index import (
+    DOCS_FILE,
+    INDEX_FILE,
+    META_FILE,
+    OFFSETS_FILE,
+    DiskDocStore,
+    build_index,
+    factory_string,
+    write_meta,
+)
+from src.assistant.sparse_index import BM25_DIR, BM25Index
+
+SHARDS_DIR  = "shards"
+STAGING_DIR = ".build"
+
+DEFAULT_BUILD_CONFIG = {
+    "batch_size": 256,
+    "workers":    2,
+}
+
+
+def content_hash(record: dict, model_name: str) -> str:
+    """Hash do texto + metadados do documento + modelo que gera o embedding."""
+    payload = json.dumps({"model": model_name, "record": record},
+                         ensure_ascii=False, sort_keys=True).encode("utf-8")
+    return hashlib.sha256(payload).hexdigest()[:32]
+
+
+# ── Processos worker ─────────────────────────────────────────────────────────
+
+_worker_embeddings = None
+
+
+def _init_worker(model_name: str, threads: int) -> None:
+    global _worker_embeddings
+    import torch
+    from langchain_community.embeddings import HuggingFaceEmbeddings
+
+    # Divide os nucleos entre os workers para nao haver disputa de threads
+    torch.set_num_threads(threads)
+    _worker_embeddings = HuggingFaceEmbeddings(model_name=model_name, model_kwargs={"device": "cpu"})
+
+
+def _embed_batch(texts: list[str]) -> np.ndarray:
+    return np.asarray(_worker_embeddings.embed_documents(texts), dtype=np.float32)
+
+
+# ── Builder ──────────────────────────────────────────────────────────────────
+
+class VectorStoreBuilder:
+    """Constroi o vector store em `store_path` a partir dos registros informados."""
+
+    def __init__(self, store_path: Path, model_name: str, index_cfg: dict,
+                 batch_size: int = 256, workers: int = 2, embeddings=None):
+        self.store_path  = Path(store_path)
+        self.shards_dir  = self.store_path / SHARDS_DIR
+        self.staging_dir = self.store_path / STAGING_DIR
+        self.model_name  = model_name
+        self.index_cfg   = index_cfg
+        self.batch_size  = batch_size
+        self.workers     = workers
+        # Usado quando workers=0 (embeddings no proprio processo)
+        self.embeddings  = embeddings
+        self.reused      = 0
+        self.embedded    = 0
+
+    @classmethod
+    def from_config(cls, rc: dict, index_cfg: dict, embeddings=None) -> "VectorStoreBuilder":
+        bc = {**DEFAULT_BUILD_CONFIG, **rc.get("build", {})}
+        return cls(
+            Path(rc["vector_store_path"]),
+            rc["embedding_model"],
+            index_cfg,
+            batch_size=bc["batch_size"],
+            workers=bc["workers"],
+            embeddings=embeddings,
+        )
+
+    # ── shards ───────────────────────────────────────────────────────────────
+
+    def _load_shards(self) -> dict[str, tuple[str, int]]:
+        """Mapa hash -> (shard, linha) de todos os checkpoints em disco."""
+        known: dict[str, tuple[str, int]] = {}
+        self.shards_dir.mkdir(parents=True, exist_ok=True)
+        for hashes_file in sorted(self.shards_dir.glob("shard-*.hashes.json")):
+            shard = hashes_file.name[:-len(".hashes.json")]
+            if not (self.shards_dir / f"{shard}.npy").exists():
+                continue
+            with open(hashes_file, encoding="utf-8") as f:
+                for row, h in enumerate(json.load(f)):
+                    known[h] = (shard, row)
+        return known
+
+    def _write_shard(self, hashes: list[str], vectors: np.ndarray, known: dict) -> None:
+        """Checkpoint de um lote recem-embeddado."""
+        shard = self._save_shard(hashes, vectors)
+        for row, h in enumerate(hashes):
+            known[h] = (shard, row)
+        self.embedded += len(hashes)
+        print(f"[builder] Shard {shard}: {len(hashes)} embeddings (total novos: {self.embedded})")
+
+    def _save_shard(self, hashes: list[str], vectors: np.ndarray) -> str:
+        """
+        Grava o shard. Os vetores sao gravados antes dos hashes: um shard so e
+        considerado valido quando os dois arquivos existem.
+        """
+        shard = f"shard-{uuid.uuid4().hex[:12]}"
+        tmp = self.shards_dir / f"{shard}.tmp.npy"
+        np.save(tmp, vectors)
+        os.replace(tmp, self.shards_dir / f"{shard}.npy")
+
+        tmp = self.shards_dir / f"{shard}.hashes.tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(hashes, f)
+        os.replace(tmp, self.shards_dir / f"{shard}.hashes.json")
+        return shard
+
+    def _gather(self, hashes: list[str], known: dict) -> np.ndarray:
+        """Monta a matriz de vetores na ordem do docstore a partir dos shards."""
+        by_shard: dict[str, list[tuple[int, int]]] = {}
+        for position, h in enumerate(hashes):
+            shard, row = known[h]
+            by_shard.setdefault(shard, []).append((position, row))
+
+        vectors = None
+        for shard, pairs in by_shard.items():
+            data = np.load(self.shards_dir / f"{shard}.npy", mmap_mode="r")
+            if vectors is None:
+                vectors = np.empty((len(hashes), data.shape[1]), dtype=np.float32)
+            positions, rows = zip(*pairs)
+            vectors[list(positions)] = data[list(rows)]
+        return vectors
+
+    def _compact(self, hashes: list[str], vectors: np.ndarray) -> None:
+        """Substitui todos os shards por um unico shard com os vetores em uso."""
+        old = list(self.shards_dir.glob("shard-*"))
+        unique: dict[str, int] = {}
+        for position, h in enumerate(hashes):
+            unique.setdefault(h, position)
+        self._save_shard(list(unique), vectors[list(unique.values())])
+        for path in old:
+            path.unlink(missing_ok=True)
+
+    # ── build ────────────────────────────────────────────────────────────────
+
+    def build(self, records: Iterable[dict]) -> int:
+        """
+        Executa o build incremental. Retorna o numero de documentos.
+        """
+        known = self._load_shards()
+        if self.staging_dir.exists():
+            shutil.rmtree(self.staging_dir)
+        self.staging_dir.mkdir(parents=True)
+
+        hashes: list[str] = []
+        batch: list[tuple[str, str]] = []
+        queued: set[str] = set()
+
+        pool = None
+        if self.workers > 0:
+            threads = max(1, (os.cpu_count() or 1) // self.workers)
+            pool = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(self.model_name, threads),
+            )
+        in_flight: dict = {}
+
+        def collect(done) -> None:
+            for future in done:
+                batch_hashes = in_flight.pop(future)
+                self._write_shard(batch_hashes, future.result(), known)
+
+        def submit(items: list[tuple[str, str]]) -> None:
+            batch_hashes = [h for h, _ in items]
+            texts = [t for _, t in items]
+            if pool is None:
+                vectors = np.asarray(self.embeddings.embed_documents(texts), dtype=np.float32)
+                self._write_shard(batch_hashes, vectors, known)
+                return
+            # Limita os lotes em andamento para nao acumular textos em memoria
+            while len(in_flight) >= 2 * self.workers:
+                done, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+            in_flight[pool.submit(_embed_batch, texts)] = batch_hashes
+
+        def stream():
+            for record in records:
+                h = content_hash(record, self.model_name)
+                hashes.append(h)
+                if h in known:
+                    self.reused += 1
+                elif h not in queued:
+                    queued.add(h)
+                    batch.append((h, record["page_content"]))
+                    if len(batch) >= self.batch_size:
+                        submit(batch.copy())
+                        batch.clear()
+                yield record
+
+        try:
+            DiskDocStore.write(self.staging_dir, stream())
+            if batch:
+                submit(batch)
+            if in_flight:
+                collect(wait(in_flight).done)
+        finally:
+            if pool is not None:
+                pool.shutdown(cancel_futures=True)
+
+        if not hashes:
+            raise ValueError("Nenhum documento encontrado para construir o vector store")
+
+        print(f"[builder] {len(hashes)} documentos: {self.reused} embeddings reaproveitados, "
+              f"{self.embedded} calculados")
+
+        vectors = self._gather(hashes, known)
+        self._write_index(vectors)
+        self._publish()
+        self._compact(hashes, vectors)
+        return len(hashes)
+
+    def _write_index(self, vectors: np.ndarray) -> None:
+        import faiss
+
+        n, dim = vectors.shape
+        index = build_index(vectors, self.index_cfg)
+        faiss.write_index(index, str(self.staging_dir / INDEX_FILE))
+
+        docstore = DiskDocStore(self.staging_dir)
+        try:
+            BM25Index.write(self.staging_dir, docstore)
+        finally:
+            docstore.close()
+        write_meta(self.staging_dir, self.index_cfg, dim, n, factory_string(self.index_cfg, dim, n))
+
+    def _publish(self) -> None:
+        """Move os arquivos do build para o vector store (metadados por ultimo)."""
+        shutil.rmtree(self.store_path / BM25_DIR, ignore_errors=True)
+        for name in (INDEX_FILE, DOCS_FILE, OFFSETS_FILE, BM25_DIR, META_FILE):
+            os.replace(self.staging_dir / name, self.store_path / name)
+        shutil.rmtree(self.staging_dir, ignore_errors=True)
@@ -3,11 +3,13 @@ Pipeline principal do Assistente Medico.
 
 Este modulo e o coracao do projeto. Ele orquestra todas as pecas:
   1. Carregamento do LLM (modelo fine-tunado ou Ollama como fallback)
-  2. Busca semantica RAG via FAISS (retriever)
+  2. Busca hibrida RAG: FAISS + BM25 com fusao RRF e reranker opcional (retriever)
   3. Geracao de resposta com contexto medico (LangChain LCEL)
   4. Guardrails de seguranca na entrada e na saida
   5. Explainability: associa fontes MedQuAD a cada resposta
   6. Auditoria: registra toda interacao em JSONL
+  7. Cache semantico: perguntas repetidas com o mesmo contexto nao chamam o LLM
+  8. Streaming: stream() entrega os tokens a medida que o LLM os gera
 
 Ordem de prioridade para o LLM:
   1. Modelo fine-tunado localmente (LLaMA 3.2 + adaptadores LoRA, gerado no Kaggle)
@@ -20,23 +22,29 @@ atual recomendada pelo LangChain para construir chains. Substituiu o
 ConversationalRetrievalChain que foi descontinuado nas versoes recentes.
 
 A chain LCEL funciona assim:
-  pergunta do usuario
-    -> retriever busca documentos relevantes no FAISS
+  pergunta do usuario + documentos ja recuperados (source_docs do AgentState)
     -> documentos + pergunta sao inseridos no prompt
     -> LLM gera a resposta
     -> StrOutputParser extrai o texto da resposta
+
+A busca no FAISS acontece uma unica vez por pergunta, no no "retrieve" do
+LangGraph. A chain nao tem retriever proprio: ela consome os mesmos documentos
+usados depois na explainability, entao cada pergunta paga um unico embedding
+e uma unica busca vetorial.
 """
 from __future__ import annotations
+from operator import itemgetter
 from pathlib import Path
-from typing import Any, Optional
+from typing import Any, Iterator, Optional
 
 from langchain_core.prompts import PromptTemplate
 from langchain_core.output_parsers import StrOutputParser
-from langchain_core.runnables import RunnablePassthrough
+from langchain_core.runnables import RunnableLambda
 
 from src.assistant.retriever import MedicalRetriever
+from src.assistant.cache import SemanticCache, doc_ids
 from src.assistant.memory import build_memory
-from src.security.guardrails import Guardrails
+from src.security.guardrails import STREAM_HOLDBACK, Guardrails
 from src.security.logger import AuditLogger
 from src.security.explainability import ExplainabilityModule
 from src.utils.config import Config
@@ -168,8 +176,12 @@ class AgentState(TypedDict):
     final_answer: str
 
     source_docs: List
+    retrieval_scores: List[float]
     sources: List[Dict]
 
+    query_embedding: List[float]
+    cache_hit: bool
+
     confidence: float
     interaction_id: str
 
@@ -190,26 +202,25 @@ class MedicalAssistantPipeline:
         self.explainability = ExplainabilityModule()
         self.memory         = build_memory()
         self.retriever      = MedicalRetriever()
+        self.cache          = SemanticCache.from_config(Config.pipeline.get("cache"))
 
         self._llm = _build_llm()
 
         try:
             self.retriever.load_or_build()
-            lc_retriever = self.retriever._store.as_retriever(
-                search_kwargs={"k": Config.pipeline["retriever"]["top_k"]}
-            )
 
+            # A chain recebe {"question", "source_docs"}: os documentos vem do
+            # no de retrieval, sem uma segunda busca no FAISS
             self._chain = (
                 {
-                    "context":  lc_retriever | _format_docs,
-                    "question": RunnablePassthrough(),
+                    "context":  itemgetter("source_docs") | RunnableLambda(_format_docs),
+                    "question": itemgetter("question"),
                 }
                 | PROMPT_TEMPLATE
                 | self._llm
                 | StrOutputParser()
             )
 
-            self._retriever = lc_retriever
             self.graph = self._build_graph()
 
             print("[pipeline] Pipeline com LangGraph pronto.")
@@ -238,17 +249,42 @@ class MedicalAssistantPipeline:
         if state["blocked"]:
             return state
 
-        docs = self._retriever.invoke(state["input"])
-        state["source_docs"] = docs
+        # Um unico embedding por pergunta: usado na busca e como chave do cache
+        embedding = self.retriever.embed_query(state["input"])
+        state["query_embedding"] = embedding
+        results = self.retriever.search(state["input"], embedding)
+        state["source_docs"] = [doc for doc, _ in results]
+        state["retrieval_scores"] = [score for _, score in results]
 
         return state
 
+    def _cache_node(self, state: AgentState):
+        if state["blocked"] or self.cache is None:
+            return state
+
+        cached = self.cache.lookup(state["query_embedding"], doc_ids(state["source_docs"]))
+        if cached is not None:
+            state["cache_hit"] = True
+            state["raw_answer"] = cached["raw_answer"]
+            state["final_answer"] = cached["final_answer"]
+            state["sources"] = cached["sources"]
+            state["confidence"] = cached["confidence"]
+            state["warnings"] += [w for w in cached["warnings"] if w not in state["warnings"]]
+
+        return state
+
+    def _route_after_cache(self, state: AgentState) -> str:
+        return "log" if state["blocked"] or state["cache_hit"] else "generate"
+
     def _generation_node(self, state: AgentState):
         if state["blocked"]:
             return state
 
         try:
-            raw_answer = self._chain.invoke(state["input"])
+            raw_answer = self._chain.invoke({
+                "question":    state["input"],
+                "source_docs": state["source_docs"],
+            })
             state["raw_answer"] = raw_answer
         except Exception as exc:
             self.audit_logger.log_error(state["user_id"], str(exc), {"query": state["input"][:100]})
@@ -269,10 +305,11 @@ class MedicalAssistantPipeline:
 
         final = state["raw_answer"] + self.guardrails.safety_note(guard_out)
 
-        # Explainability
+        # Explainability: score de relevancia calculado na busca (similaridade
+        # densa ou score do reranker)
         retrieved = [
-            {"page_content": d.page_content, "metadata": d.metadata, "score": 0.8}
-            for d in state["source_docs"]
+            {"page_content": d.page_content, "metadata": d.metadata, "score": round(score, 4)}
+            for d, score in zip(state["source_docs"], state["retrieval_scores"])
         ]
 
         explained = self.explainability.build_attribution(retrieved, state["raw_answer"])
@@ -284,6 +321,15 @@ class MedicalAssistantPipeline:
         ]
         state["confidence"] = explained.confidence
 
+        if self.cache is not None:
+            self.cache.store(state["query_embedding"], doc_ids(state["source_docs"]), {
+                "raw_answer":   state["raw_answer"],
+                "final_answer": state["final_answer"],
+                "sources":      state["sources"],
+                "confidence":   state["confidence"],
+                "warnings":     guard_out.warnings,
+            })
+
         return state
 
     def _logging_node(self, state: AgentState):
@@ -293,7 +339,11 @@ class MedicalAssistantPipeline:
             state.get("final_answer", ""),
             sources=[s["title"] for s in state.get("sources", [])],
             guardrail_flags=state.get("warnings", []),
-            blocked=state.get("blocked", False)
+            blocked=state.get("blocked", False),
+            extra={
+                "cache_hit": state.get("cache_hit", False),
+                **(self.cache.stats() if self.cache is not None else {}),
+            },
         )
 
         state["interaction_id"] = iid
@@ -308,6 +358,7 @@ class MedicalAssistantPipeline:
 
         graph.add_node("guardrail", self._guardrail_node)
         graph.add_node("retrieve", self._retrieval_node)
+        graph.add_node("cache", self._cache_node)
         graph.add_node("generate", self._generation_node)
         graph.add_node("postprocess", self._postprocess_node)
         graph.add_node("log", self._logging_node)
@@ -315,7 +366,8 @@ class MedicalAssistantPipeline:
         graph.set_entry_point("guardrail")
 
         graph.add_edge("guardrail", "retrieve")
-        graph.add_edge("retrieve", "generate")
+        graph.add_edge("retrieve", "cache")
+        graph.add_conditional_edges("cache", self._route_after_cache, {"generate": "generate", "log": "log"})
         graph.add_edge("generate", "postprocess")
         graph.add_edge("postprocess", "log")
 
@@ -325,33 +377,160 @@ class MedicalAssistantPipeline:
     # RUN (AGORA USA LANGGRAPH)
     # =========================
 
-    def run(self, query: str, user_id: Optional[str] = None) -> dict[str, Any]:
-        uid = user_id or self.user_id
-
-        result = self.graph.invoke({
+    def _initial_state(self, query: str, uid: str) -> dict[str, Any]:
+        return {
             "input": query,
             "user_id": uid,
             "blocked": False,
             "warnings": [],
             "context": "",
             "source_docs": [],
+            "retrieval_scores": [],
             "sources": [],
+            "query_embedding": [],
+            "cache_hit": False,
             "raw_answer": "",
             "final_answer": "",
             "confidence": 0.0,
             "interaction_id": "",
 
             "chain": self._chain,
-            "retriever": self._retriever,
+            "retriever": self.retriever,
             "guardrails": self.guardrails,
             "logger": self.audit_logger,
             "explainability": self.explainability,
-        })
+        }
 
+    @staticmethod
+    def _response(result: dict[str, Any]) -> dict[str, Any]:
         return {
             "answer": result.get("final_answer", ""),
             "sources": result.get("sources", []),
             "warnings": result.get("warnings", []),
             "interaction_id": result.get("interaction_id"),
             "confidence": result.get("confidence", 0.0),
-        }
\ No newline at end of file
+            "cache_hit": result.get("cache_hit", False),
+        }
+
+    def run(self, query: str, user_id: Optional[str] = None) -> dict[str, Any]:
+        uid = user_id or self.user_id
+        result = self.graph.invoke(self._initial_state(query, uid))
+        return self._response(result)
+
+    # =========================
+    # EXECUCAO EM FASES (SERVICO MULTIUSUARIO)
+    # =========================
+    # Os mesmos nos do grafo, separados em tres fases para que o servidor
+    # (server.py) possa agrupar a geracao de varias perguntas simultaneas
+    # em uma unica chamada ao LLM:
+    #   prepare (por pergunta) -> generate_batch (lote) -> finish (por pergunta)
+
+    def prepare(self, query: str, user_id: Optional[str] = None) -> dict[str, Any]:
+        """Guardrail de entrada, retrieval e cache semantico."""
+        state = self._initial_state(query, user_id or self.user_id)
+        for node in (self._guardrail_node, self._retrieval_node, self._cache_node):
+            state = node(state)
+        return state
+
+    @staticmethod
+    def needs_generation(state: dict[str, Any]) -> bool:
+        return not (state["blocked"] or state["cache_hit"])
+
+    def generate_batch(self, states: list[dict[str, Any]]) -> None:
+        """
+        Gera as respostas de varias perguntas em uma unica chamada llm.batch().
+        No HuggingFacePipeline os prompts sao processados em lote na GPU/CPU;
+        no Ollama, as requisicoes sao enviadas juntas ao servidor.
+        """
+        prompts = [
+            PROMPT_TEMPLATE.format(context=_format_docs(s["source_docs"]), question=s["input"])
+            for s in states
+        ]
+        try:
+            answers = self._llm.batch(prompts)
+        except Exception as exc:
+            for state in states:
+                self.audit_logger.log_error(state["user_id"], str(exc), {"query": state["input"][:100]})
+                state["final_answer"] = "Erro interno. Verifique o modelo."
+                state["confidence"] = 0.0
+                state["blocked"] = True
+            return
+
+        for state, answer in zip(states, answers):
+            state["raw_answer"] = answer.strip()
+
+    def finish(self, state: dict[str, Any]) -> dict[str, Any]:
+        """Guardrail de saida, explainability, cache e auditoria."""
+        if self.needs_generation(state):
+            state = self._postprocess_node(state)
+        state = self._logging_node(state)
+        return self._response(state)
+
+    # =========================
+    # STREAMING
+    # =========================
+
+    def stream(self, query: str, user_id: Optional[str] = None) -> Iterator[dict[str, Any]]:
+        """
+        Versao em streaming de run(): executa os mesmos nos do grafo, mas a
+        geracao usa chain.stream() e entrega cada trecho assim que o LLM o produz.
+        O Ollama envia os tokens pela API REST e o HuggingFacePipeline usa um
+        TextIteratorStreamer, entao o medico ve o primeiro token em vez de
+        esperar a geracao completa.
+
+        Eventos gerados:
+        - {"type": "token", "text": ...} para cada trecho da resposta
+        - {"type": "final", ...} ao final, com o mesmo formato de run()
+
+        O guardrail de saida roda a cada trecho, antes de entrega-lo: se um
+        padrao bloqueado aparecer, a geracao e interrompida sem que o texto
+        bloqueado tenha sido exibido. Os ultimos STREAM_HOLDBACK caracteres
+        so sao liberados quando o texto seguinte chega (ou ao final). Aviso
+        de validacao, explainability, cache e auditoria rodam ao final,
+        sobre a resposta completa.
+        """
+        state = self.prepare(query, user_id)
+
+        if self.needs_generation(state):
+            yield from self._stream_generation(state)
+
+        yield {"type": "final", **self.finish(state)}
+
+    def _stream_generation(self, state: dict[str, Any]) -> Iterator[dict[str, Any]]:
+        chunks: list[str] = []
+        text = ""
+        sent = 0
+        try:
+            for chunk in self._chain.stream({
+                "question":    state["input"],
+                "source_docs": state["source_docs"],
+            }):
+                chunks.append(chunk)
+                text = "".join(chunks)
+
+                # O guardrail roda antes de qualquer trecho chegar ao medico
+                guard = self.guardrails.check(state["input"], text)
+                if not guard.allowed:
+                    state["warnings"] += guard.warnings
+                    state["final_answer"] = f"Resposta interrompida: {guard.blocked_reason}"
+                    state["confidence"] = 0.0
+                    state["blocked"] = True
+                    break
+
+                # O final do texto fica retido: pode conter o comeco de um
+                # padrao bloqueado que so se completa nos proximos trechos
+                safe = len(text) - STREAM_HOLDBACK
+                if safe > sent:
+                    yield {"type": "token", "text": text[sent:safe]}
+                    sent = safe
+            else:
+                if len(text) > sent:
+                    yield {"type": "token", "text": text[sent:]}
+
+            state["raw_answer"] = text
+        except Exception as exc:
+            self.audit_logger.log_error(state["user_id"], str(exc), {"query": state["input"][:100]})
+
+            state["final_answer"] = "Erro interno. Verifique o modelo."
+            state["confidence"] = 0.0
+            state["blocked"] = True
\ No newline at end of file
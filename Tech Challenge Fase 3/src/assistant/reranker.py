@@ -0,0 +1,38 @@
+"""
+Reranker opcional com cross-encoder.
+
+A busca hibrida (FAISS + BM25) compara a pergunta e cada documento de forma
+independente. O cross-encoder le a pergunta e o documento juntos e estima a
+relevancia do par, com precisao bem maior, mas custa uma inferencia por
+documento. Por isso ele so reordena os poucos candidatos ja fundidos pelo RRF
+(retriever.hybrid.candidates), e os top_k finais vao para o prompt.
+
+O modelo padrao (mmarco-mMiniLMv2) e multilingue, como o modelo de embeddings,
+e roda em CPU. Habilite em retriever.reranker no pipeline_config.yaml.
+"""
+from __future__ import annotations
+
+import numpy as np
+
+DEFAULT_RERANKER_MODEL = "cross-encoder/mmarco-mMiniLMv2-L12-H384-v1"
+
+
+class CrossEncoderReranker:
+    """Pontua pares (pergunta, documento) com um cross-encoder."""
+
+    def __init__(self, model_name: str = DEFAULT_RERANKER_MODEL, batch_size: int = 16):
+        from sentence_transformers import CrossEncoder
+
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self._model     = CrossEncoder(model_name, device="cpu")
+
+    def score(self, query: str, texts: list[str]) -> np.ndarray:
+        """
+        Relevancia de cada texto para a pergunta, entre 0 e 1 (modelos de um
+        rotulo ja aplicam sigmoid na saida do CrossEncoder.predict).
+        """
+        if not texts:
+            return np.zeros(0, dtype=np.float32)
+        scores = self._model.predict([(query, t) for t in texts], batch_size=self.batch_size)
+        return np.clip(np.asarray(scores, dtype=np.float32), 0.0, 1.0)
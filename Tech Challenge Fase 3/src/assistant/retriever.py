@@ -11,8 +11,13 @@ Como funciona a busca semantica:
   usando o modelo sentence-transformers/paraphrase-multilingual-MiniLM-L12-v2.
   Esse modelo foi escolhido por suportar multiplos idiomas, incluindo portugues.
 - Os vetores sao indexados no FAISS (biblioteca da Meta para busca vetorial eficiente).
+  O tipo de indice (flat, ivfpq, hnsw, sq8) e configurado em retriever.index no
+  pipeline_config.yaml; os textos ficam em um docstore em disco (vector_index.py).
 - Quando o usuario faz uma pergunta, ela tambem e convertida em vetor
   e o FAISS encontra os documentos mais similares semanticamente.
+- Em paralelo, um indice BM25 (sparse_index.py) busca pelas palavras exatas da
+  pergunta. Os dois rankings sao combinados por reciprocal rank fusion (RRF) e,
+  opcionalmente, reordenados por um cross-encoder (reranker.py).
 - Os documentos encontrados sao passados como contexto para o LLM.
 
 O vector store e salvo em data/vectorstore/ para nao precisar reconstruir a cada execucao.
@@ -23,27 +28,69 @@ Para construir o vector store pela primeira vez:
 from __future__ import annotations
 import json
 from pathlib import Path
-from typing import Optional
+from typing import Iterator, Optional
 
-from langchain_community.vectorstores import FAISS
+import numpy as np
 from langchain_community.embeddings import HuggingFaceEmbeddings
 from langchain_core.documents import Document
 
+from src.assistant.index_builder import VectorStoreBuilder
+from src.assistant.sparse_index import BM25Index, reciprocal_rank_fusion
+from src.assistant.vector_index import (
+    INDEX_FILE,
+    DiskDocStore,
+    build_index,
+    factory_string,
+    index_config,
+    read_index,
+    read_meta,
+    reconstruct,
+    write_meta,
+)
 from src.utils.config import Config
 
 
+def iter_processed_records(processed_dir: str) -> Iterator[dict]:
+    """
+    Le os arquivos JSONL processados, um registro por vez, no formato gravado
+    no docstore (page_content + metadata).
+    """
+    for jsonl in sorted(Path(processed_dir).glob("**/*.jsonl")):
+        with jsonl.open("r", encoding="utf-8") as f:
+            for line in f:
+                r = json.loads(line)
+                content = r.get("text", "")
+                if content:
+                    yield {
+                        "page_content": content,
+                        "metadata": {
+                            "source_id": r.get("source", jsonl.stem),
+                            "title":     r.get("source", "MedQuAD"),
+                        },
+                    }
+
+
+def l2_to_similarity(dist: float) -> float:
+    """Converte a distancia L2 (ao quadrado) do FAISS em similaridade de 0 a 1."""
+    return max(0.0, 1.0 - dist / 2)
+
+
 class MedicalRetriever:
     """
     Gerencia o indice FAISS de documentos MedQuAD.
 
     Atributos principais apos inicializacao:
     - embeddings: modelo de embeddings multilingual
-    - _store: indice FAISS com todos os documentos
+    - _index: indice FAISS (tipo definido em retriever.index no pipeline_config.yaml)
+    - _docstore: textos dos documentos em disco, na mesma ordem dos vetores
+    - _bm25: indice BM25 sobre os mesmos documentos (None se hybrid desabilitado)
+    - _reranker: cross-encoder (None se reranker desabilitado)
     - store_path: caminho onde o indice e salvo/carregado
     """
 
     def __init__(self, config: Optional[dict] = None):
         rc = (config or Config.pipeline)["retriever"]
+        self.config = rc
         # Modelo de embeddings multilingual - converte texto em vetores numericos.
         # Suporta portugues e ingles, importante pois o MedQuAD e em ingles
         # mas as perguntas dos medicos podem ser em portugues.
@@ -54,7 +101,18 @@ class MedicalRetriever:
         self.top_k           = rc["top_k"]
         self.score_threshold = rc["score_threshold"]
         self.store_path      = Path(rc["vector_store_path"])
-        self._store: Optional[FAISS] = None
+        self.index_cfg       = index_config(rc.get("index"))
+        self.hybrid_cfg      = {"enabled": True, "candidates": 20, "rrf_k": 60,
+                                "bm25_k1": 1.5, "bm25_b": 0.75, **rc.get("hybrid", {})}
+        self._index          = None
+        self._docstore: Optional[DiskDocStore] = None
+        self._bm25: Optional[BM25Index] = None
+
+        self._reranker = None
+        reranker_cfg = rc.get("reranker", {})
+        if reranker_cfg.get("enabled", False):
+            from src.assistant.reranker import DEFAULT_RERANKER_MODEL, CrossEncoderReranker
+            self._reranker = CrossEncoderReranker(reranker_cfg.get("model", DEFAULT_RERANKER_MODEL))
 
     def load_or_build(self, processed_dir: Optional[str] = None) -> None:
         """
@@ -62,15 +120,23 @@ class MedicalRetriever:
         dos documentos processados.
 
         O vector store e salvo em data/vectorstore/ e pode ser reutilizado
-        em todas as execucoes sem precisar reconstruir.
+        em todas as execucoes sem precisar reconstruir. Os textos (e, no
+        ivfpq, as listas invertidas do indice) sao memory-mapped: apenas as
+        partes acessadas nas buscas ficam em RAM.
         """
-        if self.store_path.exists():
-            self._store = FAISS.load_local(
-                str(self.store_path),
-                self.embeddings,
-                allow_dangerous_deserialization=True
-            )
-            print(f"[retriever] Vector store carregado: {self.store_path}")
+        meta = read_meta(self.store_path)
+        if meta is not None:
+            # Tipo e estrutura vem do indice gravado; parametros de busca
+            # (nprobe, ef_search, mmap) vem da configuracao atual
+            cfg = {**self.index_cfg, "type": meta["index"]["type"]}
+            self._index    = read_index(self.store_path / INDEX_FILE, cfg)
+            self._docstore = DiskDocStore(self.store_path)
+            if self.hybrid_cfg["enabled"]:
+                self._load_bm25()
+            print(f"[retriever] Vector store carregado: {self.store_path} "
+                  f"({meta['factory']}, {meta['total']} documentos)")
+        elif (self.store_path / "index.pkl").exists():
+            self._migrate_langchain_store()
         elif processed_dir:
             self._build(processed_dir)
         else:
@@ -83,30 +149,137 @@ class MedicalRetriever:
         """
         Constroi o indice FAISS a partir dos arquivos JSONL processados.
 
-        Le todos os arquivos .jsonl em data/processed/, extrai o campo "text"
-        de cada registro e cria os embeddings. O processo demora alguns minutos
-        pois precisa gerar embeddings para todos os ~14.000 documentos.
+        Le os arquivos .jsonl em data/processed/ em streaming e gera os
+        embeddings em lotes, em processos paralelos (index_builder.py). Apenas
+        documentos novos ou alterados desde o ultimo build sao embeddados; o
+        primeiro build (~14.000 documentos) demora alguns minutos, os seguintes
+        apenas o tempo dos documentos novos.
 
         Apos a construcao, salva o indice em data/vectorstore/ para reuso.
         """
-        docs: list[Document] = []
-        for jsonl in Path(processed_dir).glob("**/*.jsonl"):
-            with jsonl.open("r", encoding="utf-8") as f:
-                for line in f:
-                    r = json.loads(line)
-                    content = r.get("text", "")
-                    if content:
-                        docs.append(Document(
-                            page_content=content,
-                            metadata={
-                                "source_id": r.get("source", jsonl.stem),
-                                "title":     r.get("source", "MedQuAD"),
-                            },
-                        ))
-        self._store = FAISS.from_documents(docs, self.embeddings)
-        self.store_path.mkdir(parents=True, exist_ok=True)
-        self._store.save_local(str(self.store_path))
-        print(f"[retriever] Vector store construido: {len(docs)} documentos em {self.store_path}")
+        self._close()
+        builder = VectorStoreBuilder.from_config(self.config, self.index_cfg, embeddings=self.embeddings)
+        total = builder.build(iter_processed_records(processed_dir))
+        self.load_or_build()
+        print(f"[retriever] Vector store construido: {total} documentos em {self.store_path}")
+
+    def _load_bm25(self) -> None:
+        """Carrega o indice BM25; vector stores antigos ganham o indice a partir do docstore."""
+        if not BM25Index.exists(self.store_path):
+            print("[retriever] Construindo indice BM25 a partir do docstore...")
+            BM25Index.write(self.store_path, self._docstore)
+        self._bm25 = BM25Index(self.store_path, k1=self.hybrid_cfg["bm25_k1"], b=self.hybrid_cfg["bm25_b"])
+
+    def _close(self) -> None:
+        """Libera o memory-map do docstore antes de sobrescrever os arquivos."""
+        if self._docstore is not None:
+            self._docstore.close()
+        self._index, self._docstore, self._bm25 = None, None, None
+
+    def _save_index(self, vectors: np.ndarray) -> None:
+        import faiss
+
+        index = build_index(vectors, self.index_cfg)
+        faiss.write_index(index, str(self.store_path / INDEX_FILE))
+        write_meta(self.store_path, self.index_cfg, vectors.shape[1], len(vectors),
+                   factory_string(self.index_cfg, vectors.shape[1], len(vectors)))
+        self.load_or_build()
+
+    def _migrate_langchain_store(self) -> None:
+        """
+        Converte um vector store antigo (FAISS.save_local do LangChain, com
+        index.faiss + index.pkl) para o novo formato, sem recalcular embeddings.
+        """
+        from langchain_community.vectorstores import FAISS
+
+        print(f"[retriever] Convertendo vector store do formato LangChain: {self.store_path}")
+        store = FAISS.load_local(str(self.store_path), self.embeddings, allow_dangerous_deserialization=True)
+        ids = [store.index_to_docstore_id[i] for i in range(store.index.ntotal)]
+        DiskDocStore.write(self.store_path, (
+            {"page_content": doc.page_content, "metadata": doc.metadata}
+            for doc in (store.docstore.search(_id) for _id in ids)
+        ))
+        vectors = store.index.reconstruct_n(0, store.index.ntotal)
+        del store
+        self._save_index(vectors)
+        for legacy in ("index.faiss", "index.pkl"):
+            (self.store_path / legacy).unlink(missing_ok=True)
+
+    def embed_query(self, query: str) -> list[float]:
+        """
+        Converte a pergunta em embedding. O mesmo vetor e usado na busca no
+        FAISS e como chave do cache semantico, sem calcular o embedding duas vezes.
+        """
+        return self.embeddings.embed_query(query)
+
+    def _document(self, position: int) -> Document:
+        record = self._docstore.get(position)
+        return Document(page_content=record["page_content"], metadata=record["metadata"])
+
+    def _dense_search(self, embedding: list[float], k: int) -> list[tuple[int, float]]:
+        """(posicao, distancia L2) dos k vetores mais proximos do embedding."""
+        if self._index is None:
+            self.load_or_build()
+        query = np.asarray([embedding], dtype=np.float32)
+        distances, positions = self._index.search(query, k)
+        return [(int(pos), float(dist)) for dist, pos in zip(distances[0], positions[0]) if pos >= 0]
+
+    def search_with_scores_by_vector(self, embedding: list[float], k: Optional[int] = None) -> list[tuple[Document, float]]:
+        """Busca os documentos mais proximos de um embedding; retorna (documento, distancia L2)."""
+        return [(self._document(pos), dist) for pos, dist in self._dense_search(embedding, k or self.top_k)]
+
+    def search_by_vector(self, embedding: list[float], k: Optional[int] = None) -> list[Document]:
+        """Busca os documentos mais proximos de um embedding ja calculado."""
+        return [doc for doc, _ in self.search_with_scores_by_vector(embedding, k)]
+
+    def search(self, query: str, embedding: list[float], k: Optional[int] = None) -> list[tuple[Document, float]]:
+        """
+        Busca hibrida: retorna os k documentos mais relevantes, na ordem do
+        ranking, e o score de relevancia de cada um (0 a 1).
+
+        1. FAISS e BM25 buscam `hybrid.candidates` documentos cada
+        2. Os dois rankings sao fundidos por RRF
+        3. Com reranker: o cross-encoder pontua os candidatos fundidos e os
+           top k sao escolhidos por esse score.
+           Sem reranker: os top k do RRF recebem a similaridade densa com a
+           pergunta (inclusive os que vieram apenas do BM25).
+
+        Com hybrid desabilitado, equivale a busca densa com scores de similaridade.
+        """
+        k = k or self.top_k
+        if self._index is None:
+            self.load_or_build()
+        if self._bm25 is None:
+            return [(self._document(pos), l2_to_similarity(dist)) for pos, dist in self._dense_search(embedding, k)]
+
+        n = max(k, self.hybrid_cfg["candidates"])
+        dense = self._dense_search(embedding, n)
+        sparse = self._bm25.search(query, n)
+        fused = reciprocal_rank_fusion(
+            [[pos for pos, _ in dense], [pos for pos, _ in sparse]],
+            k=self.hybrid_cfg["rrf_k"],
+        )
+        positions = [pos for pos, _ in fused[:n]]
+
+        if self._reranker is not None:
+            docs = [self._document(pos) for pos in positions]
+            scores = self._reranker.score(query, [d.page_content for d in docs])
+            order = np.argsort(-scores, kind="stable")[:k]
+            return [(docs[i], float(scores[i])) for i in order]
+
+        positions = positions[:k]
+        scores = self._similarities(embedding, positions, dict(dense))
+        return [(self._document(pos), score) for pos, score in zip(positions, scores)]
+
+    def _similarities(self, embedding: list[float], positions: list[int], known: dict[int, float]) -> list[float]:
+        """Similaridade densa de cada posicao; distancias ja conhecidas nao sao recalculadas."""
+        missing = [pos for pos in positions if pos not in known]
+        if missing:
+            vectors = reconstruct(self._index, missing)
+            query = np.asarray(embedding, dtype=np.float32)
+            for pos, dist in zip(missing, ((vectors - query) ** 2).sum(axis=1)):
+                known[pos] = float(dist)
+        return [l2_to_similarity(known[pos]) for pos in positions]
 
     def retrieve(self, query: str) -> list[dict]:
         """
@@ -115,14 +288,11 @@ class MedicalRetriever:
         Retorna uma lista de dicionarios com:
         - page_content: texto do documento
         - metadata: source_id e title
-        - score: similaridade (0 a 1, quanto maior mais relevante)
+        - score: relevancia (0 a 1, quanto maior mais relevante)
         """
-        if self._store is None:
-            self.load_or_build()
-        results = self._store.similarity_search_with_score(query, k=self.top_k)
+        results = self.search(query, self.embed_query(query))
         docs = []
-        for doc, dist in results:
-            sim = max(0.0, 1.0 - dist / 2)
+        for doc, sim in results:
             if sim >= self.score_threshold:
                 docs.append({
                     "page_content": doc.page_content,
@@ -0,0 +1,200 @@
+"""
+Servico multiusuario do assistente medico.
+
+Um unico MedicalAssistantPipeline (LLM, embeddings e indice FAISS carregados
+uma vez por processo) atende varios medicos ao mesmo tempo:
+
+- Historico por usuario: cada user_id tem seu proprio historico de mensagens
+  (build_memory), limitado as ultimas `memory.k` trocas. No maximo
+  `server.max_users` historicos ficam em memoria; o do usuario inativo ha
+  mais tempo e descartado primeiro (LRU).
+- Fila de geracao limitada: as perguntas que precisam do LLM entram em uma
+  fila com tamanho maximo. Quando a fila esta cheia, novas perguntas sao
+  recusadas imediatamente (QueueFullError -> HTTP 503), em vez de acumular
+  latencia para todos (backpressure).
+- Micro-batching: o worker da fila espera alguns milissegundos por perguntas
+  simultaneas e gera ate `max_batch_size` respostas em uma unica chamada ao
+  LLM (pipeline.generate_batch).
+
+Guardrails, retrieval, cache semantico, explainability e auditoria rodam por
+pergunta em threads, fora do event loop; apenas a geracao passa pela fila.
+"""
+from __future__ import annotations
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Optional
+
+from src.assistant.memory import build_memory
+
+
+class QueueFullError(Exception):
+    """A fila de geracao atingiu o tamanho maximo."""
+
+
+class GenerationQueue:
+    """
+    Fila de geracao com micro-batching.
+
+    `generate_batch(states)` e chamada em uma thread, uma de cada vez, com ate
+    `max_batch_size` estados; ela preenche raw_answer (ou marca erro) em cada um.
+    """
+
+    def __init__(self, generate_batch, max_size: int = 32, max_batch_size: int = 4,
+                 batch_wait_ms: float = 20.0):
+        self._generate_batch = generate_batch
+        self.max_batch_size  = max_batch_size
+        self.batch_wait      = batch_wait_ms / 1000
+        self._queue: Optional[asyncio.Queue] = None
+        self._max_size       = max_size
+        self._worker: Optional[asyncio.Task] = None
+        self.batches         = 0
+        self.generated       = 0
+        self.rejected        = 0
+
+    def start(self) -> None:
+        # A fila e criada dentro do event loop do servidor
+        self._queue  = asyncio.Queue(maxsize=self._max_size)
+        self._worker = asyncio.ensure_future(self._run())
+
+    async def stop(self) -> None:
+        if self._worker is not None:
+            self._worker.cancel()
+            try:
+                await self._worker
+            except asyncio.CancelledError:
+                pass
+            self._worker = None
+
+    @property
+    def size(self) -> int:
+        return self._queue.qsize() if self._queue is not None else 0
+
+    async def submit(self, state: dict[str, Any]) -> dict[str, Any]:
+        """Enfileira a geracao e aguarda o resultado. Recusa se a fila estiver cheia."""
+        future = asyncio.get_running_loop().create_future()
+        try:
+            self._queue.put_nowait((state, future))
+        except asyncio.QueueFull:
+            self.rejected += 1
+            raise QueueFullError(f"Fila de geracao cheia ({self._max_size} perguntas aguardando)")
+        return await future
+
+    async def _next_batch(self) -> list:
+        batch = [await self._queue.get()]
+        deadline = time.monotonic() + self.batch_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self) -> None:
+        while True:
+            batch = await self._next_batch()
+            # Clientes que desconectaram enquanto aguardavam nao ocupam o lote
+            batch = [(state, future) for state, future in batch if not future.cancelled()]
+            if not batch:
+                continue
+
+            states = [state for state, _ in batch]
+            try:
+                await asyncio.to_thread(self._generate_batch, states)
+            except Exception as exc:
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(exc)
+                continue
+
+            self.batches += 1
+            self.generated += len(batch)
+            for state, future in batch:
+                if not future.done():
+                    future.set_result(state)
+
+
+class AssistantService:
+    """Compartilha um pipeline entre varios usuarios."""
+
+    def __init__(self, pipeline, max_queue_size: int = 32, max_batch_size: int = 4,
+                 batch_wait_ms: float = 20.0, history_k: int = 10, max_users: int = 1000):
+        self.pipeline  = pipeline
+        self.queue     = GenerationQueue(
+            pipeline.generate_batch,
+            max_size=max_queue_size,
+            max_batch_size=max_batch_size,
+            batch_wait_ms=batch_wait_ms,
+        )
+        self.history_k = history_k
+        self.max_users = max_users
+        self._histories: OrderedDict[str, Any] = OrderedDict()
+
+    @classmethod
+    def from_config(cls, pipeline, config: dict) -> "AssistantService":
+        sc = config.get("server", {})
+        return cls(
+            pipeline,
+            max_queue_size=sc.get("max_queue_size", 32),
+            max_batch_size=sc.get("max_batch_size", 4),
+            batch_wait_ms=sc.get("batch_wait_ms", 20),
+            history_k=config.get("memory", {}).get("k", 10),
+            max_users=sc.get("max_users", 1000),
+        )
+
+    async def start(self) -> None:
+        self.queue.start()
+
+    async def stop(self) -> None:
+        await self.queue.stop()
+
+    def messages(self, user_id: str) -> list:
+        """Mensagens do usuario (somente leitura: nao cria historico)."""
+        history = self._histories.get(user_id)
+        return list(history.messages) if history is not None else []
+
+    def _history(self, user_id: str):
+        """Historico do usuario (criado na primeira pergunta), marcado como o mais recente."""
+        history = self._histories.get(user_id)
+        if history is None:
+            history = self._histories[user_id] = build_memory()
+            while len(self._histories) > self.max_users:
+                self._histories.popitem(last=False)
+        self._histories.move_to_end(user_id)
+        return history
+
+    def _remember(self, user_id: str, query: str, answer: str) -> None:
+        history = self._history(user_id)
+        history.add_user_message(query)
+        history.add_ai_message(answer)
+        # Mantem apenas as ultimas k trocas (pergunta + resposta)
+        excess = len(history.messages) - 2 * self.history_k
+        if excess > 0:
+            history.messages = history.messages[excess:]
+
+    async def ask(self, query: str, user_id: str) -> dict[str, Any]:
+        """
+        Processa uma pergunta. Lanca QueueFullError se a fila de geracao
+        estiver cheia.
+        """
+        state = await asyncio.to_thread(self.pipeline.prepare, query, user_id)
+
+        if self.pipeline.needs_generation(state):
+            state = await self.queue.submit(state)
+
+        response = await asyncio.to_thread(self.pipeline.finish, state)
+        self._remember(user_id, query, response["answer"])
+        return response
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "users":          len(self._histories),
+            "queue_size":     self.queue.size,
+            "batches":        self.queue.batches,
+            "generated":      self.queue.generated,
+            "rejected":       self.queue.rejected,
+            "avg_batch_size": round(self.queue.generated / self.queue.batches, 2) if self.queue.batches else 0.0,
+        }
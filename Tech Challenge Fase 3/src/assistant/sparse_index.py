@@ -0,0 +1,152 @@
+"""
+Indice esparso BM25 e fusao com a busca densa (busca hibrida).
+
+A busca densa (embeddings + FAISS) encontra documentos pelo significado, mas
+erra termos raros e exatos que sao comuns em perguntas medicas: nomes de
+medicamentos, siglas, codigos de exames, nomes de sindromes. O BM25 faz o
+oposto: casa exatamente as palavras da pergunta, ponderadas pela raridade.
+
+Este modulo contem:
+1. BM25Index: indice invertido BM25 sobre os mesmos documentos do docstore
+   (a posicao de cada documento e a mesma do vetor no FAISS). As listas
+   invertidas ficam em arquivos .npy lidos com memory-map.
+2. reciprocal_rank_fusion: combina as listas de resultados do FAISS e do BM25
+   usando apenas as posicoes no ranking (RRF), sem precisar calibrar as
+   escalas diferentes dos dois scores.
+
+Layout em data/vectorstore/bm25/:
+    vocab.json     termo -> id, total de documentos e tamanho medio
+    indptr.npy     inicio da lista invertida de cada termo
+    doc_ids.npy    documentos de cada lista invertida
+    tf.npy         frequencia do termo em cada documento
+    doc_len.npy    numero de termos de cada documento
+"""
+from __future__ import annotations
+import json
+import os
+import re
+import shutil
+from pathlib import Path
+from typing import Iterable
+
+import numpy as np
+
+BM25_DIR = "bm25"
+
+TOKEN = re.compile(r"\w+", re.UNICODE)
+
+# Palavras muito frequentes em portugues e ingles (o MedQuAD e em ingles,
+# as perguntas dos medicos em geral em portugues)
+STOPWORDS = frozenset({
+    "a", "o", "as", "os", "de", "da", "do", "das", "dos", "e", "em", "no", "na",
+    "nos", "nas", "um", "uma", "que", "com", "para", "por", "se", "ao", "ou",
+    "the", "of", "and", "is", "in", "to", "for", "an", "are", "on", "with",
+    "be", "by", "or", "at", "it", "this", "that", "what", "how",
+})
+
+
+def tokenize(text: str) -> list[str]:
+    """Termos em minusculas, sem stop words e sem tokens de um caractere."""
+    return [t for t in TOKEN.findall(text.lower()) if len(t) > 1 and t not in STOPWORDS]
+
+
+def reciprocal_rank_fusion(rankings: Iterable[list[int]], k: int = 60) -> list[tuple[int, float]]:
+    """
+    Combina rankings de documentos: score(d) = soma de 1 / (k + posicao de d).
+    Retorna (documento, score RRF) em ordem decrescente.
+    """
+    fused: dict[int, float] = {}
+    for ranking in rankings:
+        for rank, doc in enumerate(ranking, 1):
+            fused[doc] = fused.get(doc, 0.0) + 1.0 / (k + rank)
+    return sorted(fused.items(), key=lambda item: item[1], reverse=True)
+
+
+class BM25Index:
+    """Indice BM25 em disco. k1 e b sao aplicados na busca (nao exigem rebuild)."""
+
+    def __init__(self, directory: Path, k1: float = 1.5, b: float = 0.75):
+        self.directory = Path(directory) / BM25_DIR
+        with open(self.directory / "vocab.json", encoding="utf-8") as f:
+            meta = json.load(f)
+        self.vocab   = meta["vocab"]
+        self.n_docs  = meta["n_docs"]
+        self.indptr  = np.load(self.directory / "indptr.npy", mmap_mode="r")
+        self.doc_ids = np.load(self.directory / "doc_ids.npy", mmap_mode="r")
+        self.tf      = np.load(self.directory / "tf.npy", mmap_mode="r")
+        self.k1      = k1
+
+        # Normalizacao por tamanho do documento, calculada uma vez
+        doc_len = np.load(self.directory / "doc_len.npy").astype(np.float32)
+        avgdl = max(meta["avg_len"], 1.0)
+        self._norm = k1 * (1 - b + b * doc_len / avgdl)
+
+    @staticmethod
+    def exists(directory: Path) -> bool:
+        return (Path(directory) / BM25_DIR / "vocab.json").exists()
+
+    def search(self, query: str, k: int) -> list[tuple[int, float]]:
+        """Retorna ate k (posicao do documento, score BM25), em ordem decrescente."""
+        terms = [self.vocab[t] for t in set(tokenize(query)) if t in self.vocab]
+        if not terms:
+            return []
+
+        scores = np.zeros(self.n_docs, dtype=np.float32)
+        for term in terms:
+            start, end = int(self.indptr[term]), int(self.indptr[term + 1])
+            docs = np.asarray(self.doc_ids[start:end])
+            tf = np.asarray(self.tf[start:end], dtype=np.float32)
+            df = end - start
+            idf = np.log(1 + (self.n_docs - df + 0.5) / (df + 0.5))
+            # Cada documento aparece uma vez por lista invertida
+            scores[docs] += idf * tf * (self.k1 + 1) / (tf + self._norm[docs])
+
+        candidates = np.flatnonzero(scores)
+        if len(candidates) > k:
+            candidates = candidates[np.argpartition(-scores[candidates], k - 1)[:k]]
+        order = candidates[np.argsort(-scores[candidates])]
+        return [(int(i), float(scores[i])) for i in order]
+
+    @staticmethod
+    def write(directory: Path, records: Iterable[dict]) -> int:
+        """
+        Constroi o indice a partir dos documentos (na ordem do docstore) e grava
+        em directory/bm25/. Retorna o numero de documentos.
+        """
+        postings: dict[str, tuple[list[int], list[int]]] = {}
+        doc_len: list[int] = []
+        for position, record in enumerate(records):
+            tokens = tokenize(record["page_content"])
+            doc_len.append(len(tokens))
+            counts: dict[str, int] = {}
+            for t in tokens:
+                counts[t] = counts.get(t, 0) + 1
+            for t, c in counts.items():
+                docs, tfs = postings.setdefault(t, ([], []))
+                docs.append(position)
+                tfs.append(c)
+
+        terms = sorted(postings)
+        indptr = np.zeros(len(terms) + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum([len(postings[t][0]) for t in terms])
+        doc_ids = np.fromiter((d for t in terms for d in postings[t][0]), dtype=np.int32, count=int(indptr[-1]))
+        tf = np.fromiter((min(c, 65535) for t in terms for c in postings[t][1]), dtype=np.uint16, count=int(indptr[-1]))
+
+        target = Path(directory) / BM25_DIR
+        tmp = Path(directory) / f"{BM25_DIR}.tmp"
+        shutil.rmtree(tmp, ignore_errors=True)
+        tmp.mkdir(parents=True)
+        np.save(tmp / "indptr.npy", indptr)
+        np.save(tmp / "doc_ids.npy", doc_ids)
+        np.save(tmp / "tf.npy", tf)
+        np.save(tmp / "doc_len.npy", np.asarray(doc_len, dtype=np.int32))
+        with open(tmp / "vocab.json", "w", encoding="utf-8") as f:
+            json.dump({
+                "vocab":   {t: i for i, t in enumerate(terms)},
+                "n_docs":  len(doc_len),
+                "avg_len": float(np.mean(doc_len)) if doc_len else 0.0,
+            }, f, ensure_ascii=False)
+
+        shutil.rmtree(target, ignore_errors=True)
+        os.replace(tmp, target)
+        return len(doc_len)
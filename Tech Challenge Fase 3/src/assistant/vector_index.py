@@ -0,0 +1,206 @@
+"""
+Indice vetorial FAISS configuravel e docstore em disco.
+
+O FAISS.from_documents do LangChain cria sempre um indice exato (flat L2) e o
+save_local/load_local grava e carrega um pickle com TODOS os textos. A memoria
+residente cresce linearmente com a base, o que inviabiliza sair do MedQuAD
+(~14 mil documentos) para milhoes de trechos de protocolos hospitalares.
+
+Este modulo substitui essas duas pecas:
+
+1. Tipos de indice (secao retriever.index do pipeline_config.yaml):
+   - flat:  busca exata (referencia, igual ao comportamento anterior)
+   - ivfpq: IVF + Product Quantization; vetores comprimidos para `pq_m` bytes
+            e busca apenas nas `nprobe` listas mais proximas
+   - hnsw:  grafo HNSW; busca aproximada muito rapida, sem compressao
+   - sq8:   quantizacao escalar int8 (4x menor que float32), busca exata
+            sobre os vetores quantizados
+
+2. O IO_FLAG_MMAP do FAISS so mapeia as listas invertidas do IVF: no ivfpq os
+   codigos PQ ficam no arquivo e o sistema operacional carrega sob demanda
+   apenas as listas visitadas. Nos tipos flat, hnsw e sq8 os vetores sao lidos
+   inteiros para a RAM; para bases grandes, use ivfpq.
+
+3. DiskDocStore: os textos ficam em um JSONL, com um arquivo de offsets
+   (int64 por documento). Ambos sao memory-mapped: recuperar o documento i
+   custa uma leitura do trecho [offset[i], offset[i+1]), sem carregar a base.
+
+Layout em data/vectorstore/:
+    vectors.faiss      indice FAISS
+    docs.jsonl         um documento por linha (page_content + metadata)
+    docs_offsets.npy   offsets de cada linha em docs.jsonl
+    index_meta.json    tipo de indice, parametros, dimensao e total
+"""
+from __future__ import annotations
+import json
+import mmap
+import os
+from pathlib import Path
+from typing import Iterable, Iterator, Optional
+
+import faiss
+import numpy as np
+
+INDEX_FILE   = "vectors.faiss"
+DOCS_FILE    = "docs.jsonl"
+OFFSETS_FILE = "docs_offsets.npy"
+META_FILE    = "index_meta.json"
+
+INDEX_TYPES = ("flat", "ivfpq", "hnsw", "sq8")
+
+DEFAULT_INDEX_CONFIG = {
+    "type":            "flat",
+    "ivf_nlist":       1024,
+    "pq_m":            16,
+    "pq_nbits":        8,
+    "nprobe":          16,
+    "hnsw_m":          32,
+    "ef_construction": 200,
+    "ef_search":       64,
+    "train_size":      100_000,
+    "mmap":            True,
+}
+
+
+def index_config(config: Optional[dict]) -> dict:
+    """Completa a secao retriever.index com os valores padrao."""
+    cfg = {**DEFAULT_INDEX_CONFIG, **(config or {})}
+    if cfg["type"] not in INDEX_TYPES:
+        raise ValueError(f"Tipo de indice desconhecido: {cfg['type']} (opcoes: {', '.join(INDEX_TYPES)})")
+    return cfg
+
+
+def factory_string(cfg: dict, dim: int, n_vectors: int) -> str:
+    """
+    String do faiss.index_factory para o tipo configurado.
+    O numero de listas IVF e limitado pelo tamanho da base (o FAISS recomenda
+    ao menos ~39 vetores de treino por lista).
+    """
+    kind = cfg["type"]
+    if kind == "flat":
+        return "Flat"
+    if kind == "sq8":
+        return "SQ8"
+    if kind == "hnsw":
+        return f"HNSW{cfg['hnsw_m']}"
+    if dim % cfg["pq_m"] != 0:
+        raise ValueError(f"pq_m={cfg['pq_m']} precisa dividir a dimensao dos embeddings ({dim})")
+    nlist = max(1, min(cfg["ivf_nlist"], n_vectors // 39))
+    return f"IVF{nlist},PQ{cfg['pq_m']}x{cfg['pq_nbits']}"
+
+
+def build_index(vectors: np.ndarray, cfg: dict) -> faiss.Index:
+    """Cria, treina (IVF/PQ/SQ) e popula o indice com os vetores."""
+    vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+    n, dim = vectors.shape
+    index = faiss.index_factory(dim, factory_string(cfg, dim, n), faiss.METRIC_L2)
+
+    if cfg["type"] == "hnsw":
+        index.hnsw.efConstruction = cfg["ef_construction"]
+
+    if not index.is_trained:
+        rng = np.random.default_rng(42)
+        sample = vectors if n <= cfg["train_size"] else vectors[rng.choice(n, cfg["train_size"], replace=False)]
+        index.train(sample)
+
+    index.add(vectors)
+    set_search_params(index, cfg)
+    return index
+
+
+def set_search_params(index: faiss.Index, cfg: dict) -> None:
+    """Parametros de busca (nao sao persistidos pelo write_index)."""
+    if cfg["type"] == "ivfpq":
+        faiss.extract_index_ivf(index).nprobe = cfg["nprobe"]
+    elif cfg["type"] == "hnsw":
+        index.hnsw.efSearch = cfg["ef_search"]
+
+
+def read_index(path: Path, cfg: dict) -> faiss.Index:
+    """
+    Le o indice com IO_FLAG_MMAP. Apenas as listas invertidas do IVF (ivfpq)
+    sao mapeadas; flat, hnsw e sq8 sao lidos inteiros para a memoria. Versoes
+    do faiss que rejeitam a flag caem na leitura normal.
+    """
+    index = None
+    if cfg["mmap"]:
+        try:
+            index = faiss.read_index(str(path), faiss.IO_FLAG_MMAP | faiss.IO_FLAG_READ_ONLY)
+        except RuntimeError:
+            index = None
+    if index is None:
+        index = faiss.read_index(str(path))
+    if cfg["type"] == "ivfpq":
+        # O reconstruct do IVF precisa do mapa posicao -> lista invertida. E
+        # construido aqui, uma unica vez, porque o indice e compartilhado entre
+        # as threads do servidor e make_direct_map altera o indice
+        faiss.extract_index_ivf(index).make_direct_map()
+    set_search_params(index, cfg)
+    return index
+
+
+def reconstruct(index: faiss.Index, positions: list[int]) -> np.ndarray:
+    """
+    Vetores armazenados no indice para as posicoes informadas (aproximados nos
+    tipos quantizados). Usado para pontuar documentos que vieram apenas do BM25.
+    Nao altera o indice: no IVF o mapa direto ja foi construido em read_index.
+    """
+    return np.vstack([index.reconstruct(int(p)) for p in positions])
+
+
+class DiskDocStore:
+    """
+    Documentos em disco, acessados por posicao (a mesma posicao do vetor no indice).
+    """
+
+    def __init__(self, directory: Path):
+        self.directory = Path(directory)
+        self.offsets   = np.load(self.directory / OFFSETS_FILE, mmap_mode="r")
+        self._file     = open(self.directory / DOCS_FILE, "rb")
+        size = os.fstat(self._file.fileno()).st_size
+        self._data = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+
+    def __len__(self) -> int:
+        return len(self.offsets) - 1
+
+    def __iter__(self) -> Iterator[dict]:
+        for i in range(len(self)):
+            yield self.get(i)
+
+    def get(self, i: int) -> dict:
+        start, end = int(self.offsets[i]), int(self.offsets[i + 1])
+        return json.loads(self._data[start:end])
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._file.close()
+
+    @staticmethod
+    def write(directory: Path, records: Iterable[dict]) -> int:
+        """
+        Grava os documentos (page_content + metadata) e os offsets.
+        Retorna o numero de documentos.
+        """
+        directory = Path(directory)
+        offsets = [0]
+        with open(directory / DOCS_FILE, "wb") as f:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False).encode("utf-8") + b"\n")
+                offsets.append(f.tell())
+        np.save(directory / OFFSETS_FILE, np.asarray(offsets, dtype=np.int64))
+        return len(offsets) - 1
+
+
+def write_meta(directory: Path, cfg: dict, dim: int, total: int, factory: str) -> None:
+    meta = {"index": cfg, "dim": dim, "total": total, "factory": factory}
+    with open(Path(directory) / META_FILE, "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+
+
+def read_meta(directory: Path) -> Optional[dict]:
+    path = Path(directory) / META_FILE
+    if not path.exists():
+        return None
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
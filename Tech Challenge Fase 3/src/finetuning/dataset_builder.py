@@ -2,13 +2,25 @@
 Construcao do dataset de fine-tuning a partir do MedQuAD.
 
 Este script e o primeiro passo do pipeline de fine-tuning. Ele:
-1. Le todos os arquivos XML do repositorio MedQuAD
+1. Le todos os arquivos XML do repositorio MedQuAD, em paralelo
 2. Extrai os pares (pergunta, resposta) de cada arquivo
 3. Aplica curadoria de qualidade (remove duplicatas, conteudo nao medico, etc.)
 4. Formata os dados no template de instrucao do LLaMA 3
 5. Divide em splits de treino, validacao e teste
 6. Salva os splits em formato JSONL em data/processed/
 
+Os passos 2 a 6 rodam em streaming: cada registro passa pela curadoria e pela
+formatacao e e gravado direto no arquivo do seu split, sem manter o corpus
+inteiro em memoria. Os XMLs sao lidos com iterparse em um pool de processos
+(dataset.workers no model_config.yaml ou --workers), na ordem dos arquivos.
+
+O split de cada registro e definido pelo hash da pergunta (sha1 com um salt
+fixo), e nao por um shuffle em memoria: a mesma pergunta cai sempre no mesmo
+split, independente da ordem de leitura ou de registros novos no corpus. As
+proporcoes sao aproximadas (a variacao e pequena para milhares de registros).
+Os registros de cada split ficam na ordem dos arquivos; o SFTTrainer embaralha
+o dataset de treino a cada epoca.
+
 Estrutura do XML MedQuAD:
     <QAPairs>
         <QAPair pid="1">
@@ -21,10 +33,13 @@ O dataset MedQuAD (github.com/abachaa/MedQuAD) contem 16.407 pares
 de perguntas e respostas clinicas em ingles, organizados em 47 colecoes
 de diferentes fontes medicas (NIH, CDC, NCI, etc.).
 
-Resultados esperados apos a curadoria:
+Resultados esperados apos a curadoria (14.571 registros, apenas duplicatas
+exatas, dataset.near_duplicates: false):
 - train.jsonl: ~11.657 amostras (80%)
 - val.jsonl:   ~1.457 amostras (10%)
 - test.jsonl:  ~1.457 amostras (10%)
+Com dataset.near_duplicates: true, a deduplicacao por MinHash remove poucas
+amostras a mais (1 das 2.914 de val + test).
 
 Como executar:
     python -m src.finetuning.dataset_builder --config configs/model_config.yaml
@@ -33,17 +48,25 @@ Pre-requisito:
     git clone https://github.com/abachaa/MedQuAD.git data/raw/medquad
 """
 from __future__ import annotations
+import os
 import json
-import random
+import hashlib
 import argparse
+import multiprocessing
 import xml.etree.ElementTree as ET
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
+from typing import Iterator
 
 import yaml
 
 from src.preprocessing.curator import curate_stream
 from src.preprocessing.formatter import format_record
 
+# Salt do hash de split (equivale ao antigo random.seed(42))
+SPLIT_SEED = "42"
+
 
 def parse_medquad_xml(xml_path: Path) -> list[dict]:
     """
@@ -60,11 +83,13 @@ def parse_medquad_xml(xml_path: Path) -> list[dict]:
     """
     records = []
     try:
-        tree = ET.parse(xml_path)
-        root = tree.getroot()
-        for qa in root.findall(".//QAPair"):
-            q_el = qa.find("Question")
-            a_el = qa.find("Answer")
+        # iterparse: cada QAPair e liberado apos ser lido, sem manter a
+        # arvore do arquivo inteiro em memoria
+        for _, elem in ET.iterparse(xml_path, events=("end",)):
+            if elem.tag != "QAPair":
+                continue
+            q_el = elem.find("Question")
+            a_el = elem.find("Answer")
             if q_el is not None and a_el is not None:
                 q = (q_el.text or "").strip()
                 a = (a_el.text or "").strip()
@@ -74,28 +99,32 @@ def parse_medquad_xml(xml_path: Path) -> list[dict]:
                         "answer":   a,
                         "source":   f"MedQuAD:{xml_path.stem}",
                     })
+            elem.clear()
     except ET.ParseError as e:
         print(f"[dataset_builder] Erro ao parsear {xml_path.name}: {e}")
     return records
 
 
-def load_medquad(medquad_dir: str) -> list[dict]:
+def iter_medquad(medquad_dir: str, workers: int = 1) -> Iterator[dict]:
     """
-    Carrega todos os XMLs do repositorio MedQuAD.
+    Le todos os XMLs do repositorio MedQuAD e gera os pares QA em streaming.
     
-    Percorre recursivamente o diretorio em busca de arquivos .xml.
+    Percorre recursivamente o diretorio em busca de arquivos .xml. Com
+    workers > 1, os arquivos sao parseados em um pool de processos; os
+    registros sao gerados na ordem dos arquivos, com no maximo 4 * workers
+    arquivos em andamento.
     
     Args:
         medquad_dir: Caminho para o repositorio MedQuAD clonado.
+        workers: Numero de processos de parsing.
         
-    Returns:
-        Lista com todos os pares QA extraidos.
+    Yields:
+        Pares QA extraidos, um por vez.
         
     Raises:
         FileNotFoundError: Se nenhum arquivo XML for encontrado.
     """
-    all_records: list[dict] = []
-    xml_files = list(Path(medquad_dir).rglob("*.xml"))
+    xml_files = sorted(Path(medquad_dir).rglob("*.xml"))
 
     if not xml_files:
         raise FileNotFoundError(
@@ -104,68 +133,103 @@ def load_medquad(medquad_dir: str) -> list[dict]:
             "  git clone https://github.com/abachaa/MedQuAD.git data/raw/medquad"
         )
 
-    for xml_file in xml_files:
-        records = parse_medquad_xml(xml_file)
-        all_records.extend(records)
+    if workers <= 1:
+        for xml_file in xml_files:
+            yield from parse_medquad_xml(xml_file)
+        return
+
+    with ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn")) as pool:
+        in_flight: deque = deque()
+        for xml_file in xml_files:
+            in_flight.append(pool.submit(parse_medquad_xml, xml_file))
+            if len(in_flight) >= 4 * workers:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
 
-    return all_records
+def load_medquad(medquad_dir: str, workers: int = 1) -> list[dict]:
+    """
+    Carrega todos os XMLs do repositorio MedQuAD em uma lista.
+    Para bases grandes, prefira iter_medquad (streaming).
+    """
+    return list(iter_medquad(medquad_dir, workers))
+
+
+def assign_split(record: dict, val_split: float, test_split: float) -> str:
+    """
+    Split deterministico do registro a partir do hash da pergunta:
+    o hash e mapeado para [0, 1) e comparado com as proporcoes do config.
+    """
+    question = record.get("question") or record.get("instruction") or ""
+    digest = hashlib.sha1(f"{SPLIT_SEED}:{question}".encode("utf-8")).digest()
+    u = int.from_bytes(digest[:8], "big") / 2 ** 64
+    if u < test_split:
+        return "test"
+    if u < test_split + val_split:
+        return "val"
+    return "train"
 
 
-def build_dataset(config: dict) -> None:
+def build_dataset(config: dict, workers: int | None = None) -> None:
     """
     Executa o pipeline completo de construcao do dataset.
     
-    Fluxo:
-    1. Carrega XMLs do MedQuAD
+    Fluxo (em streaming, registro a registro):
+    1. Le os XMLs do MedQuAD em paralelo
     2. Exibe exemplo de registro para verificacao
-    3. Aplica curadoria (remove duplicatas, conteudo nao medico, etc.)
+    3. Aplica curadoria (remove duplicatas, conteudo nao medico, etc.;
+       quase duplicatas so com dataset.near_duplicates)
     4. Formata cada registro no template LLaMA 3
-    5. Embaralha os dados com seed fixo (reproducibilidade)
-    6. Divide em train/val/test conforme proporcoes do config
-    7. Salva os splits em data/processed/
+    5. Atribui o split (train/val/test) pelo hash da pergunta
+    6. Grava o registro no arquivo do split em data/processed/
+    
+    Os arquivos sao gravados como .tmp e so substituem os splits anteriores
+    ao final, para que uma execucao interrompida nao deixe splits pela metade.
     
     Args:
         config: Dicionario com configuracoes do model_config.yaml.
+        workers: Processos de parsing dos XMLs (padrao: dataset.workers).
     """
     from src.utils.config import Config
 
-    medquad_dir = Config.MEDQUAD_DIR
-    raw_records = load_medquad(medquad_dir)
-    print(f"[dataset_builder] Total bruto: {len(raw_records)}")
-
-    if raw_records:
-        print(f"[dataset_builder] Exemplo de registro:")
-        ex = raw_records[0]
-        print(f"  question: {ex.get('question', '')[:80]}...")
-        print(f"  answer:   {ex.get('answer',   '')[:80]}...")
-
-    curated   = list(curate_stream(iter(raw_records)))
-    formatted = [format_record(r) for r in curated]
-
-    # Seed fixo garante que os splits sejam sempre os mesmos
-    random.seed(42)
-    random.shuffle(formatted)
+    dc = config["dataset"]
+    if workers is None:
+        workers = dc.get("workers", os.cpu_count() or 1)
 
-    dc    = config["dataset"]
-    n     = len(formatted)
-    n_test = int(n * dc["test_split"])
-    n_val  = int(n * dc["val_split"])
+    medquad_dir = Config.MEDQUAD_DIR
+    stats = {"raw": 0}
 
-    splits = {
-        "test":  formatted[:n_test],
-        "val":   formatted[n_test:n_test + n_val],
-        "train": formatted[n_test + n_val:],
-    }
+    def raw_records() -> Iterator[dict]:
+        for record in iter_medquad(medquad_dir, workers):
+            if stats["raw"] == 0:
+                print(f"[dataset_builder] Exemplo de registro:")
+                print(f"  question: {record.get('question', '')[:80]}...")
+                print(f"  answer:   {record.get('answer',   '')[:80]}...")
+            stats["raw"] += 1
+            yield record
 
     out_dir = Path(dc["train_file"]).parent
     out_dir.mkdir(parents=True, exist_ok=True)
 
-    for split_name, records in splits.items():
-        out_file = out_dir / f"{split_name}.jsonl"
-        with out_file.open("w", encoding="utf-8") as f:
-            for r in records:
-                f.write(json.dumps(r, ensure_ascii=False) + "\n")
-        print(f"[dataset_builder] {split_name}: {len(records)} amostras -> {out_file}")
+    split_names = ("train", "val", "test")
+    tmp_files = {name: out_dir / f"{name}.jsonl.tmp" for name in split_names}
+    counts    = dict.fromkeys(split_names, 0)
+    handles   = {name: path.open("w", encoding="utf-8") for name, path in tmp_files.items()}
+    try:
+        for record in curate_stream(raw_records(), near_duplicates=dc.get("near_duplicates", False)):
+            split = assign_split(record, dc["val_split"], dc["test_split"])
+            handles[split].write(json.dumps(format_record(record), ensure_ascii=False) + "\n")
+            counts[split] += 1
+    finally:
+        for f in handles.values():
+            f.close()
+
+    print(f"[dataset_builder] Total bruto: {stats['raw']}")
+    for name in split_names:
+        out_file = out_dir / f"{name}.jsonl"
+        os.replace(tmp_files[name], out_file)
+        print(f"[dataset_builder] {name}: {counts[name]} amostras -> {out_file}")
 
 
 if __name__ == "__main__":
@@ -177,7 +241,13 @@ if __name__ == "__main__":
         default="configs/model_config.yaml",
         help="Caminho para o arquivo de configuracao YAML"
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=None,
+        help="Processos de parsing dos XMLs (padrao: dataset.workers do config)"
+    )
     args = parser.parse_args()
     with open(args.config) as f:
         cfg = yaml.safe_load(f)
-    build_dataset(cfg)
+    build_dataset(cfg, args.workers)
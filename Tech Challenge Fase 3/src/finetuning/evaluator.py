@@ -22,16 +22,34 @@ A avaliacao qualitativa (leitura das respostas) e sempre recomendada.
 
 Como executar:
     python -m src.finetuning.evaluator --test_file data/processed/test.jsonl
+    python -m src.finetuning.evaluator --max_samples 0 --concurrency 8   # split inteiro
+
+Execucao concorrente e retomavel:
+- As perguntas sao enviadas ao Ollama por um cliente HTTP assincrono (httpx),
+  com ate --concurrency requisicoes simultaneas. Para o Ollama processar as
+  requisicoes em paralelo, inicie o servidor com OLLAMA_NUM_PARALLEL >= concurrency.
+- Cada resposta gerada e guardada em um cache em disco (data/eval_cache/),
+  indexado por (modelo, hash do prompt). Ao rodar de novo, as amostras ja
+  geradas nao voltam ao modelo: uma avaliacao interrompida continua de onde parou.
+- Cada amostra avaliada e gravada imediatamente em eval_results.jsonl.
+
+Alem de ROUGE-L e BLEU, o resumo traz o desempenho da geracao: tokens/s
+(agregado, tokens gerados / tempo de parede) e latencia p50/p95 por requisicao,
+calculados sobre as amostras geradas nesta execucao (nao as do cache).
 
 Os resultados sao salvos em eval_results.json com um resumo e os detalhes
 de cada amostra avaliada.
 """
 from __future__ import annotations
 import json
+import time
+import asyncio
+import hashlib
 import argparse
 from pathlib import Path
+from typing import Optional
 
-import requests
+import httpx
 from rouge_score import rouge_scorer
 from nltk.translate.bleu_score import sentence_bleu, SmoothingFunction
 
@@ -43,18 +61,11 @@ SYSTEM_PROMPT = (
     "Be concise and accurate."
 )
 
+DEFAULT_CACHE_DIR = "data/eval_cache"
 
-def _ask_ollama(question: str) -> str:
-    """
-    Envia uma pergunta ao Ollama e retorna a resposta do modelo.
-    
-    Args:
-        question: Pergunta clinica em ingles (formato MedQuAD).
-        
-    Returns:
-        Resposta gerada pelo modelo.
-    """
-    payload = {
+
+def _payload(question: str) -> dict:
+    return {
         "model": Config.OLLAMA_MODEL,
         "messages": [
             {"role": "system", "content": SYSTEM_PROMPT},
@@ -62,105 +73,271 @@ def _ask_ollama(question: str) -> str:
         ],
         "stream": False,
     }
-    resp = requests.post(f"{Config.OLLAMA_BASE_URL}/api/chat", json=payload, timeout=120)
-    return resp.json().get("message", {}).get("content", "")
 
 
-def evaluate(
-    test_file: str,
-    output_file: str = "eval_results.json",
-    max_samples: int = 100
-) -> dict:
+async def _ask_ollama_async(client: httpx.AsyncClient, question: str) -> dict:
     """
-    Avalia o modelo em amostras do conjunto de teste MedQuAD.
-    
-    Para cada amostra:
-    1. Extrai a pergunta e resposta de referencia do template LLaMA 3
-    2. Gera uma resposta com o modelo via Ollama
-    3. Calcula ROUGE-L e BLEU comparando com a referencia
-    4. Acumula as metricas e salva os resultados
-    
-    Args:
-        test_file: Caminho para o arquivo test.jsonl.
-        output_file: Caminho para salvar os resultados em JSON.
-        max_samples: Numero maximo de amostras a avaliar (padrao: 100).
-        
-    Returns:
-        Dicionario com metricas medias (avg_rougeL, avg_bleu, n_samples).
+    Envia uma pergunta ao Ollama. Retorna a resposta e os dados de
+    desempenho: latencia medida no cliente e tokens gerados (eval_count).
     """
-    scorer = rouge_scorer.RougeScorer(["rougeL"], use_stemmer=True)
-    smooth = SmoothingFunction().method1
+    inicio = time.perf_counter()
+    resp = await client.post("/api/chat", json=_payload(question))
+    resp.raise_for_status()
+    data = resp.json()
+    return {
+        "generated":       data.get("message", {}).get("content", ""),
+        "latency_s":       round(time.perf_counter() - inicio, 4),
+        "eval_count":      data.get("eval_count", 0),
+        "eval_duration_s": round(data.get("eval_duration", 0) / 1e9, 4),
+    }
+
+
+def _parse_sample(sample: dict) -> Optional[tuple[str, str]]:
+    """Extrai (pergunta, referencia) do template LLaMA 3."""
+    text = sample.get("text", "")
+    if "<|start_header_id|>user<|end_header_id|>" not in text:
+        return None
+
+    question  = (
+        text.split("<|start_header_id|>user<|end_header_id|>")[-1]
+            .split("<|eot_id|>")[0]
+            .strip()
+    )
+    reference = (
+        text.split("<|start_header_id|>assistant<|end_header_id|>")[-1]
+            .replace("<|eot_id|>", "")
+            .strip()
+    )
+    return question, reference
+
+
+def _prompt_key(model: str, question: str) -> str:
+    """Chave do cache: modelo + hash do prompt completo (system + pergunta)."""
+    prompt = json.dumps([SYSTEM_PROMPT, question], ensure_ascii=False)
+    return f"{model}:{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}"
+
+
+class GenerationCache:
+    """
+    Respostas geradas, em um JSONL por modelo (uma linha por amostra).
+    As linhas sao acrescentadas assim que cada resposta chega.
+    """
+
+    def __init__(self, cache_dir: str, model: str):
+        safe = "".join(c if c.isalnum() or c in "-_." else "_" for c in model)
+        self.path = Path(cache_dir) / f"{safe}.jsonl"
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self._entries: dict[str, dict] = {}
+        if self.path.exists():
+            with self.path.open("r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Linha incompleta de uma execucao interrompida
+                        continue
+                    self._entries[entry["key"]] = entry
+        self._file = self.path.open("a", encoding="utf-8")
+
+    def get(self, key: str) -> Optional[dict]:
+        return self._entries.get(key)
 
+    def put(self, key: str, value: dict) -> None:
+        entry = {"key": key, **value}
+        self._entries[key] = entry
+        self._file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self._file.flush()
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _percentile(values: list[float], p: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(round(p / 100 * (len(ordered) - 1))))]
+
+
+def _load_samples(test_file: str, max_samples: int) -> list[tuple[str, str]]:
     samples = []
     with Path(test_file).open("r", encoding="utf-8") as f:
-        for i, line in enumerate(f):
-            if i >= max_samples:
+        for line in f:
+            if max_samples and len(samples) >= max_samples:
                 break
-            samples.append(json.loads(line))
+            parsed = _parse_sample(json.loads(line))
+            if parsed is not None:
+                samples.append(parsed)
+    return samples
+
+
+async def _generate_all(samples, cache: GenerationCache, concurrency: int):
+    """
+    Gera as respostas que nao estao no cache, com ate `concurrency`
+    requisicoes simultaneas. Produz (indice, resposta, veio_do_cache) na
+    ordem em que as respostas ficam prontas.
+    """
+    model = Config.OLLAMA_MODEL
+    semaforo = asyncio.Semaphore(concurrency)
+    timeout = httpx.Timeout(120.0, connect=10.0)
+    limits = httpx.Limits(max_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=Config.OLLAMA_BASE_URL, timeout=timeout, limits=limits) as client:
+        async def gerar(i: int, question: str):
+            async with semaforo:
+                try:
+                    return i, await _ask_ollama_async(client, question), None
+                except (httpx.HTTPError, ValueError) as exc:
+                    return i, None, exc
 
-    print(f"[evaluator] Avaliando {len(samples)} amostras com {Config.OLLAMA_MODEL}...")
+        tasks = []
+        for i, (question, _) in enumerate(samples):
+            cached = cache.get(_prompt_key(model, question))
+            if cached is not None:
+                yield i, cached, True
+            else:
+                tasks.append(asyncio.ensure_future(gerar(i, question)))
+
+        for future in asyncio.as_completed(tasks):
+            i, answer, exc = await future
+            if exc is not None:
+                print(f"[evaluator] Falha na amostra {i}: {exc}")
+                yield i, None, False
+                continue
+            cache.put(_prompt_key(model, samples[i][0]), answer)
+            yield i, answer, False
+
+
+async def _evaluate_async(test_file: str, output_file: str, results_file: str,
+                          max_samples: int, concurrency: int, cache_dir: str) -> dict:
+    scorer = rouge_scorer.RougeScorer(["rougeL"], use_stemmer=True)
+    smooth = SmoothingFunction().method1
+
+    samples = _load_samples(test_file, max_samples)
+    cache   = GenerationCache(cache_dir, Config.OLLAMA_MODEL)
+    print(f"[evaluator] Avaliando {len(samples)} amostras com {Config.OLLAMA_MODEL} "
+          f"(concorrencia {concurrency}, cache: {cache.path})...")
 
     rouge_scores, bleu_scores, results = [], [], []
+    latencias, tokens, n_cache, n_falhas = [], 0, 0, 0
+    inicio = time.perf_counter()
+
+    try:
+        with open(results_file, "w", encoding="utf-8") as fout:
+            async for i, answer, from_cache in _generate_all(samples, cache, concurrency):
+                if answer is None:
+                    n_falhas += 1
+                    continue
+                if from_cache:
+                    n_cache += 1
+                else:
+                    latencias.append(answer["latency_s"])
+                    tokens += answer["eval_count"]
+
+                question, reference = samples[i]
+                generated = answer["generated"]
+                rouge     = scorer.score(reference, generated)["rougeL"].fmeasure
+                bleu      = sentence_bleu(
+                    [reference.split()],
+                    generated.split(),
+                    smoothing_function=smooth
+                )
+
+                rouge_scores.append(rouge)
+                bleu_scores.append(bleu)
+                result = {
+                    "index":      i,
+                    "question":   question[:100],
+                    "reference":  reference[:200],
+                    "generated":  generated[:200],
+                    "rougeL":     rouge,
+                    "bleu":       bleu,
+                    "latency_s":  answer["latency_s"],
+                    "eval_count": answer["eval_count"],
+                    "cached":     from_cache,
+                }
+                results.append(result)
+                fout.write(json.dumps(result, ensure_ascii=False) + "\n")
+                fout.flush()
+
+                if len(results) % 10 == 0:
+                    avg = sum(rouge_scores) / len(rouge_scores)
+                    print(f"[evaluator] {len(results)}/{len(samples)} -- ROUGE-L medio: {avg:.4f}")
+    finally:
+        cache.close()
 
-    for i, sample in enumerate(samples, 1):
-        text = sample.get("text", "")
-        if "<|start_header_id|>user<|end_header_id|>" not in text:
-            continue
-
-        question  = (
-            text.split("<|start_header_id|>user<|end_header_id|>")[-1]
-                .split("<|eot_id|>")[0]
-                .strip()
-        )
-        reference = (
-            text.split("<|start_header_id|>assistant<|end_header_id|>")[-1]
-                .replace("<|eot_id|>", "")
-                .strip()
-        )
-
-        generated = _ask_ollama(question)
-        rouge     = scorer.score(reference, generated)["rougeL"].fmeasure
-        bleu      = sentence_bleu(
-            [reference.split()],
-            generated.split(),
-            smoothing_function=smooth
-        )
-
-        rouge_scores.append(rouge)
-        bleu_scores.append(bleu)
-        results.append({
-            "question":  question[:100],
-            "reference": reference[:200],
-            "generated": generated[:200],
-            "rougeL":    rouge,
-            "bleu":      bleu,
-        })
-
-        if i % 10 == 0:
-            avg = sum(rouge_scores) / len(rouge_scores)
-            print(f"[evaluator] {i}/{len(samples)} -- ROUGE-L medio: {avg:.4f}")
+    duracao = time.perf_counter() - inicio
+    results.sort(key=lambda r: r["index"])
 
     summary = {
         "model":      Config.OLLAMA_MODEL,
-        "avg_rougeL": round(sum(rouge_scores) / len(rouge_scores), 4),
-        "avg_bleu":   round(sum(bleu_scores)  / len(bleu_scores),  4),
+        "avg_rougeL": round(sum(rouge_scores) / len(rouge_scores), 4) if rouge_scores else 0.0,
+        "avg_bleu":   round(sum(bleu_scores)  / len(bleu_scores),  4) if bleu_scores else 0.0,
         "n_samples":  len(results),
+        "n_cached":   n_cache,
+        "n_failed":   n_falhas,
+        "generation": {
+            "n_generated":    len(latencias),
+            "concurrency":    concurrency,
+            "wall_time_s":    round(duracao, 2),
+            "tokens":         tokens,
+            "tokens_per_s":   round(tokens / duracao, 2) if latencias else 0.0,
+            "latency_p50_s":  round(_percentile(latencias, 50), 3) if latencias else 0.0,
+            "latency_p95_s":  round(_percentile(latencias, 95), 3) if latencias else 0.0,
+        },
     }
-    print(f"[evaluator] ROUGE-L={summary['avg_rougeL']} | BLEU={summary['avg_bleu']}")
+    g = summary["generation"]
+    print(f"[evaluator] ROUGE-L={summary['avg_rougeL']} | BLEU={summary['avg_bleu']} | "
+          f"{g['tokens_per_s']} tokens/s | p50={g['latency_p50_s']}s p95={g['latency_p95_s']}s | "
+          f"{n_cache} do cache, {n_falhas} falhas")
 
     with open(output_file, "w", encoding="utf-8") as f:
         json.dump({"summary": summary, "results": results}, f, ensure_ascii=False, indent=2)
-    print(f"[evaluator] Resultados salvos em: {output_file}")
+    print(f"[evaluator] Resultados salvos em: {output_file} (por amostra: {results_file})")
 
     return summary
 
 
+def evaluate(
+    test_file: str,
+    output_file: str = "eval_results.json",
+    max_samples: int = 100,
+    concurrency: int = 4,
+    results_file: Optional[str] = None,
+    cache_dir: str = DEFAULT_CACHE_DIR,
+) -> dict:
+    """
+    Avalia o modelo em amostras do conjunto de teste MedQuAD.
+    
+    Para cada amostra:
+    1. Extrai a pergunta e resposta de referencia do template LLaMA 3
+    2. Gera uma resposta com o modelo via Ollama (ou reaproveita do cache),
+       com ate `concurrency` requisicoes simultaneas
+    3. Calcula ROUGE-L e BLEU comparando com a referencia
+    4. Grava o resultado da amostra no JSONL e acumula as metricas
+    
+    Args:
+        test_file: Caminho para o arquivo test.jsonl.
+        output_file: Caminho para salvar os resultados em JSON.
+        max_samples: Numero maximo de amostras a avaliar (padrao: 100; 0 = todas).
+        concurrency: Requisicoes simultaneas ao Ollama.
+        results_file: JSONL com uma linha por amostra (padrao: output_file com .jsonl).
+        cache_dir: Diretorio do cache de respostas geradas.
+        
+    Returns:
+        Dicionario com metricas medias (avg_rougeL, avg_bleu, n_samples) e
+        de desempenho da geracao (generation).
+    """
+    results_file = results_file or str(Path(output_file).with_suffix(".jsonl"))
+    return asyncio.run(_evaluate_async(test_file, output_file, results_file, max_samples, concurrency, cache_dir))
+
+
 if __name__ == "__main__":
     parser = argparse.ArgumentParser(
         description="Avalia o modelo com metricas ROUGE-L e BLEU no conjunto de teste MedQuAD."
     )
     parser.add_argument("--test_file",   default="data/processed/test.jsonl")
     parser.add_argument("--output",      default="eval_results.json")
-    parser.add_argument("--max_samples", type=int, default=100)
+    parser.add_argument("--max_samples", type=int, default=100, help="0 = todas as amostras")
+    parser.add_argument("--concurrency", type=int, default=4, help="Requisicoes simultaneas ao Ollama")
+    parser.add_argument("--cache_dir",   default=DEFAULT_CACHE_DIR)
     args = parser.parse_args()
-    evaluate(args.test_file, args.output, args.max_samples)
+    evaluate(args.test_file, args.output, args.max_samples, args.concurrency, cache_dir=args.cache_dir)
@@ -27,16 +27,34 @@ Como usar:
     registro_limpo = anonymize_record({"question": "...", "answer": "..."})
 
 Para processar um diretorio inteiro de arquivos JSONL:
-    python -m src.preprocessing.anonymizer --input data/processed --output data/anonymized
+    python -m src.preprocessing.anonymizer --input data/processed --output data/anonymized --workers 4
+
+Desempenho (o spaCy dentro do Presidio e a etapa mais lenta da preparacao):
+- Atalho por regex: campos sem letras maiusculas, digitos ou "@" nao tem nomes,
+  locais, datas, telefones, e-mails nem documentos; o modelo NER e pulado e so
+  as regex sao aplicadas.
+- Lotes: os textos de varios registros sao analisados juntos pelo
+  BatchAnalyzerEngine do Presidio, que usa nlp.pipe do spaCy.
+- Processos: com --workers N, cada processo tem seus proprios motores do
+  Presidio e recebe blocos de registros; a saida e gravada na ordem original,
+  em streaming, sem carregar o arquivo inteiro em memoria.
+
+Benchmark de registros/segundo:
+    python -m src.preprocessing.benchmark_anonymizer --input data/processed --workers 1 2 4
 """
 from __future__ import annotations
 import re
+import os
 import json
 import argparse
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import islice
 from pathlib import Path
-from typing import Any
+from typing import Any, Iterable, Iterator, Optional
 
-from presidio_analyzer import AnalyzerEngine
+from presidio_analyzer import AnalyzerEngine, BatchAnalyzerEngine
 from presidio_analyzer.nlp_engine import NlpEngineProvider
 from presidio_anonymizer import AnonymizerEngine
 from presidio_anonymizer.entities import OperatorConfig
@@ -59,10 +77,19 @@ def _build_engines():
         supported_languages=["pt", "en"]
     )
     anonymizer = AnonymizerEngine()
-    return analyzer, anonymizer
+    return analyzer, BatchAnalyzerEngine(analyzer_engine=analyzer), anonymizer
+
 
+# Motores do processo atual, criados no primeiro uso (cada worker cria os seus)
+_engines = None
+
+
+def _get_engines():
+    global _engines
+    if _engines is None:
+        _engines = _build_engines()
+    return _engines
 
-analyzer, anonymizer = _build_engines()
 
 # Entidades que o Presidio detecta e substitui
 ENTITIES = ["PERSON", "EMAIL_ADDRESS", "PHONE_NUMBER", "LOCATION", "DATE_TIME", "NRP"]
@@ -84,6 +111,24 @@ _EXTRA = [
     (re.compile(r"\bprontu[ai]rio\s*n[o°]?\s*\d{4,10}\b", re.I), "<PRONTUARIO>"),
 ]
 
+# Nomes e locais comecam com maiuscula; datas, telefones e documentos tem
+# digitos; e-mails tem "@". Textos sem nenhum desses caracteres nao passam pelo NER.
+_NEEDS_NER = re.compile(r"[A-ZÀ-Þ0-9@]")
+
+# Campos de texto anonimizados em cada registro
+TEXT_FIELDS = {"instruction", "input", "output", "content", "text", "question", "answer"}
+
+
+def needs_ner(text: str) -> bool:
+    """Indica se o texto precisa da analise do Presidio (ou se bastam as regex)."""
+    return bool(_NEEDS_NER.search(text))
+
+
+def _apply_extra(text: str) -> str:
+    for pattern, replacement in _EXTRA:
+        text = pattern.sub(replacement, text)
+    return text
+
 
 def anonymize_text(text: str, language: str = "pt") -> str:
     """
@@ -96,52 +141,161 @@ def anonymize_text(text: str, language: str = "pt") -> str:
     Returns:
         Texto com dados sensiveis substituidos por placeholders.
     """
+    if not needs_ner(text):
+        return _apply_extra(text)
+    analyzer, _, anonymizer = _get_engines()
     results  = analyzer.analyze(text=text, entities=ENTITIES, language=language)
     anon_text: str = anonymizer.anonymize(
         text=text,
         analyzer_results=results,
         operators=OPERATORS
     ).text
-    for pattern, replacement in _EXTRA:
-        anon_text = pattern.sub(replacement, anon_text)
-    return anon_text
+    return _apply_extra(anon_text)
+
+
+def anonymize_texts(texts: list[str], language: str = "pt", batch_size: int = 32) -> list[str]:
+    """
+    Versao em lote de anonymize_text: os textos que precisam de NER sao
+    analisados juntos (nlp.pipe do spaCy, em lotes de batch_size).
+    """
+    output  = list(texts)
+    pending = [i for i, text in enumerate(texts) if needs_ner(text)]
+    if pending:
+        _, batch_analyzer, anonymizer = _get_engines()
+        results = batch_analyzer.analyze_iterator(
+            [texts[i] for i in pending],
+            language=language,
+            batch_size=batch_size,
+            entities=ENTITIES,
+        )
+        for i, analyzer_results in zip(pending, results):
+            output[i] = anonymizer.anonymize(
+                text=texts[i],
+                analyzer_results=analyzer_results,
+                operators=OPERATORS
+            ).text
+    return [_apply_extra(text) for text in output]
+
+
+def anonymize_records(records: list[dict[str, Any]], language: str = "pt",
+                      batch_size: int = 32) -> list[dict[str, Any]]:
+    """
+    Anonimiza os campos de texto de varios registros em uma unica passada
+    em lote. Demais campos (como metadados numericos) sao mantidos intactos.
+    """
+    slots = [
+        (i, k) for i, record in enumerate(records)
+        for k, v in record.items() if k in TEXT_FIELDS and isinstance(v, str)
+    ]
+    texts  = anonymize_texts([records[i][k] for i, k in slots], language, batch_size)
+    output = [dict(record) for record in records]
+    for (i, k), text in zip(slots, texts):
+        output[i][k] = text
+    return output
 
 
 def anonymize_record(record: dict[str, Any]) -> dict[str, Any]:
     """
     Anonimiza os campos de texto de um registro JSONL.
     
-    Apenas os campos listados em text_fields sao processados.
+    Apenas os campos listados em TEXT_FIELDS sao processados.
     Demais campos (como metadados numericos) sao mantidos intactos.
     """
-    text_fields = {"instruction", "input", "output", "content", "text", "question", "answer"}
-    return {
-        k: anonymize_text(v) if k in text_fields and isinstance(v, str) else v
-        for k, v in record.items()
-    }
+    return anonymize_records([record])[0]
+
+
+# ── Processamento paralelo ───────────────────────────────────────────────────
+
+def _init_worker() -> None:
+    # Carrega o spaCy/Presidio uma vez por processo, antes do primeiro bloco
+    _get_engines()
+
+
+def _anonymize_chunk(records: list[dict[str, Any]], batch_size: int) -> list[dict[str, Any]]:
+    return anonymize_records(records, batch_size=batch_size)
+
+
+class ParallelAnonymizer:
+    """
+    Anonimiza um fluxo de registros em blocos, distribuidos entre processos.
+
+    Com workers <= 1 os blocos sao processados no proprio processo. A saida
+    de stream() segue a ordem de entrada; no maximo 2 * workers blocos ficam
+    em andamento, entao a memoria nao cresce com o tamanho do arquivo.
+    """
+
+    def __init__(self, workers: int = 1, chunk_size: int = 256, batch_size: int = 32):
+        self.workers    = workers
+        self.chunk_size = chunk_size
+        self.batch_size = batch_size
+        self._pool: Optional[ProcessPoolExecutor] = None
+        if workers > 1:
+            self._pool = ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+            )
+
+    def __enter__(self) -> "ParallelAnonymizer":
+        return self
+
+    def __exit__(self, *exc) -> None:
+        self.close()
+
+    def close(self) -> None:
+        if self._pool is not None:
+            self._pool.shutdown(cancel_futures=True)
+            self._pool = None
+
+    def _chunks(self, records: Iterable[dict[str, Any]]) -> Iterator[list[dict[str, Any]]]:
+        it = iter(records)
+        while chunk := list(islice(it, self.chunk_size)):
+            yield chunk
+
+    def stream(self, records: Iterable[dict[str, Any]]) -> Iterator[dict[str, Any]]:
+        if self._pool is None:
+            for chunk in self._chunks(records):
+                yield from anonymize_records(chunk, batch_size=self.batch_size)
+            return
+
+        in_flight: deque = deque()
+        for chunk in self._chunks(records):
+            in_flight.append(self._pool.submit(_anonymize_chunk, chunk, self.batch_size))
+            if len(in_flight) >= 2 * self.workers:
+                yield from in_flight.popleft().result()
+        while in_flight:
+            yield from in_flight.popleft().result()
+
+
+def _read_jsonl(path: Path) -> Iterator[dict[str, Any]]:
+    with path.open("r", encoding="utf-8") as f:
+        for line in f:
+            if line.strip():
+                yield json.loads(line)
 
 
-def process_directory(input_dir: str, output_dir: str) -> None:
+def process_directory(input_dir: str, output_dir: str, workers: int = 1,
+                      chunk_size: int = 256, batch_size: int = 32) -> None:
     """
     Processa todos os arquivos JSONL de um diretorio, anonimizando cada registro.
     
     Args:
         input_dir: Diretorio com arquivos JSONL originais.
         output_dir: Diretorio onde os arquivos anonimizados serao salvos.
+        workers: Numero de processos (cada um com seus motores do Presidio).
+        chunk_size: Registros enviados por vez a cada processo.
+        batch_size: Textos por lote no nlp.pipe do spaCy.
     """
     in_path, out_path = Path(input_dir), Path(output_dir)
     out_path.mkdir(parents=True, exist_ok=True)
-    for jsonl_file in in_path.glob("**/*.jsonl"):
-        out_file = out_path / jsonl_file.relative_to(in_path)
-        out_file.parent.mkdir(parents=True, exist_ok=True)
-        with jsonl_file.open("r", encoding="utf-8") as fin, \
-             out_file.open("w", encoding="utf-8") as fout:
-            for line in fin:
-                fout.write(json.dumps(
-                    anonymize_record(json.loads(line)),
-                    ensure_ascii=False
-                ) + "\n")
-        print(f"[anonymizer] {jsonl_file.name} -> {out_file}")
+    with ParallelAnonymizer(workers, chunk_size, batch_size) as parallel:
+        for jsonl_file in in_path.glob("**/*.jsonl"):
+            out_file = out_path / jsonl_file.relative_to(in_path)
+            out_file.parent.mkdir(parents=True, exist_ok=True)
+            with out_file.open("w", encoding="utf-8") as fout:
+                for record in parallel.stream(_read_jsonl(jsonl_file)):
+                    fout.write(json.dumps(record, ensure_ascii=False) + "\n")
+            print(f"[anonymizer] {jsonl_file.name} -> {out_file}")
 
 
 if __name__ == "__main__":
@@ -150,5 +304,9 @@ if __name__ == "__main__":
     )
     parser.add_argument("--input",  required=True, help="Diretorio de entrada")
     parser.add_argument("--output", required=True, help="Diretorio de saida")
+    parser.add_argument("--workers", type=int, default=max(1, (os.cpu_count() or 1) - 1),
+                        help="Processos em paralelo (1 = sem paralelismo)")
+    parser.add_argument("--chunk-size", type=int, default=256, help="Registros por bloco enviado a cada processo")
+    parser.add_argument("--batch-size", type=int, default=32, help="Textos por lote no nlp.pipe")
     args = parser.parse_args()
-    process_directory(args.input, args.output)
+    process_directory(args.input, args.output, args.workers, args.chunk_size, args.batch_size)
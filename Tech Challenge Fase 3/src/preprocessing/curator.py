@@ -10,13 +10,16 @@ Criterios de rejeicao:
 - Respostas muito longas (mais de 8192 caracteres): ultrapassam o contexto do modelo
 - Conteudo nao medico: registros sem palavras-chave clinicas relevantes
 - Duplicatas: mesmo texto de pergunta aparece mais de uma vez
+- Quase duplicatas (opcional, `near_duplicates=True`): mesma pergunta escrita
+  de outra forma e resposta parafraseada de um registro ja visto (similaridade
+  de Jaccard da resposta estimada por MinHash, limiar de ~0.88)
 
 Por que curadoria importa:
 - Dados de baixa qualidade degradam o fine-tuning
 - Duplicatas causam overfitting (o modelo memoriza ao inves de generalizar)
 - Conteudo fora de dominio medico "confunde" o modelo durante o treino
 
-Resultados com o MedQuAD completo (16.407 registros):
+Resultados com o MedQuAD completo (16.407 registros, apenas duplicatas exatas):
 - Mantidos: 14.571 (88%)
 - Rejeitados: 1.836 (12%)
   - 1.345 duplicatas
@@ -24,20 +27,43 @@ Resultados com o MedQuAD completo (16.407 registros):
   - 169 muito longos
   - 1 muito curto
 
+Deteccao de duplicatas em uma unica passada, com memoria limitada:
+- A resposta de cada registro vira uma assinatura MinHash (NUM_PERM minimos de
+  hashes dos trigramas de palavras). Assinaturas de textos parecidos coincidem
+  em muitas posicoes.
+- LSH: a assinatura e dividida em LSH_BANDS faixas; dois registros sao
+  candidatos a quase duplicata se alguma faixa for identica.
+- As faixas sao separadas pelo assunto da pergunta (palavras de conteudo, sem
+  stopwords): o MedQuAD tem respostas-modelo quase identicas para doencas
+  diferentes ("The Human Phenotype Ontology provides the following list...",
+  "This condition is inherited in an autosomal recessive pattern..."), com
+  Jaccard acima de 0.9. Sem essa separacao, ~19% dos registros de teste e
+  validacao eram descartados; com ela, 1 de 2.914.
+- As chaves das faixas (e o hash exato da pergunta) ficam em um filtro de Bloom
+  de tamanho fixo, dimensionado por `capacity` (numero esperado de registros).
+  A memoria nao cresce com o corpus; o custo e uma pequena taxa de falsos
+  positivos (~1e-6 por chave) enquanto o volume ficar dentro da capacidade.
+
 Como usar:
     from src.preprocessing.curator import curate_stream
     registros_limpos = list(curate_stream(iter(registros_brutos)))
 
 Para processar um diretorio inteiro:
     python -m src.preprocessing.curator --input data/raw --output data/processed
+    python -m src.preprocessing.curator --input corpus/ --output curado/ --capacity 5000000
 """
 from __future__ import annotations
+import re
 import json
+import math
+import zlib
 import hashlib
 import argparse
 from pathlib import Path
 from typing import Iterator
 
+import numpy as np
+
 MIN_QUESTION_LEN = 10
 MIN_ANSWER_LEN   = 20
 MAX_ANSWER_LEN   = 8192
@@ -52,12 +78,142 @@ MEDICAL_KEYWORDS = {
     "paciente", "tratamento", "diagnostico", "sintoma", "medicamento",
 }
 
+# Palavras ignoradas no assunto da pergunta (quase duplicatas)
+QUESTION_STOPWORDS = {
+    "what", "is", "are", "the", "of", "a", "an", "to", "how", "do", "does",
+    "for", "and", "in", "can", "be", "who", "which", "i", "there", "about",
+}
+
+# Quase duplicatas (MinHash + LSH)
+NUM_PERM         = 128     # tamanho da assinatura MinHash
+LSH_BANDS        = 8       # 8 faixas x 16 linhas: limiar de Jaccard (1/8)^(1/16) ~0.88
+SHINGLE_SIZE     = 3       # trigramas de palavras
+MAX_TOKENS       = 256     # tokens de pergunta + resposta usados na assinatura
+DEFAULT_CAPACITY = 100_000 # registros esperados (dimensiona o filtro de Bloom)
+BLOOM_ERROR_RATE = 1e-6
+
+
+def _keyword_pattern(words: set[str]) -> re.Pattern:
+    """
+    Compila as palavras-chave em uma unica regex em forma de trie
+    (ex.: "d(?:ose|rug|i(?:sease|sorder|...))"): cada posicao do texto e
+    testada contra um prefixo por vez, e nao contra as 30 palavras.
+    Mantem a semantica de substring do teste original (`kw in texto`).
+    """
+    trie: dict = {}
+    for word in words:
+        node = trie
+        for ch in word:
+            node = node.setdefault(ch, {})
+        node[""] = {}
+
+    def build(node: dict) -> str:
+        # Uma palavra termina aqui: basta o prefixo para haver ocorrencia
+        if "" in node:
+            return ""
+        alts = [re.escape(ch) + build(child) for ch, child in sorted(node.items())]
+        return alts[0] if len(alts) == 1 else "(?:" + "|".join(alts) + ")"
+
+    return re.compile(build(trie), re.IGNORECASE)
+
+
+_MEDICAL_RE = _keyword_pattern(MEDICAL_KEYWORDS)
+_WORD       = re.compile(r"\w+")
+
 
 def _hash(text: str) -> str:
     """Gera hash MD5 do texto para deteccao de duplicatas."""
     return hashlib.md5(text.encode()).hexdigest()
 
 
+def _shingles(text: str) -> set[str]:
+    """Trigramas de palavras (textos curtos viram um unico shingle)."""
+    tokens = _WORD.findall(text.lower())[:MAX_TOKENS]
+    if len(tokens) <= SHINGLE_SIZE:
+        return {" ".join(tokens)}
+    return {" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(len(tokens) - SHINGLE_SIZE + 1)}
+
+
+def _question_topic(question: str) -> str:
+    """Palavras de conteudo da pergunta, ordenadas ("What is (are) Glaucoma ?" -> "glaucoma")."""
+    words = {w for w in _WORD.findall(question.lower()) if w not in QUESTION_STOPWORDS}
+    return " ".join(sorted(words))
+
+
+class BloomFilter:
+    """Filtro de Bloom em um array de bits numpy, com tamanho fixo."""
+
+    def __init__(self, capacity: int, error_rate: float = BLOOM_ERROR_RATE):
+        self.capacity = capacity
+        self.n_bits   = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.n_hashes = max(1, round(self.n_bits / capacity * math.log(2)))
+        self.count    = 0
+        self._bits    = np.zeros((self.n_bits + 7) // 8, dtype=np.uint8)
+        self._steps   = np.arange(self.n_hashes, dtype=np.uint64)
+
+    def _positions(self, keys: list[bytes]) -> np.ndarray:
+        # Double hashing: posicao_i = h1 + i * h2 (mod n_bits)
+        digests = b"".join(hashlib.blake2b(k, digest_size=16).digest() for k in keys)
+        h = np.frombuffer(digests, dtype=np.uint64).reshape(-1, 2)
+        return (h[:, :1] + self._steps * (h[:, 1:] | np.uint64(1))) % np.uint64(self.n_bits)
+
+    def contains(self, keys: list[bytes]) -> np.ndarray:
+        """Para cada chave, indica se ela (provavelmente) ja foi inserida."""
+        pos = self._positions(keys)
+        bits = (self._bits[pos >> np.uint64(3)] >> (pos & np.uint64(7)).astype(np.uint8)) & 1
+        return bits.all(axis=1)
+
+    def add(self, keys: list[bytes]) -> None:
+        pos = self._positions(keys).ravel()
+        np.bitwise_or.at(self._bits, pos >> np.uint64(3), np.left_shift(1, pos & np.uint64(7)).astype(np.uint8))
+        self.count += len(keys)
+
+
+class MinHashLSH:
+    """
+    Indice LSH de assinaturas MinHash para detectar quase duplicatas em streaming.
+    Apenas as chaves das faixas sao guardadas, em um filtro de Bloom.
+    """
+
+    _PRIME = np.uint64((1 << 61) - 1)
+
+    def __init__(self, num_perm: int = NUM_PERM, bands: int = LSH_BANDS,
+                 capacity: int = DEFAULT_CAPACITY, error_rate: float = BLOOM_ERROR_RATE, seed: int = 42):
+        if num_perm % bands:
+            raise ValueError(f"num_perm ({num_perm}) precisa ser multiplo de bands ({bands})")
+        rng = np.random.default_rng(seed)
+        # Permutacoes h(x) = (a * x + b) mod p, com x de 32 bits
+        self._a   = rng.integers(1, 1 << 32, num_perm, dtype=np.uint64)
+        self._b   = rng.integers(0, 1 << 32, num_perm, dtype=np.uint64)
+        self.bands = bands
+        self.rows  = num_perm // bands
+        self.bloom = BloomFilter(capacity * bands, error_rate)
+
+    def signature(self, text: str) -> np.ndarray:
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) for s in _shingles(text)), dtype=np.uint64
+        )
+        return ((np.outer(self._a, hashes) + self._b[:, None]) % self._PRIME).min(axis=1)
+
+    def _band_keys(self, signature: np.ndarray, scope: str = "") -> list[bytes]:
+        prefix = hashlib.blake2b(scope.encode("utf-8"), digest_size=8).digest()
+        return [
+            prefix + band.to_bytes(2, "little") + signature[band * self.rows:(band + 1) * self.rows].tobytes()
+            for band in range(self.bands)
+        ]
+
+    def check_and_add(self, text: str, scope: str = "") -> bool:
+        """
+        Retorna True se o texto e quase duplicata de algum texto ja visto com
+        o mesmo `scope`. Caso contrario, registra o texto no indice e retorna False.
+        """
+        keys = self._band_keys(self.signature(text), scope)
+        if self.bloom.contains(keys).any():
+            return True
+        self.bloom.add(keys)
+        return False
+
+
 def _is_valid(record: dict) -> tuple[bool, str]:
     """
     Verifica se um registro atende aos criterios de qualidade.
@@ -78,14 +234,14 @@ def _is_valid(record: dict) -> tuple[bool, str]:
     if len(a) > MAX_ANSWER_LEN:
         return False, "answer_too_long"
 
-    combined = (q + " " + a).lower()
-    if not any(kw in combined for kw in MEDICAL_KEYWORDS):
+    if not (_MEDICAL_RE.search(q) or _MEDICAL_RE.search(a)):
         return False, "not_medical"
 
     return True, "ok"
 
 
-def curate_stream(records: Iterator[dict]) -> Iterator[dict]:
+def curate_stream(records: Iterator[dict], near_duplicates: bool = False,
+                  capacity: int = DEFAULT_CAPACITY) -> Iterator[dict]:
     """
     Filtra um stream de registros aplicando os criterios de qualidade.
     
@@ -94,11 +250,15 @@ def curate_stream(records: Iterator[dict]) -> Iterator[dict]:
     
     Args:
         records: Iterator de dicionarios com dados brutos.
+        near_duplicates: Rejeita tambem quase duplicatas (MinHash + LSH).
+            Desligado por padrao; so compara registros com o mesmo assunto na pergunta.
+        capacity: Numero esperado de registros; dimensiona os filtros de Bloom.
         
     Yields:
         Registros que passaram em todos os criterios de qualidade.
     """
-    seen: set[str] = set()
+    seen  = BloomFilter(capacity)
+    lsh   = MinHashLSH(capacity=capacity) if near_duplicates else None
     stats = {"total": 0, "kept": 0, "rejected": {}}
 
     for record in records:
@@ -109,12 +269,19 @@ def curate_stream(records: Iterator[dict]) -> Iterator[dict]:
             stats["rejected"][reason] = stats["rejected"].get(reason, 0) + 1
             continue
 
-        h = _hash(record.get("question", record.get("instruction", "")))
-        if h in seen:
+        key = [_hash(record.get("question", record.get("instruction", ""))).encode()]
+        if seen.contains(key)[0]:
             stats["rejected"]["duplicate"] = stats["rejected"].get("duplicate", 0) + 1
             continue
 
-        seen.add(h)
+        if lsh is not None:
+            q = record.get("question") or record.get("instruction") or ""
+            a = record.get("answer")   or record.get("output")      or ""
+            if lsh.check_and_add(a, scope=_question_topic(q)):
+                stats["rejected"]["near_duplicate"] = stats["rejected"].get("near_duplicate", 0) + 1
+                continue
+
+        seen.add(key)
         stats["kept"] += 1
         yield record
 
@@ -123,15 +290,21 @@ def curate_stream(records: Iterator[dict]) -> Iterator[dict]:
         f"Mantidos: {stats['kept']} | "
         f"Rejeitados: {stats['rejected']}"
     )
+    if stats["kept"] > capacity:
+        print(f"[curator] Aviso: {stats['kept']} registros mantidos acima da capacidade ({capacity}); "
+              "a taxa de falsos positivos da deduplicacao aumenta. Use --capacity maior.")
 
 
-def process_directory(input_dir: str, output_dir: str) -> None:
+def process_directory(input_dir: str, output_dir: str, near_duplicates: bool = False,
+                      capacity: int = DEFAULT_CAPACITY) -> None:
     """
     Processa todos os arquivos JSONL de um diretorio aplicando curadoria.
     
     Args:
         input_dir: Diretorio com arquivos JSONL brutos.
         output_dir: Diretorio onde os arquivos curados serao salvos.
+        near_duplicates: Rejeita tambem quase duplicatas (MinHash + LSH).
+        capacity: Numero esperado de registros por arquivo.
     """
     in_path, out_path = Path(input_dir), Path(output_dir)
     out_path.mkdir(parents=True, exist_ok=True)
@@ -146,7 +319,7 @@ def process_directory(input_dir: str, output_dir: str) -> None:
                     yield json.loads(line)
 
         with out_file.open("w", encoding="utf-8") as fout:
-            for r in curate_stream(_records()):
+            for r in curate_stream(_records(), near_duplicates, capacity):
                 fout.write(json.dumps(r, ensure_ascii=False) + "\n")
 
         print(f"[curator] {jsonl_file.name} -> {out_file}")
@@ -158,5 +331,9 @@ if __name__ == "__main__":
     )
     parser.add_argument("--input",  required=True, help="Diretorio de entrada")
     parser.add_argument("--output", required=True, help="Diretorio de saida")
+    parser.add_argument("--capacity", type=int, default=DEFAULT_CAPACITY,
+                        help="Numero esperado de registros (dimensiona a memoria da deduplicacao)")
+    parser.add_argument("--quase-duplicatas", action="store_true",
+                        help="Remove tambem quase duplicatas (MinHash + LSH), alem das duplicatas exatas da pergunta")
     args = parser.parse_args()
-    process_directory(args.input, args.output)
+    process_directory(args.input, args.output, args.quase_duplicatas, args.capacity)
@@ -45,6 +45,11 @@ BLOCKED_PATTERNS = [
     (re.compile(r"\balter[ae]\s+prontu[ai]rio\b", re.I), "Alteracao de prontuario nao permitida"),
 ]
 
+# Caracteres retidos no streaming antes da verificacao: maior que qualquer
+# ocorrencia dos BLOCKED_PATTERNS, para nao exibir o inicio de um padrao
+# que so se completa nos proximos trechos
+STREAM_HOLDBACK = 64
+
 # Padroes que geram aviso mas nao bloqueiam
 VALIDATION_PATTERNS = [
     re.compile(r"\bdosagem\b",         re.I),
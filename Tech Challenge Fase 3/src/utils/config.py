@@ -35,5 +35,8 @@ class Config:
     LOG_DIR:           Path = BASE_DIR / os.getenv("LOG_DIR", "logs")
     VECTOR_STORE_PATH: str  = BASE_DIR / os.getenv("VECTOR_STORE_PATH", "data/vectorstore")
 
+    # Exibe a resposta token a token no terminal (main.py)
+    STREAM_RESPONSES: bool = os.getenv("STREAM_RESPONSES", "true").lower() == "true"
+
     # Segurança
     ENABLE_GUARDRAILS: bool = os.getenv("ENABLE_GUARDRAILS", "true").lower() == "true"
@@ -1,5 +1,11 @@
 """Testes unitários — anonimização de dados médicos."""
-from src.preprocessing.anonymizer import anonymize_text, anonymize_record
+from src.preprocessing.anonymizer import (
+    ParallelAnonymizer,
+    anonymize_record,
+    anonymize_records,
+    anonymize_text,
+    needs_ner,
+)
 
 
 def test_removes_cpf():
@@ -23,3 +29,25 @@ def test_record_preserves_non_text_fields():
     result = anonymize_record(record)
     assert result["label"] == 1
     assert result["score"] == 0.9
+
+
+def test_fast_path_skips_ner_for_plain_text():
+    assert not needs_ner("diabetes mellitus tipo dois")
+    assert needs_ner("Paciente João")
+    assert needs_ner("contato: joao@email.com")
+
+
+def test_batch_matches_single_record_and_keeps_order():
+    records = [
+        {"question": "CPF 123.456.789-00", "id": 1},
+        {"question": "sintomas de gripe", "id": 2},
+    ]
+    result = anonymize_records(records)
+    assert [r["id"] for r in result] == [1, 2]
+    assert result == [anonymize_record(r) for r in records]
+
+
+def test_parallel_stream_preserves_order():
+    records = [{"text": f"registro {i}", "id": i} for i in range(10)]
+    with ParallelAnonymizer(workers=1, chunk_size=3) as parallel:
+        assert [r["id"] for r in parallel.stream(records)] == list(range(10))
@@ -0,0 +1,47 @@
+"""Testes unitários — cache semântico de respostas."""
+import time
+
+from src.assistant.cache import SemanticCache
+
+ANSWER = {"raw_answer": "r", "final_answer": "f", "sources": [], "confidence": 0.9, "warnings": []}
+
+
+def test_hit_for_similar_query_and_same_docs():
+    cache = SemanticCache(similarity_threshold=0.95)
+    cache.store([1.0, 0.0, 0.0], ("doc-a", "doc-b"), ANSWER)
+    result = cache.lookup([0.99, 0.05, 0.0], ("doc-a", "doc-b"))
+    assert result is not None
+    assert result["final_answer"] == "f"
+    assert cache.hits == 1 and cache.misses == 0
+
+
+def test_miss_when_docs_differ():
+    cache = SemanticCache(similarity_threshold=0.95)
+    cache.store([1.0, 0.0, 0.0], ("doc-a",), ANSWER)
+    assert cache.lookup([1.0, 0.0, 0.0], ("doc-b",)) is None
+    assert cache.misses == 1
+
+
+def test_miss_below_threshold():
+    cache = SemanticCache(similarity_threshold=0.95)
+    cache.store([1.0, 0.0, 0.0], ("doc-a",), ANSWER)
+    assert cache.lookup([0.0, 1.0, 0.0], ("doc-a",)) is None
+
+
+def test_lru_eviction_keeps_recently_used():
+    cache = SemanticCache(max_entries=2)
+    cache.store([1.0, 0.0, 0.0], ("a",), ANSWER)
+    cache.store([0.0, 1.0, 0.0], ("b",), ANSWER)
+    cache.lookup([1.0, 0.0, 0.0], ("a",))
+    cache.store([0.0, 0.0, 1.0], ("c",), ANSWER)
+    assert len(cache) == 2
+    assert cache.lookup([1.0, 0.0, 0.0], ("a",)) is not None
+    assert cache.lookup([0.0, 1.0, 0.0], ("b",)) is None
+
+
+def test_ttl_expiration():
+    cache = SemanticCache(ttl_seconds=0.01)
+    cache.store([1.0, 0.0, 0.0], ("a",), ANSWER)
+    time.sleep(0.02)
+    assert cache.lookup([1.0, 0.0, 0.0], ("a",)) is None
+    assert len(cache) == 0
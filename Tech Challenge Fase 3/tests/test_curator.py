@@ -0,0 +1,60 @@
+"""Testes unitários — curadoria do dataset (qualidade e duplicatas)."""
+from src.preprocessing.curator import MinHashLSH, _is_valid, curate_stream
+
+ANSWER = (
+    "Glaucoma is a group of diseases that can damage the eye's optic nerve and result "
+    "in vision loss and blindness. The most common form is open-angle glaucoma, and "
+    "treatment usually starts with prescription eye drops that lower eye pressure."
+)
+
+
+def _record(question: str, answer: str = ANSWER) -> dict:
+    return {"question": question, "answer": answer}
+
+
+def test_keyword_check_keeps_substring_semantics():
+    assert _is_valid(_record("What are the SYMPTOMS of flu?", "Fever, cough and tiredness are common."))[0]
+    assert _is_valid(_record("Why is the sky blue at noon?", "Light is scattered by air molecules."))[1] == "not_medical"
+
+
+def test_exact_duplicate_question_is_rejected():
+    records = [_record("What is glaucoma?"), _record("What is glaucoma?", ANSWER + " More details.")]
+    assert len(list(curate_stream(iter(records)))) == 1
+
+
+def test_paraphrased_duplicate_is_rejected():
+    records = [
+        _record("What is glaucoma?"),
+        _record("What is (are) Glaucoma ?"),
+    ]
+    assert len(list(curate_stream(iter(records), near_duplicates=True))) == 1
+    assert len(list(curate_stream(iter(records)))) == 2
+
+
+def test_boilerplate_answers_for_different_diseases_are_kept():
+    def gard(disease: str, signs: str) -> dict:
+        return _record(
+            f"What are the symptoms of {disease} ?",
+            f"What are the signs and symptoms of {disease}? The Human Phenotype Ontology provides "
+            f"the following list of signs and symptoms for {disease}. If the information is available, "
+            "the table below includes how often the symptom is seen in people with this condition. "
+            "You can use the MedlinePlus Medical Dictionary to look up the definitions for these "
+            f"medical terms. Signs and Symptoms Approximate number of patients {signs}",
+        )
+
+    records = [
+        gard("Dystonia 19", "Autosomal dominant inheritance - Paroxysmal dystonia"),
+        gard("Acatalasemia", "Autosomal recessive inheritance - Oral ulcer"),
+    ]
+    assert len(list(curate_stream(iter(records), near_duplicates=True))) == 2
+
+
+def test_distinct_records_are_kept():
+    other = (
+        "Type 2 diabetes is a chronic condition that affects the way the body processes "
+        "blood sugar. Treatment includes diet, exercise and medication such as metformin."
+    )
+    lsh = MinHashLSH(capacity=100)
+    assert not lsh.check_and_add("What is glaucoma? " + ANSWER)
+    assert not lsh.check_and_add("What is type 2 diabetes? " + other)
+    assert lsh.check_and_add("What is glaucoma? " + ANSWER)
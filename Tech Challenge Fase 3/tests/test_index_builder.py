@@ -0,0 +1,67 @@
+"""Testes unitários — build incremental do vector store (shards e checkpoints)."""
+import pytest
+
+pytest.importorskip("faiss")
+
+from src.assistant.index_builder import SHARDS_DIR, VectorStoreBuilder
+from src.assistant.vector_index import DiskDocStore, index_config
+
+DOCS = [{"page_content": f"Protocol {i}: treatment of condition {i}.", "metadata": {"id": i}} for i in range(5)]
+
+
+class FakeEmbeddings:
+    """Vetores determinísticos; falha depois de `fail_after` lotes (simula interrupção)."""
+
+    def __init__(self, fail_after=None):
+        self.fail_after = fail_after
+        self.calls = 0
+
+    def embed_documents(self, texts):
+        if self.fail_after is not None and self.calls >= self.fail_after:
+            raise RuntimeError("build interrompido")
+        self.calls += 1
+        return [[float(len(t)), float(sum(map(ord, t)) % 97), 1.0, 0.0] for t in texts]
+
+
+def _builder(store, embeddings, model_name="fake-model"):
+    return VectorStoreBuilder(store, model_name, index_config({"type": "flat"}),
+                              batch_size=2, workers=0, embeddings=embeddings)
+
+
+def _shards(store):
+    return sorted((store / SHARDS_DIR).glob("shard-*.npy"))
+
+
+def test_rebuild_reuses_embeddings_and_compacts(tmp_path):
+    assert _builder(tmp_path, FakeEmbeddings()).build(DOCS) == 5
+    assert len(_shards(tmp_path)) == 1
+
+    builder = _builder(tmp_path, FakeEmbeddings())
+    builder.build(DOCS + [{"page_content": "New protocol.", "metadata": {"id": 5}}])
+    assert (builder.reused, builder.embedded) == (5, 1)
+    assert len(_shards(tmp_path)) == 1
+
+    docstore = DiskDocStore(tmp_path)
+    try:
+        assert len(docstore) == 6
+    finally:
+        docstore.close()
+
+
+def test_interrupted_build_resumes_from_shards(tmp_path):
+    with pytest.raises(RuntimeError):
+        _builder(tmp_path, FakeEmbeddings(fail_after=1)).build(DOCS)
+    assert len(_shards(tmp_path)) == 1
+
+    builder = _builder(tmp_path, FakeEmbeddings())
+    builder.build(DOCS)
+    assert (builder.reused, builder.embedded) == (2, 3)
+
+
+def test_changing_embedding_model_discards_shards(tmp_path):
+    _builder(tmp_path, FakeEmbeddings()).build(DOCS)
+
+    builder = _builder(tmp_path, FakeEmbeddings(), model_name="other-model")
+    builder.build(DOCS)
+    assert (builder.reused, builder.embedded) == (0, 5)
+    assert len(_shards(tmp_path)) == 1
@@ -0,0 +1,76 @@
+"""Testes unitários — fila de geração com micro-batching, backpressure e históricos por usuário."""
+import asyncio
+
+import pytest
+
+from src.assistant.service import AssistantService, GenerationQueue, QueueFullError
+
+
+def test_concurrent_prompts_are_batched():
+    batches = []
+
+    def generate_batch(states):
+        batches.append(len(states))
+        for s in states:
+            s["raw_answer"] = s["input"].upper()
+
+    async def scenario():
+        queue = GenerationQueue(generate_batch, max_size=8, max_batch_size=4, batch_wait_ms=50)
+        queue.start()
+        results = await asyncio.gather(*(queue.submit({"input": f"q{i}"}) for i in range(4)))
+        await queue.stop()
+        return results
+
+    results = asyncio.run(scenario())
+    assert [r["raw_answer"] for r in results] == ["Q0", "Q1", "Q2", "Q3"]
+    assert batches == [4]
+
+
+def test_rejects_when_queue_is_full():
+    def generate_batch(states):
+        for s in states:
+            s["raw_answer"] = ""
+
+    async def scenario():
+        queue = GenerationQueue(generate_batch, max_size=1, max_batch_size=1)
+        queue.start()
+        first = asyncio.ensure_future(queue.submit({"input": "a"}))
+        second = asyncio.ensure_future(queue.submit({"input": "b"}))
+        await asyncio.sleep(0)
+        with pytest.raises(QueueFullError):
+            await queue.submit({"input": "c"})
+        await asyncio.gather(first, second, return_exceptions=True)
+        await queue.stop()
+
+    asyncio.run(scenario())
+
+
+class _FakePipeline:
+    def generate_batch(self, states):
+        for s in states:
+            s["raw_answer"] = "ok"
+
+    def prepare(self, query, user_id):
+        return {"query": query}
+
+    def needs_generation(self, state):
+        return False
+
+    def finish(self, state):
+        return {"answer": f"re: {state['query']}"}
+
+
+def test_histories_are_bounded_and_reads_do_not_create_them():
+    service = AssistantService(_FakePipeline(), history_k=2, max_users=2)
+    assert service.messages("nobody") == []
+    assert service.stats()["users"] == 0
+
+    async def scenario():
+        for user in ("a", "b", "a", "c"):
+            await service.ask(f"q-{user}", user)
+
+    asyncio.run(scenario())
+    # "b" foi o menos recente quando "c" chegou
+    assert service.stats()["users"] == 2
+    assert service.messages("b") == []
+    assert [m.content for m in service.messages("a")] == ["q-a", "re: q-a", "q-a", "re: q-a"]
@@ -0,0 +1,32 @@
+"""Testes unitários — índice BM25 e fusão RRF da busca híbrida."""
+from src.assistant.sparse_index import BM25Index, reciprocal_rank_fusion, tokenize
+
+DOCS = [
+    {"page_content": "Metformin is the first-line treatment for type 2 diabetes."},
+    {"page_content": "Sepsis requires antibiotics within the first hour."},
+    {"page_content": "Insulin therapy for type 1 diabetes and diabetic ketoacidosis."},
+]
+
+
+def test_tokenize_removes_stopwords_and_short_tokens():
+    assert tokenize("O tratamento da Sepse com antibióticos") == ["tratamento", "sepse", "antibióticos"]
+    assert tokenize("What is the X ray") == ["ray"]
+
+
+def test_bm25_ranks_exact_term_first(tmp_path):
+    assert BM25Index.write(tmp_path, DOCS) == 3
+    index = BM25Index(tmp_path)
+    results = index.search("metformin diabetes", k=3)
+    assert results[0][0] == 0
+    assert {pos for pos, _ in results} == {0, 2}
+
+
+def test_bm25_unknown_terms_return_nothing(tmp_path):
+    BM25Index.write(tmp_path, DOCS)
+    assert BM25Index(tmp_path).search("zzzz", k=5) == []
+
+
+def test_rrf_prefers_documents_in_both_rankings():
+    fused = reciprocal_rank_fusion([[1, 2, 3], [3, 4, 1]], k=60)
+    assert [doc for doc, _ in fused][:2] == [1, 3]
+    assert len(fused) == 4
@@ -42,18 +42,26 @@ _MODEL_FOLDER = {
 
 # ── Vídeo ────────────────────────────────────────────────────────────────────
 
-def _detect_all(video_path, model_path):
+def _detect_all(video_path, model_path, batch_size=None, keyframe_interval=None):
     import relatorio as _relatorio_module
 
-    model_results = []
+    # Um único decode do vídeo alimenta os três modelos (ver detectors/combinado.py)
+    combinado = _load("combinado", os.path.join("src", "detectors", "combinado.py"))
     total = len(_ALL_MODES)
 
-    for i, mode in enumerate(_ALL_MODES, 1):
-        print(f"\n{'='*60}")
-        print(f"  [{i}/{total}] Processando modelo: {mode}")
-        print(f"{'='*60}")
-        detector = _get_detector(mode)
-        result = detector.detect_video(video_path, model_path, headless=True)
+    print(f"\n{'='*60}")
+    print(f"  Processando {total} modelos: {', '.join(_ALL_MODES)}")
+    print(f"{'='*60}")
+    detectors = [_get_detector(mode) for mode in _ALL_MODES]
+    if (detectors[0].BATCH_SIZE if batch_size is None else batch_size) > 1:
+        print("AVISO: --batch / DETECT_BATCH não se aplica ao modo todos "
+              "(os modelos já rodam em paralelo por frame); ignorado.")
+    analyzer = combinado.CombinedAnalyzer(detectors, keyframe_interval=keyframe_interval)
+    results = analyzer.analyze(video_path, model_path)
+
+    model_results = []
+    for mode in _ALL_MODES:
+        result = results.get(_MODEL_FOLDER[mode])
         if result is None:
             print(f"  AVISO: {mode} não retornou resultados (modelo ausente?).")
             continue
@@ -79,6 +87,7 @@ def _detect_all(video_path, model_path):
     print(f"\n{'='*60}")
     print(f"  ANÁLISE COMPLETA CONCLUÍDA")
     print(f"  Modelos processados: {len(model_results)}/{total}")
+    print(f"  Vídeo anotado: saida/resultado_geral.mp4")
     print(f"  Relatório: saida/relatorio_geral.txt/.html/.json")
     print(f"{'='*60}")
 
@@ -177,7 +186,7 @@ def main():
     )
     parser.add_argument(
         "action",
-        choices=["download", "train", "detect", "extract", "audio", "video"],
+        choices=["download", "train", "export", "detect", "extract", "audio", "video"],
         help="Ação a executar",
     )
     parser.add_argument(
@@ -197,7 +206,21 @@ def main():
     )
     parser.add_argument("--output",   help="Pasta de saída para extração de frames")
     parser.add_argument("--model",    default=None, help="Caminho alternativo para o modelo (.pt)")
+    parser.add_argument(
+        "--formato", choices=["onnx", "openvino"], default="onnx",
+        help="Formato da ação 'export' (gerado ao lado de weights/best.pt; default: onnx)",
+    )
+    parser.add_argument("--int8", action="store_true", help="Quantiza o modelo exportado para INT8")
     parser.add_argument("--headless", action="store_true", help="Executar sem janela de visualização do vídeo")
+    parser.add_argument(
+        "--batch", type=int, default=None,
+        help="Frames por chamada YOLO; > 1 ativa o modo em lote com decode/escrita em threads (default: DETECT_BATCH ou 1)",
+    )
+    parser.add_argument(
+        "--keyframe", type=int, default=None,
+        help="Inferência completa a cada N frames ou em troca de cena; caixas rastreadas nos demais "
+             "(default: DETECT_KEYFRAME_INTERVAL ou 1 = todos os frames)",
+    )
 
     args = parser.parse_args()
 
@@ -232,6 +255,16 @@ def main():
                 print(f"{'='*60}")
             _get_detector(mode).train()
 
+    # ── export ────────────────────────────────────────────────────────────────
+    elif args.action == "export":
+        modes = _ALL_MODES if args.mode == "todos" else [args.mode]
+        for i, mode in enumerate(modes, 1):
+            if args.mode == "todos":
+                print(f"\n{'='*60}")
+                print(f"  [{i}/{len(modes)}] Exportando modelo: {mode}")
+                print(f"{'='*60}")
+            _get_detector(mode).export(args.formato, args.int8)
+
     # ── detect ────────────────────────────────────────────────────────────────
     elif args.action == "detect":
         if not args.video:
@@ -239,9 +272,12 @@ def main():
             parser.print_help()
             return
         if args.mode == "todos":
-            _detect_all(args.video, args.model)
+            _detect_all(args.video, args.model, batch_size=args.batch, keyframe_interval=args.keyframe)
         else:
-            _get_detector(args.mode).detect_video(args.video, args.model, args.headless)
+            _get_detector(args.mode).detect_video(
+                args.video, args.model, args.headless,
+                batch_size=args.batch, keyframe_interval=args.keyframe,
+            )
 
     # ── extract ───────────────────────────────────────────────────────────────
     elif args.action == "extract":
@@ -0,0 +1,319 @@
+"""Benchmark de detecção em vídeo — velocidade e perda de recall.
+
+Uso:
+    python benchmark_deteccao.py amostragem --mode sangramento --video videos/video_01.mp4
+    python benchmark_deteccao.py amostragem --mode instrumentos --video videos/video_01.mp4 --intervalo 3 5 8
+    python benchmark_deteccao.py backends --mode sangramento --video videos/video_01.mp4 --frames 300
+    python benchmark_deteccao.py filtro --mode instrumentos --video videos/video_01.mp4
+
+amostragem: roda o detector em todos os frames (referência) e depois com
+quadros-chave a cada N frames (+ troca de cena), com as caixas rastreadas
+nos demais. Para cada N mostra o fps, o ganho sobre a referência e a perda
+em relação a ela:
+    recall de frames  frames com detecção na referência que também têm detecção
+    recall de caixas  caixas da referência reencontradas (mesma classe, IoU >= 0,5)
+    anomalias         eventos da referência reencontrados (mesmo tipo/severidade,
+                      até N frames de distância)
+
+backends: roda o mesmo clipe com cada artefato em weights/ (best.pt e os
+gerados por `python app.py export`) e mostra o fps, o mAP50 / mAP50-95 no
+split de validação do dataset e a concordância com o .pt (recall de caixas
+das detecções do .pt no clipe).
+
+filtro: guarda as detecções brutas do YOLO no clipe e mede só o
+pós-processamento (_filter_boxes) por frame: o laço original caixa a caixa,
+com _is_text_region em toda caixa sobrevivente, contra a versão vetorizada
+com cache do veredito de texto. Mostra também quantos frames mantiveram
+exatamente as mesmas caixas.
+"""
+import argparse
+import os
+import sys
+import time
+
+import cv2
+import numpy as np
+
+from app import _ALL_MODES, _get_detector
+
+IOU_MATCH = 0.5
+
+
+def _boxes(results):
+    if not results or len(results) == 0 or results[0].boxes is None or len(results[0].boxes) == 0:
+        return np.zeros((0, 4), dtype=np.float32), np.zeros(0, dtype=int)
+    boxes = results[0].boxes
+    return boxes.xyxy.cpu().numpy(), boxes.cls.cpu().numpy().astype(int)
+
+
+def _iou(a, b):
+    """IoU entre cada caixa de `a` (N,4) e cada caixa de `b` (M,4)."""
+    x1 = np.maximum(a[:, None, 0], b[None, :, 0])
+    y1 = np.maximum(a[:, None, 1], b[None, :, 1])
+    x2 = np.minimum(a[:, None, 2], b[None, :, 2])
+    y2 = np.minimum(a[:, None, 3], b[None, :, 3])
+    inter = np.clip(x2 - x1, 0, None) * np.clip(y2 - y1, 0, None)
+    area_a = (a[:, 2] - a[:, 0]) * (a[:, 3] - a[:, 1])
+    area_b = (b[:, 2] - b[:, 0]) * (b[:, 3] - b[:, 1])
+    return inter / np.maximum(area_a[:, None] + area_b[None, :] - inter, 1e-9)
+
+
+def _matched_boxes(ref, cand):
+    """Caixas da referência com par na candidata (mesma classe, IoU >= IOU_MATCH), pareamento guloso."""
+    (ref_xyxy, ref_cls), (cand_xyxy, cand_cls) = ref, cand
+    if len(ref_xyxy) == 0 or len(cand_xyxy) == 0:
+        return 0
+    iou = _iou(ref_xyxy, cand_xyxy)
+    iou[ref_cls[:, None] != cand_cls[None, :]] = 0.0
+    matched = 0
+    for i in np.argsort(-iou.max(axis=1)):
+        j = int(np.argmax(iou[i]))
+        if iou[i, j] >= IOU_MATCH:
+            matched += 1
+            iou[:, j] = 0.0
+    return matched
+
+
+def _analisar(detector, model, video_path, interval, max_frames=None):
+    """Caixas por frame, anomalias e segundos gastos (sem gravar vídeo nem relatório)."""
+    cap = cv2.VideoCapture(video_path)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    detector._reset_state()
+    sampler = detector._make_sampler(width, height, interval)
+
+    per_frame = []
+    frame_count = 0
+    started = time.perf_counter()
+    while max_frames is None or frame_count < max_frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame is None or frame.size == 0:
+            continue
+        frame_count += 1
+        results = detector._infer_frames(model, [frame], width, height, sampler)[0]
+        detector._update_state(frame_count, results)
+        per_frame.append(_boxes(results))
+    elapsed = time.perf_counter() - started
+    cap.release()
+    return per_frame, list(detector._anomalies), elapsed, sampler
+
+
+def _aquecer(detector, model, video_path):
+    """Uma inferência antes de medir, para a inicialização do modelo não entrar na referência."""
+    cap = cv2.VideoCapture(video_path)
+    ret, frame = cap.read()
+    cap.release()
+    if ret and frame is not None:
+        detector._predict(model, frame, frame.shape[1], frame.shape[0])
+
+
+def _anomalias_encontradas(ref, cand, tolerance):
+    restantes = list(cand)
+    found = 0
+    for a in ref:
+        for b in restantes:
+            if (b["type"], b["severity"]) == (a["type"], a["severity"]) and abs(b["frame"] - a["frame"]) <= tolerance:
+                restantes.remove(b)
+                found += 1
+                break
+    return found
+
+
+def _fmt(value):
+    return f"{value:.3f}" if value is not None else "—"
+
+
+def _pct(num, den):
+    return f"{num / den * 100:6.1f}%" if den else "    —  "
+
+
+def benchmark_amostragem(args):
+    detector = _get_detector(args.mode)
+    model_path = detector._resolve_model_path(args.model)
+    if model_path is None:
+        sys.exit(1)
+    model = detector._load_model(model_path)
+    _aquecer(detector, model, args.video)
+
+    ref, ref_anom, ref_s, _ = _analisar(detector, model, args.video, 1)
+    n = len(ref)
+    if n == 0:
+        sys.exit(f"Nenhum frame lido de {args.video}")
+    ref_frames = sum(len(c) > 0 for _, c in ref)
+    ref_boxes = sum(len(c) for _, c in ref)
+
+    print(f"\n{os.path.basename(args.video)} | {args.mode} | {n} frames | "
+          f"limiar de cena {detector.SCENE_THRESHOLD:g}")
+    print(f"{'modo':<12}{'fps':>8}{'ganho':>8}{'inferidos':>11}"
+          f"{'rec. frames':>13}{'rec. caixas':>13}{'anomalias':>12}")
+    print(f"{'todos':<12}{n / ref_s:>8.1f}{'1.0x':>8}{'100.0%':>11}"
+          f"{'100.0%':>13}{'100.0%':>13}{len(ref_anom):>12}")
+
+    for interval in args.intervalo:
+        cand, anom, secs, sampler = _analisar(detector, model, args.video, interval)
+        frames_ok = sum(len(r[1]) > 0 and len(c[1]) > 0 for r, c in zip(ref, cand))
+        boxes_ok = sum(_matched_boxes(r, c) for r, c in zip(ref, cand))
+        anom_ok = _anomalias_encontradas(ref_anom, anom, interval)
+        inferidos = sampler.keyframes / sampler.frames if sampler else 1.0
+        print(f"{f'N={interval}':<12}{n / secs:>8.1f}{f'{ref_s / secs:.1f}x':>8}{inferidos * 100:>10.1f}%"
+              f"{_pct(frames_ok, ref_frames):>13}{_pct(boxes_ok, ref_boxes):>13}"
+              f"{f'{anom_ok}/{len(ref_anom)}':>12}")
+
+
+def _map(detector, model_path, split):
+    """(mAP50, mAP50-95) do artefato no split do dataset, em CPU; (None, None) sem dataset."""
+    from ultralytics import YOLO
+
+    data = os.path.join(os.path.dirname(os.path.abspath(__file__)), detector.DATASET_YAML)
+    if not os.path.exists(data):
+        return None, None
+    metrics = YOLO(model_path, task="detect").val(
+        data=data, split=split, imgsz=detector.IMGSZ, batch=1, device="cpu", plots=False, verbose=False,
+    )
+    return float(metrics.box.map50), float(metrics.box.map)
+
+
+def benchmark_backends(args):
+    detector = _get_detector(args.mode)
+    artifacts = detector.model_artifacts()
+    if not artifacts:
+        sys.exit(f"Nenhum modelo treinado para {args.mode}. Execute: python app.py train --mode {args.mode}")
+    # .pt primeiro: é a referência de concordância
+    artifacts.sort(key=lambda a: a[0] != "pt")
+
+    print(f"\n{os.path.basename(args.video)} | {args.mode} | até {args.frames} frames | mAP no split '{args.split}'")
+    print(f"{'backend':<15}{'fps':>8}{'ganho':>8}{'mAP50':>8}{'mAP50-95':>10}{'concord.':>10}")
+
+    ref = ref_s = None
+    for backend, path in artifacts:
+        model = detector._load_model(path)
+        _aquecer(detector, model, args.video)
+        per_frame, _, secs, _ = _analisar(detector, model, args.video, 1, max_frames=args.frames)
+        n = len(per_frame)
+        if ref is None:
+            ref, ref_s = per_frame, secs
+        ref_boxes = sum(len(c) for _, c in ref)
+        agreement = sum(_matched_boxes(r, c) for r, c in zip(ref, per_frame))
+        map50, map_ = (None, None) if args.sem_map else _map(detector, path, args.split)
+        print(f"{backend:<15}{n / secs:>8.1f}{f'{ref_s / secs:.1f}x':>8}{_fmt(map50):>8}{_fmt(map_):>10}"
+              f"{_pct(agreement, ref_boxes):>10}")
+
+
+def _filtro_original(detector, results, frame_w, frame_h, frame):
+    """_filter_boxes antes da vetorização (laço por caixa, sem cache), como referência."""
+    boxes = results[0].boxes
+    frame_area = frame_w * frame_h
+    edge_x = frame_w * detector.EDGE_MARGIN_RATIO
+    edge_y = frame_h * detector.EDGE_MARGIN_RATIO
+    keep = []
+    for i, (x1, y1, x2, y2) in enumerate(boxes.xyxy.cpu().numpy()):
+        w = float(x2 - x1)
+        h = float(y2 - y1)
+        cy = (y1 + y2) / 2.0
+        area_ratio = (w * h) / frame_area
+        aspect = max(w, h) / max(min(w, h), 1.0)
+        if area_ratio < detector.MIN_BOX_AREA_RATIO or area_ratio > detector.MAX_BOX_AREA_RATIO:
+            continue
+        if aspect < detector.MIN_ASPECT_RATIO:
+            continue
+        if x1 < edge_x or x2 > frame_w - edge_x or y1 < edge_y or y2 > frame_h - edge_y:
+            continue
+        if cy < frame_h * detector.OVERLAY_ZONE_TOP or cy > frame_h * detector.OVERLAY_ZONE_BOTTOM:
+            continue
+        if w / max(h, 1.0) > detector.MAX_BANNER_WH_RATIO and h / frame_h < detector.MAX_BANNER_H_RATIO:
+            continue
+        if detector.FILTER_TEXT_REGIONS and detector._is_text_region(frame[int(y1):int(y2), int(x1):int(x2)]):
+            continue
+        keep.append(i)
+    results[0].boxes = boxes[keep]
+    return results
+
+
+def benchmark_filtro(args):
+    detector = _get_detector(args.mode)
+    model_path = detector._resolve_model_path(args.model)
+    if model_path is None:
+        sys.exit(1)
+    model = detector._load_model(model_path)
+
+    # Detecções brutas (sem filtro) de cada frame com caixas
+    cap = cv2.VideoCapture(args.video)
+    width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+    height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    raw = []
+    frames_read = 0
+    while frames_read < args.frames:
+        ret, frame = cap.read()
+        if not ret:
+            break
+        if frame is None or frame.size == 0:
+            continue
+        frames_read += 1
+        r = model(frame, conf=detector.CONFIDENCE_THRESHOLD, iou=detector.IOU_THRESHOLD,
+                  classes=detector.CLASSES, verbose=False)[0]
+        if r.boxes is not None and len(r.boxes):
+            raw.append((frame, r, r.boxes))
+    cap.release()
+    if not raw:
+        sys.exit("Nenhuma detecção bruta no clipe — nada para filtrar.")
+
+    def medir(filtro):
+        kept = []
+        started = time.perf_counter()
+        for frame, r, boxes in raw:
+            r.boxes = boxes
+            kept.append(_boxes(filtro([r], frame)))
+        return (time.perf_counter() - started) / len(raw) * 1000, kept
+
+    antes_ms, antes = medir(lambda res, frame: _filtro_original(detector, res, width, height, frame))
+    detector._reset_state()
+    depois_ms, depois = medir(lambda res, frame: detector._filter_boxes(res, width, height, frame=frame))
+    iguais = sum(
+        len(a[0]) == len(b[0]) and np.array_equal(a[1], b[1]) and np.allclose(a[0], b[0])
+        for a, b in zip(antes, depois)
+    )
+    n_caixas = sum(len(b.cls) for _, _, b in raw)
+
+    print(f"\n{os.path.basename(args.video)} | {args.mode} | {len(raw)} frames com caixas "
+          f"({n_caixas / len(raw):.1f} caixas brutas/frame)")
+    print(f"{'filtro':<26}{'ms/frame':>10}{'ganho':>8}")
+    print(f"{'original (laço)':<26}{antes_ms:>10.3f}{'1.0x':>8}")
+    print(f"{'vetorizado + cache':<26}{depois_ms:>10.3f}{f'{antes_ms / max(depois_ms, 1e-9):.1f}x':>8}")
+    print(detector._filter_summary())
+    print(f"Frames com as mesmas caixas mantidas: {iguais}/{len(raw)}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    sub = parser.add_subparsers(dest="benchmark", required=True)
+
+    amostragem = sub.add_parser("amostragem", help="Quadros-chave + rastreamento vs. todos os frames")
+    amostragem.add_argument("--mode", choices=_ALL_MODES, required=True)
+    amostragem.add_argument("--video", required=True)
+    amostragem.add_argument("--model", default=None, help="Caminho alternativo para o modelo (.pt)")
+    amostragem.add_argument("--intervalo", type=int, nargs="+", default=[3, 5, 8])
+    amostragem.set_defaults(func=benchmark_amostragem)
+
+    backends = sub.add_parser("backends", help="best.pt vs. ONNX / OpenVINO exportados (fps, mAP, concordância)")
+    backends.add_argument("--mode", choices=_ALL_MODES, required=True)
+    backends.add_argument("--video", required=True)
+    backends.add_argument("--frames", type=int, default=300, help="Frames do clipe usados na medida de fps")
+    backends.add_argument("--split", default="val", help="Split do dataset para o mAP (default: val)")
+    backends.add_argument("--sem-map", action="store_true", help="Mede só fps e concordância")
+    backends.set_defaults(func=benchmark_backends)
+
+    filtro = sub.add_parser("filtro", help="Custo de _filter_boxes por frame: laço original vs. vetorizado + cache")
+    filtro.add_argument("--mode", choices=_ALL_MODES, required=True)
+    filtro.add_argument("--video", required=True)
+    filtro.add_argument("--model", default=None, help="Caminho alternativo para o modelo (.pt)")
+    filtro.add_argument("--frames", type=int, default=300)
+    filtro.set_defaults(func=benchmark_filtro)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
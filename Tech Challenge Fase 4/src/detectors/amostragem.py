@@ -0,0 +1,101 @@
+"""Amostragem de quadros-chave: inferência completa só a cada N frames ou em troca de cena.
+
+Frames consecutivos de laparoscopia são quase idênticos, então rodar o YOLO em
+todos é desperdício. O KeyframeSampler decide, a partir de uma miniatura em
+escala de cinza, quais frames passam pelo modelo:
+
+- a cada `interval` frames (quadro-chave periódico);
+- quando a diferença média da miniatura para o último quadro-chave passa de
+  `threshold` (troca de cena, entrada/saída de instrumento, sangramento novo).
+
+Nos frames pulados as caixas do último quadro-chave são deslocadas pelo
+movimento global da câmera, estimado por correlação de fase entre as
+miniaturas (cv2.phaseCorrelate, sem dependências extras). O frame pulado
+recebe um resultado com a mesma contagem do quadro-chave, então a lógica de
+anomalias (histórico, no_streak, streaks de sangramento) continua em
+unidades de frame.
+"""
+import cv2
+import numpy as np
+
+THUMB_WIDTH = 160
+
+
+class KeyframeSampler:
+    """Decide os quadros-chave e rastreia as caixas nos frames intermediários."""
+
+    def __init__(self, interval, threshold, width, height):
+        self.interval = max(int(interval), 1)
+        self.threshold = threshold
+        self._thumb_size = (THUMB_WIDTH, max(int(round(height * THUMB_WIDTH / max(width, 1))), 1))
+        self._scale_x = width / self._thumb_size[0]
+        self._scale_y = height / self._thumb_size[1]
+        self._ref_thumb = None      # referência da decisão (pode estar à frente da inferência)
+        self._since_key = 0
+        self._key_thumb = None      # miniatura e resultados do último quadro-chave inferido
+        self._key_results = None
+        self.frames = 0
+        self.keyframes = 0
+        self.scene_changes = 0
+
+    def thumbnail(self, frame):
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        return cv2.resize(gray, self._thumb_size, interpolation=cv2.INTER_AREA).astype(np.float32)
+
+    def is_keyframe(self, thumb):
+        """Depende só das miniaturas — pode ser decidido antes da inferência do lote."""
+        self.frames += 1
+        self._since_key += 1
+        key = self._ref_thumb is None or self._since_key >= self.interval
+        if not key and float(np.mean(np.abs(thumb - self._ref_thumb))) > self.threshold:
+            key = True
+            self.scene_changes += 1
+        if key:
+            self._ref_thumb = thumb
+            self._since_key = 0
+            self.keyframes += 1
+        return key
+
+    def set_keyframe(self, thumb, results):
+        self._key_thumb = thumb
+        self._key_results = results
+
+    def track(self, frame, thumb):
+        """Resultado do último quadro-chave com as caixas deslocadas para este frame."""
+        results = self._key_results
+        if not results or len(results) == 0:
+            return results
+        key = results[0]
+        tracked = key.new()
+        tracked.orig_img = frame
+        if key.boxes is None or len(key.boxes) == 0:
+            return [tracked]
+
+        (dx, dy), _ = cv2.phaseCorrelate(self._key_thumb, thumb)
+        data = key.boxes.data.clone()
+        data[:, [0, 2]] += dx * self._scale_x
+        data[:, [1, 3]] += dy * self._scale_y
+        tracked.update(boxes=data)
+        return [tracked]
+
+    def process(self, frames, infer):
+        """Resultados por frame, na ordem; `infer(lista de frames)` só recebe os quadros-chave."""
+        thumbs = [self.thumbnail(f) for f in frames]
+        keys = [self.is_keyframe(t) for t in thumbs]
+        key_results = iter(infer([f for f, k in zip(frames, keys) if k]) if any(keys) else [])
+
+        out = []
+        for frame, thumb, key in zip(frames, thumbs, keys):
+            if key:
+                results = next(key_results)
+                self.set_keyframe(thumb, results)
+            else:
+                results = self.track(frame, thumb)
+            out.append(results)
+        return out
+
+    def summary(self):
+        pct = self.keyframes / self.frames * 100 if self.frames else 0.0
+        return (f"Amostragem (N={self.interval}, limiar={self.threshold:g}): "
+                f"{self.keyframes}/{self.frames} frames inferidos ({pct:.1f}%), "
+                f"{self.scene_changes} troca(s) de cena")
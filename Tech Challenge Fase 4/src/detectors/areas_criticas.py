@@ -20,6 +20,7 @@ class AreasCriticasDetector(BaseDetector):
         2: "Ovario",
     }
     DATASET_YAML = "download_dataset/dataset_areas_criticas.yaml"
+    HUD_LABEL = "Areas criticas"
 
     EPOCHS     = _ei("AREAS_TRAIN_EPOCHS",     _ei("TRAIN_EPOCHS", 100))
     IMGSZ      = _ei("AREAS_TRAIN_IMGSZ",      _ei("TRAIN_IMGSZ", 640))
@@ -102,17 +102,28 @@ class AutomutilacaoDetector(BaseDetector):
 
         return anomaly, alert_text, alert_color
 
-    def detect_video(self, video_path, model_path=None, headless=False, save_output=True):
+    def detect_video(self, video_path, model_path=None, headless=False, save_output=True, batch_size=None,
+                     keyframe_interval=None):
         self._current_results = None
-        return super().detect_video(video_path, model_path, headless, save_output)
+        return super().detect_video(video_path, model_path, headless, save_output, batch_size, keyframe_interval)
 
-    def _draw_hud(self, frame, frame_count, num_detections, avg_recent, alert_text, alert_color, height):
+    def _update_state(self, frame_count, results):
+        # Streak do próprio frame no HUD (no modo em lote a anotação roda depois)
+        return super()._update_state(frame_count, results) + (self._object_streak(),)
+
+    def _draw_state(self, frame, frame_count, hud, height):
+        num_detections, avg_recent, alert_text, alert_color, streak = hud
+        self._draw_hud(frame, frame_count, num_detections, avg_recent, alert_text, alert_color, height, streak)
+
+    def _draw_hud(self, frame, frame_count, num_detections, avg_recent, alert_text, alert_color, height,
+                  streak=None):
         import cv2
         overlay = frame.copy()
         cv2.rectangle(overlay, (0, 0), (400, 110), (0, 0, 0), -1)
         cv2.addWeighted(overlay, 0.45, frame, 0.55, 0, frame)
 
-        streak = self._object_streak()
+        if streak is None:
+            streak = self._object_streak()
         det_color = (0, 0, 255) if num_detections > 0 else (0, 200, 0)
         cv2.putText(frame, f"Obj. Suspeito: {'SIM' if num_detections > 0 else 'NAO'}", (10, 30),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.8, det_color, 2)
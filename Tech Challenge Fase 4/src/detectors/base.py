@@ -2,6 +2,7 @@ import importlib.util
 import os
 import shutil
 import sys
+import time
 
 import gc
 import cv2
@@ -36,6 +37,8 @@ if _SRC_DIR not in sys.path:
     sys.path.insert(0, _SRC_DIR)
 
 import relatorio as _relatorio_module
+from detectors import amostragem as _amostragem
+from detectors import pipeline as _pipeline
 
 try:
     from dotenv import load_dotenv
@@ -58,17 +61,39 @@ def _es(key, default):
     return os.getenv(key, default)
 
 
+# (backend, arquivo/pasta em weights/, módulo do runtime), em ordem de preferência em CPU.
+# Os INT8 nunca são escolhidos no modo auto: o INT8 dinâmico do ONNX gera ConvInteger,
+# em geral mais lento que o FP32 no CPUExecutionProvider, e ambos perdem mAP. Só são
+# usados com DETECT_BACKEND=openvino-int8|onnx-int8, depois de conferidos no benchmark.
+_EXPORTED_ARTIFACTS = [
+    ("openvino",      "best_openvino_model",      "openvino"),
+    ("onnx",          "best.onnx",                "onnxruntime"),
+    ("openvino-int8", "best_int8_openvino_model", "openvino"),
+    ("onnx-int8",     "best_int8.onnx",           "onnxruntime"),
+]
+
+
 class BaseDetector:
     MODEL_NAME: str = None
     MODEL_FOLDER: str = None  # PT-BR folder name inside model/
     CLASSES: list = None
     NAMES_PTBR: dict = None
     DATASET_YAML: str = None
+    HUD_LABEL: str = None     # nome curto no HUD da análise combinada (sem acentos)
+    OUTPUT_VIDEO: str = "resultado.mp4"
     BASE_MODEL: str = _es("TRAIN_BASE_MODEL", "yolov8s.pt")
 
     CONFIDENCE_THRESHOLD = _ef("DETECT_CONFIDENCE", 0.55)
     IOU_THRESHOLD        = _ef("DETECT_IOU", 0.45)
     WINDOW               = _ei("DETECT_WINDOW", 10)
+    # Modo em lote: frames por chamada YOLO (1 = sequencial) e tamanho das filas
+    BATCH_SIZE           = _ei("DETECT_BATCH", 1)
+    QUEUE_SIZE           = _ei("DETECT_QUEUE", 32)
+    # Amostragem: inferência a cada N frames ou em troca de cena (1 = todos os frames)
+    KEYFRAME_INTERVAL    = _ei("DETECT_KEYFRAME_INTERVAL", 1)
+    SCENE_THRESHOLD      = _ef("DETECT_SCENE_THRESHOLD", 10.0)
+    # auto = OpenVINO > ONNX > .pt (FP32) | pt | onnx | openvino | onnx-int8 | openvino-int8
+    BACKEND              = _es("DETECT_BACKEND", "auto").lower()
 
     ABSENCE_WARN_FRAMES     = _ei("ANOMALY_ABSENCE_WARN", 10)
     ABSENCE_CRITICAL_FRAMES = _ei("ANOMALY_ABSENCE_CRITICAL", 30)
@@ -86,6 +111,9 @@ class BaseDetector:
     MAX_BANNER_H_RATIO    = _ef("FILTER_BANNER_H", 0.08)
     # Análise de componentes conectados para rejeitar regiões com texto
     FILTER_TEXT_REGIONS   = _es("FILTER_TEXT_REGIONS", "true").lower() not in ("0", "false", "no", "off")
+    # Cache do veredito de texto: tamanho da célula (px) e validade (frames)
+    TEXT_CACHE_CELL       = _ei("FILTER_TEXT_CACHE_CELL", 32)
+    TEXT_CACHE_FRAMES     = _ei("FILTER_TEXT_CACHE_FRAMES", 15)
 
     EPOCHS   = _ei("TRAIN_EPOCHS", 80)
     IMGSZ    = _ei("TRAIN_IMGSZ", 640)
@@ -95,17 +123,106 @@ class BaseDetector:
     WORKERS  = _ei("TRAIN_WORKERS", 0 if os.name == "nt" else 8)
 
     def __init__(self):
-        self._history = []
+        self._reset_state()
+
+    def _weights_dir(self):
+        return os.path.join(PROJECT_ROOT, "model", self.MODEL_FOLDER, "weights")
+
+    def model_artifacts(self):
+        """Artefatos disponíveis, na ordem de _EXPORTED_ARTIFACTS e por último o best.pt: lista de (backend, caminho).
+
+        Exportações mais antigas que o best.pt (modelo retreinado depois) e
+        formatos cujo runtime não está instalado são ignorados.
+        """
+        weights = self._weights_dir()
+        pt_path = os.path.join(weights, "best.pt")
+        if not os.path.exists(pt_path):
+            return []
+        pt_mtime = os.path.getmtime(pt_path)
+
+        artifacts = []
+        for backend, name, runtime in _EXPORTED_ARTIFACTS:
+            path = os.path.join(weights, name)
+            if not os.path.exists(path) or os.path.getmtime(path) < pt_mtime:
+                continue
+            if importlib.util.find_spec(runtime) is None:
+                continue
+            artifacts.append((backend, path))
+        artifacts.append(("pt", pt_path))
+        return artifacts
 
     def find_model(self):
-        folder = self.MODEL_FOLDER
-        candidates = [
-            os.path.join(PROJECT_ROOT, "model", folder, "weights", "best.pt"),
-        ]
-        for path in candidates:
-            if os.path.exists(path):
-                return path
-        return None
+        """Prefere o artefato FP32 otimizado (OpenVINO/ONNX); DETECT_BACKEND força um formato (inclusive INT8)."""
+        artifacts = self.model_artifacts()
+        if self.BACKEND == "auto":
+            artifacts = [a for a in artifacts if not a[0].endswith("-int8")]
+        else:
+            artifacts = [a for a in artifacts if a[0] == self.BACKEND]
+        return artifacts[0][1] if artifacts else None
+
+    def export(self, fmt="onnx", int8=False):
+        """Exporta weights/best.pt para ONNX ou OpenVINO (opcionalmente INT8) na mesma pasta."""
+        pt_path = os.path.join(self._weights_dir(), "best.pt")
+        if not os.path.exists(pt_path):
+            print(f"ERRO: Nenhum modelo treinado encontrado para [{self.MODEL_NAME}].")
+            print(f"Execute primeiro: python app.py train --mode {self._cli_mode()}")
+            return None
+
+        model = None
+        try:
+            print(f"Exportando [{self.MODEL_FOLDER}] para {fmt}{' INT8' if int8 else ''} ...")
+            model = YOLO(pt_path)
+            if fmt == "openvino":
+                # INT8 do OpenVINO calibra com as imagens do dataset (NNCF)
+                data = os.path.join(PROJECT_ROOT, self.DATASET_YAML) if int8 else None
+                path = model.export(format="openvino", imgsz=self.IMGSZ, dynamic=True, int8=int8, data=data)
+            else:
+                # dynamic=True: aceita lotes de qualquer tamanho (modo --batch)
+                path = model.export(format="onnx", imgsz=self.IMGSZ, dynamic=True, simplify=True)
+                if int8:
+                    path = self._quantize_onnx(path)
+            print(f"Modelo exportado: {path}")
+            self._check_export(path)
+            return path
+        except Exception as e:
+            print(f"Erro na exportação: {e}")
+            return None
+        finally:
+            del model
+            gc.collect()
+
+    def _check_export(self, path):
+        """Carrega o artefato exportado como na detecção e infere um frame vazio.
+
+        Se falhar, o artefato é apagado para que o modo auto do find_model não
+        passe a escolhê-lo.
+        """
+        model = None
+        try:
+            model = self._load_model(path)
+            frame = np.zeros((self.IMGSZ, self.IMGSZ, 3), dtype=np.uint8)
+            results = self._predict_batch(model, [frame], self.IMGSZ, self.IMGSZ)[0]
+            if len(results[0].names) == len(self.NAMES_PTBR) and results[0].names != self.NAMES_PTBR:
+                raise RuntimeError(f"classes do artefato exportado não foram renomeadas: {results[0].names}")
+            print("Artefato exportado carregado e testado com um frame.")
+        except Exception:
+            if os.path.isdir(path):
+                shutil.rmtree(path, ignore_errors=True)
+            elif os.path.exists(path):
+                os.remove(path)
+            raise
+        finally:
+            del model
+            gc.collect()
+
+    @staticmethod
+    def _quantize_onnx(onnx_path):
+        """Quantização dinâmica dos pesos para INT8 (onnxruntime, sem calibração)."""
+        from onnxruntime.quantization import QuantType, quantize_dynamic
+
+        int8_path = os.path.join(os.path.dirname(onnx_path), "best_int8.onnx")
+        quantize_dynamic(onnx_path, int8_path, weight_type=QuantType.QUInt8)
+        return int8_path
 
     def train(self):
         dataset_yaml = os.path.join(PROJECT_ROOT, self.DATASET_YAML)
@@ -153,49 +270,76 @@ class BaseDetector:
         if boxes is None or len(boxes) == 0:
             return results
 
+        t0 = time.perf_counter()
+        self._filter_frames += 1
         frame_area = frame_w * frame_h
         edge_x = frame_w * self.EDGE_MARGIN_RATIO
         edge_y = frame_h * self.EDGE_MARGIN_RATIO
-        xyxy = boxes.xyxy.cpu().numpy()
-
-        keep = []
-        for i, (x1, y1, x2, y2) in enumerate(xyxy):
-            w = float(x2 - x1)
-            h = float(y2 - y1)
-            cy = (y1 + y2) / 2.0
-            area_ratio = (w * h) / frame_area
-            aspect = max(w, h) / max(min(w, h), 1.0)
-
-            if area_ratio < self.MIN_BOX_AREA_RATIO:
-                continue
-            if area_ratio > self.MAX_BOX_AREA_RATIO:
-                continue
-            if aspect < self.MIN_ASPECT_RATIO:
-                continue
+        x1, y1, x2, y2 = boxes.xyxy.cpu().numpy().T
+
+        # Testes geométricos vetorizados sobre todas as caixas do frame
+        w = x2 - x1
+        h = y2 - y1
+        cy = (y1 + y2) / 2.0
+        area_ratio = (w * h) / frame_area
+        aspect = np.maximum(w, h) / np.maximum(np.minimum(w, h), 1.0)
+        keep = (
+            (area_ratio >= self.MIN_BOX_AREA_RATIO)
+            & (area_ratio <= self.MAX_BOX_AREA_RATIO)
+            & (aspect >= self.MIN_ASPECT_RATIO)
             # Borda do frame (margem assimétrica X/Y para capturar logos de canto)
-            if x1 < edge_x or x2 > frame_w - edge_x:
-                continue
-            if y1 < edge_y or y2 > frame_h - edge_y:
-                continue
+            & (x1 >= edge_x) & (x2 <= frame_w - edge_x)
+            & (y1 >= edge_y) & (y2 <= frame_h - edge_y)
             # Zona de overlay (HUD/título): qualquer orientação
-            in_overlay = cy < frame_h * self.OVERLAY_ZONE_TOP or cy > frame_h * self.OVERLAY_ZONE_BOTTOM
-            if in_overlay:
-                continue
+            & (cy >= frame_h * self.OVERLAY_ZONE_TOP) & (cy <= frame_h * self.OVERLAY_ZONE_BOTTOM)
             # Banner de texto: caixa muito larga e rasa (legenda, título, watermark)
-            wh_ratio = w / max(h, 1.0)
-            if wh_ratio > self.MAX_BANNER_WH_RATIO and h / frame_h < self.MAX_BANNER_H_RATIO:
-                continue
-            # Análise de componentes conectados: rejeita regiões com texto/watermark
-            if frame is not None and self.FILTER_TEXT_REGIONS:
-                x1i, y1i, x2i, y2i = int(x1), int(y1), int(x2), int(y2)
-                roi = frame[y1i:y2i, x1i:x2i]
-                if self._is_text_region(roi):
-                    continue
-            keep.append(i)
-
-        results[0].boxes = results[0].boxes[keep]
+            & ~((w / np.maximum(h, 1.0) > self.MAX_BANNER_WH_RATIO) & (h / frame_h < self.MAX_BANNER_H_RATIO))
+        )
+
+        kept = np.flatnonzero(keep).tolist()
+        # Análise de componentes conectados: rejeita regiões com texto/watermark
+        if frame is not None and self.FILTER_TEXT_REGIONS:
+            kept = [
+                i for i in kept
+                if not self._cached_text_region(frame, int(x1[i]), int(y1[i]), int(x2[i]), int(y2[i]))
+            ]
+
+        results[0].boxes = results[0].boxes[kept]
+        self._filter_s += time.perf_counter() - t0
         return results
 
+    def _cached_text_region(self, frame, x1, y1, x2, y2):
+        """_is_text_region com cache por célula espacial.
+
+        Watermarks e legendas não se movem: uma caixa que cai na mesma célula
+        (cantos quantizados em TEXT_CACHE_CELL pixels) reaproveita o veredito
+        por até TEXT_CACHE_FRAMES frames filtrados.
+        """
+        cell = self.TEXT_CACHE_CELL
+        key = (x1 // cell, y1 // cell, x2 // cell, y2 // cell)
+        cached = self._text_cache.get(key)
+        if cached is not None and self._filter_frames - cached[1] < self.TEXT_CACHE_FRAMES:
+            self._text_cache_hits += 1
+            return cached[0]
+
+        self._text_cache_misses += 1
+        verdict = self._is_text_region(frame[y1:y2, x1:x2])
+        if len(self._text_cache) >= 4096:
+            # Descarta vereditos expirados para o cache não crescer sem limite
+            self._text_cache = {
+                k: v for k, v in self._text_cache.items()
+                if self._filter_frames - v[1] < self.TEXT_CACHE_FRAMES
+            }
+        self._text_cache[key] = (verdict, self._filter_frames)
+        return verdict
+
+    def _filter_summary(self):
+        per_frame_ms = self._filter_s / self._filter_frames * 1000 if self._filter_frames else 0.0
+        checks = self._text_cache_hits + self._text_cache_misses
+        hit_rate = self._text_cache_hits / checks * 100 if checks else 0.0
+        return (f"Filtro de caixas: {per_frame_ms:.2f} ms/frame ({self._filter_frames} frames com caixas) | "
+                f"cache de texto: {self._text_cache_hits}/{checks} ({hit_rate:.0f}%)")
+
     @staticmethod
     def _is_text_region(roi_bgr):
         """Retorna True se o ROI parece conter texto (watermark, legenda, título).
@@ -301,13 +445,12 @@ class BaseDetector:
             cv2.putText(frame, alert_text, (10, height - 14),
                         cv2.FONT_HERSHEY_SIMPLEX, 0.9, alert_color, 3)
 
-    def detect_video(self, video_path, model_path=None, headless=False, save_output=True):
-        self._history = []
-
-        if not os.path.exists(video_path):
-            print(f"Vídeo não encontrado: {video_path}")
-            return
+    # ── Etapas por frame ─────────────────────────────────────────────────────
+    # detect_video e a análise combinada (detectors/combinado.py) usam as mesmas
+    # etapas: carregar o modelo, inferir um frame, atualizar o estado do
+    # detector (histórico, ausências, anomalias) e gerar o resultado final.
 
+    def _resolve_model_path(self, model_path=None):
         if model_path is None:
             model_path = self.find_model()
             if model_path:
@@ -315,19 +458,172 @@ class BaseDetector:
             else:
                 print(f"ERRO: Nenhum modelo treinado encontrado para [{self.MODEL_NAME}].")
                 print(f"Execute primeiro: python app.py train --mode {self._cli_mode()}")
-                return
+                return None
 
         if not os.path.exists(model_path):
             print(f"ERRO: Modelo não encontrado: {model_path}")
+            return None
+        return model_path
+
+    def _load_model(self, model_path):
+        model = YOLO(model_path, task="detect")
+        if len(model.names) == len(self.NAMES_PTBR):
+            # Formatos exportados (model.model é o caminho do arquivo) só criam
+            # o predictor no primeiro predict; _predict_batch renomeia os resultados
+            if not isinstance(model.model, str):
+                model.model.names = self.NAMES_PTBR
+        else:
+            print(f"AVISO: modelo tem {len(model.names)} classes, esperado {len(self.NAMES_PTBR)}.")
+            print(f"  Classes do modelo: {model.names}")
+        return model
+
+    def _predict(self, model, frame, width, height):
+        return self._predict_batch(model, [frame], width, height)[0]
+
+    def _predict_batch(self, model, frames, width, height):
+        """Uma chamada YOLO para o lote; retorna os resultados filtrados por frame."""
+        results = model(
+            frames,
+            conf=self.CONFIDENCE_THRESHOLD,
+            iou=self.IOU_THRESHOLD,
+            classes=self.CLASSES,
+            verbose=False,
+        )
+        for r in results:
+            if len(r.names) == len(self.NAMES_PTBR):
+                r.names = self.NAMES_PTBR
+        return [
+            self._filter_boxes([r], width, height, frame=frame)
+            for r, frame in zip(results, frames)
+        ]
+
+    def _make_sampler(self, width, height, keyframe_interval=None):
+        interval = self.KEYFRAME_INTERVAL if keyframe_interval is None else keyframe_interval
+        if interval <= 1:
+            return None
+        return _amostragem.KeyframeSampler(interval, self.SCENE_THRESHOLD, width, height)
+
+    def _infer_frames(self, model, frames, width, height, sampler=None):
+        """Resultados por frame; com amostragem, só os quadros-chave vão para o modelo."""
+        if sampler is None:
+            return self._predict_batch(model, frames, width, height)
+        return sampler.process(frames, lambda keys: self._predict_batch(model, keys, width, height))
+
+    def _reset_state(self):
+        self._filter_frames = 0
+        self._filter_s = 0.0
+        self._text_cache = {}
+        self._text_cache_hits = 0
+        self._text_cache_misses = 0
+        self._history = []
+        self._no_streak = 0
+        self._anomalies = []
+        self._class_frames = {}
+        self._detections_count = 0
+
+    def _update_state(self, frame_count, results):
+        """Registra as detecções de um frame e retorna os dados do HUD."""
+        num_detections = 0
+        if results and len(results) > 0:
+            boxes = results[0].boxes
+            if boxes is not None and len(boxes):
+                num_detections = len(boxes)
+                self._detections_count += num_detections
+                for cls_id in boxes.cls.cpu().numpy().astype(int).tolist():
+                    cls_name = self.NAMES_PTBR.get(cls_id, str(cls_id))
+                    self._class_frames.setdefault(cls_name, []).append(frame_count)
+
+        self._history.append(num_detections)
+        if len(self._history) > self.WINDOW:
+            self._history.pop(0)
+
+        avg_recent = sum(self._history) / len(self._history)
+
+        if num_detections == 0:
+            self._no_streak += 1
+        else:
+            self._no_streak = 0
+
+        anomaly, alert_text, alert_color = self._check_anomalies(
+            frame_count, num_detections, avg_recent, self._no_streak
+        )
+        if anomaly:
+            self._anomalies.append(anomaly)
+
+        return num_detections, avg_recent, alert_text, alert_color
+
+    def _draw_state(self, frame, frame_count, hud, height):
+        num_detections, avg_recent, alert_text, alert_color = hud[:4]
+        self._draw_hud(frame, frame_count, num_detections, avg_recent, alert_text, alert_color, height)
+
+    def _render(self, frame_count, frame, results, hud, height):
+        """Frame anotado com caixas e HUD. Usa só o `hud` do frame (pode rodar em outra thread)."""
+        annotated = results[0].plot() if (results and len(results) > 0) else frame.copy()
+        self._draw_state(annotated, frame_count, hud, height)
+        return annotated
+
+    def _status(self, hud):
+        """Linha curta do HUD combinado: (texto, texto do alerta, cor do alerta)."""
+        num_detections, _, alert_text, alert_color = hud[:4]
+        return f"{self.HUD_LABEL or self.MODEL_FOLDER}: {num_detections}", alert_text, alert_color
+
+    def _finish(self, frame_count, fps, video_path, saida_dir):
+        avg = self._detections_count / frame_count if frame_count > 0 else 0
+        anomaly_rate = (len(self._anomalies) / frame_count) * 100 if frame_count > 0 else 0
+
+        class_summary = {}
+        for name, frames in self._class_frames.items():
+            class_summary[name] = {
+                "count": len(frames),
+                "first_frame": frames[0],
+                "last_frame": frames[-1],
+                "frames_pct": round(len(frames) / frame_count * 100, 1) if frame_count else 0,
+            }
+
+        report_path = os.path.join(saida_dir, "relatorio.txt")
+        _relatorio_module.generate_report(
+            report_path, frame_count, self._detections_count, self._anomalies,
+            fps=fps, video_path=video_path, class_summary=class_summary
+        )
+
+        print(f"\n=== RESULTADO FINAL [{self.MODEL_NAME}] ===")
+        print(f"Frames analisados: {frame_count}")
+        print(f"Detecções totais:  {self._detections_count}")
+        print(f"Média por frame:   {avg:.2f}")
+        print(f"Anomalias:         {len(self._anomalies)}")
+        print(f"Taxa de anomalia:  {anomaly_rate:.2f}%")
+        print(f"\nArquivos gerados em: saida/{self.MODEL_FOLDER}/")
+
+        return {
+            "frame_count": frame_count,
+            "detections_count": self._detections_count,
+            "anomalies": self._anomalies,
+            "fps": fps,
+            "class_summary": class_summary,
+        }
+
+    # ── Detecção principal ───────────────────────────────────────────────────
+
+    def detect_video(self, video_path, model_path=None, headless=False, save_output=True, batch_size=None,
+                     keyframe_interval=None):
+        """Analisa o vídeo.
+
+        batch_size > 1 ativa o modo em lote (detectors/pipeline.py);
+        keyframe_interval > 1 ativa a amostragem de quadros-chave (detectors/amostragem.py).
+        """
+        self._reset_state()
+        batch_size = self.BATCH_SIZE if batch_size is None else batch_size
+
+        if not os.path.exists(video_path):
+            print(f"Vídeo não encontrado: {video_path}")
+            return
+
+        model_path = self._resolve_model_path(model_path)
+        if model_path is None:
             return
 
         try:
-            model = YOLO(model_path)
-            if len(model.names) == len(self.NAMES_PTBR):
-                model.model.names = self.NAMES_PTBR
-            else:
-                print(f"AVISO: modelo tem {len(model.names)} classes, esperado {len(self.NAMES_PTBR)}.")
-                print(f"  Classes do modelo: {model.names}")
+            model = self._load_model(model_path)
 
             cap = cv2.VideoCapture(video_path)
             if not cap.isOpened():
@@ -343,7 +639,7 @@ class BaseDetector:
 
             out = None
             if save_output:
-                output_video = os.path.join(saida_dir, "resultado.mp4")
+                output_video = os.path.join(saida_dir, self.OUTPUT_VIDEO)
                 out = cv2.VideoWriter(
                     output_video,
                     cv2.VideoWriter_fourcc(*"mp4v"),
@@ -352,14 +648,29 @@ class BaseDetector:
                 )
 
             frame_count = 0
-            detections_count = 0
-            anomalies = []
-            no_streak = 0
-            class_frames = {}
+            sampler = self._make_sampler(width, height, keyframe_interval)
 
             print(f"Iniciando análise [{self.MODEL_NAME}] ...")
             print(f"Vídeo: {os.path.basename(video_path)} | {width}x{height} @ {fps:.1f}fps")
 
+            if batch_size > 1:
+                if not headless:
+                    print("AVISO: modo em lote roda sem janela de visualização.")
+                    headless = True
+                try:
+                    frame_count = self._run_pipelined(cap, model, out, width, height, batch_size, sampler)
+                finally:
+                    cap.release()
+                    if out:
+                        out.release()
+                if sampler:
+                    print(sampler.summary())
+                print(self._filter_summary())
+                result = self._finish(frame_count, fps, video_path, saida_dir)
+                print(f"  Vídeo anotado: {self.OUTPUT_VIDEO}")
+                print(f"  Relatório:     relatorio.txt/.html/.json")
+                return result
+
             while True:
                 ret, frame = cap.read()
                 if not ret:
@@ -368,44 +679,9 @@ class BaseDetector:
                     continue
 
                 frame_count += 1
-                results = model(
-                    frame,
-                    conf=self.CONFIDENCE_THRESHOLD,
-                    iou=self.IOU_THRESHOLD,
-                    classes=self.CLASSES,
-                    verbose=False,
-                )
-                results = self._filter_boxes(results, width, height, frame=frame)
-
-                num_detections = 0
-                if results and len(results) > 0:
-                    boxes = results[0].boxes
-                    if boxes is not None and len(boxes):
-                        num_detections = len(boxes)
-                        detections_count += num_detections
-                        for cls_id in boxes.cls.cpu().numpy().astype(int).tolist():
-                            cls_name = self.NAMES_PTBR.get(cls_id, str(cls_id))
-                            class_frames.setdefault(cls_name, []).append(frame_count)
-
-                self._history.append(num_detections)
-                if len(self._history) > self.WINDOW:
-                    self._history.pop(0)
-
-                avg_recent = sum(self._history) / len(self._history)
-
-                if num_detections == 0:
-                    no_streak += 1
-                else:
-                    no_streak = 0
-
-                anomaly, alert_text, alert_color = self._check_anomalies(
-                    frame_count, num_detections, avg_recent, no_streak
-                )
-                if anomaly:
-                    anomalies.append(anomaly)
-
-                annotated_frame = results[0].plot() if (results and len(results) > 0) else frame.copy()
-                self._draw_hud(annotated_frame, frame_count, num_detections, avg_recent, alert_text, alert_color, height)
+                results = self._infer_frames(model, [frame], width, height, sampler)[0]
+                hud = self._update_state(frame_count, results)
+                annotated_frame = self._render(frame_count, frame, results, hud, height)
 
                 if out:
                     out.write(annotated_frame)
@@ -423,47 +699,59 @@ class BaseDetector:
                 out.release()
             if not headless:
                 cv2.destroyAllWindows()
+            if sampler:
+                print(sampler.summary())
+            print(self._filter_summary())
 
-            avg = detections_count / frame_count if frame_count > 0 else 0
-            anomaly_rate = (len(anomalies) / frame_count) * 100 if frame_count > 0 else 0
-
-            class_summary = {}
-            for name, frames in class_frames.items():
-                class_summary[name] = {
-                    "count": len(frames),
-                    "first_frame": frames[0],
-                    "last_frame": frames[-1],
-                    "frames_pct": round(len(frames) / frame_count * 100, 1) if frame_count else 0,
-                }
-
-            report_path = os.path.join(saida_dir, "relatorio.txt")
-            _relatorio_module.generate_report(
-                report_path, frame_count, detections_count, anomalies,
-                fps=fps, video_path=video_path, class_summary=class_summary
-            )
-
-            print(f"\n=== RESULTADO FINAL [{self.MODEL_NAME}] ===")
-            print(f"Frames analisados: {frame_count}")
-            print(f"Detecções totais:  {detections_count}")
-            print(f"Média por frame:   {avg:.2f}")
-            print(f"Anomalias:         {len(anomalies)}")
-            print(f"Taxa de anomalia:  {anomaly_rate:.2f}%")
-            print(f"\nArquivos gerados em: saida/{self.MODEL_FOLDER}/")
-            print(f"  Vídeo anotado: output.mp4")
+            result = self._finish(frame_count, fps, video_path, saida_dir)
+            print(f"  Vídeo anotado: {self.OUTPUT_VIDEO}")
             print(f"  Relatório:     relatorio.txt/.html/.json")
-
-            return {
-                "frame_count": frame_count,
-                "detections_count": detections_count,
-                "anomalies": anomalies,
-                "fps": fps,
-                "class_summary": class_summary,
-            }
+            return result
 
         except Exception as e:
             print(f"Erro na detecção: {e}")
             raise
 
+    def _run_pipelined(self, cap, model, out, width, height, batch_size, sampler=None):
+        """Decode, inferência em lote e escrita em paralelo. Retorna o total de frames."""
+        reader = _pipeline.FrameReader(cap, maxsize=self.QUEUE_SIZE)
+        writer = _pipeline.FrameWriter(
+            lambda n, frame, results, hud: self._render(n, frame, results, hud, height),
+            out, maxsize=self.QUEUE_SIZE,
+        )
+        frame_count = 0
+        infer_s = 0.0
+        started = time.perf_counter()
+
+        reader.start()
+        writer.start()
+        try:
+            for frames in reader.batches(batch_size):
+                t0 = time.perf_counter()
+                batch_results = self._infer_frames(model, frames, width, height, sampler)
+                # Estado atualizado na ordem dos frames, antes de enviar para a escrita
+                huds = []
+                for frame, results in zip(frames, batch_results):
+                    frame_count += 1
+                    huds.append((frame_count, frame, results, self._update_state(frame_count, results)))
+                infer_s += time.perf_counter() - t0
+                for item in huds:
+                    writer.submit(*item)
+        except BaseException:
+            reader.close()
+            writer.abort()
+            raise
+        reader.close()
+        writer.close()
+
+        elapsed = time.perf_counter() - started
+        print(f"\nModo em lote (B={batch_size}): {frame_count} frames em {elapsed:.1f}s "
+              f"({_pipeline.stage_fps(frame_count, elapsed):.1f} fps)")
+        print(f"  decode:     {_pipeline.stage_fps(reader.frames, reader.busy_s):8.1f} fps")
+        print(f"  inferência: {_pipeline.stage_fps(frame_count, infer_s):8.1f} fps")
+        print(f"  escrita:    {_pipeline.stage_fps(writer.frames, writer.busy_s):8.1f} fps")
+        return frame_count
+
     def _cli_mode(self):
         mapping = {
             "instrument_detector": "instrumentos",
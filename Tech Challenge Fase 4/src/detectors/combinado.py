@@ -0,0 +1,172 @@
+"""Análise combinada: um único decode do vídeo para vários detectores.
+
+Rodar os detectores um após o outro reabre o vídeo, decodifica todos os
+frames e grava um MP4 anotado por modelo. Aqui cada frame é decodificado
+uma vez e entregue a todos os modelos YOLO ao mesmo tempo (um thread por
+modelo — o PyTorch libera o GIL durante a inferência). Cada detector mantém
+o próprio estado (histórico, ausências, anomalias) e gera o próprio
+relatório; o vídeo anotado é um só, com as caixas de todos os modelos.
+
+Com amostragem de quadros-chave (keyframe_interval > 1), a decisão de
+quadro-chave é tomada uma vez por frame, pelo amostrador do primeiro
+detector; nos quadros-chave todos os modelos inferem, nos demais cada
+detector desloca as caixas do próprio último quadro-chave. O modo em lote
+(DETECT_BATCH / --batch) não se aplica aqui: o paralelismo é por modelo.
+"""
+import os
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import cv2
+
+_SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if _SRC_DIR not in sys.path:
+    sys.path.insert(0, _SRC_DIR)
+
+from detectors.base import PROJECT_ROOT
+
+
+def _draw_combined_hud(frame, frame_count, statuses, height):
+    """Uma linha por detector no topo e uma faixa por alerta ativo na base."""
+    hud_h = 38 + len(statuses) * 28
+    overlay = frame.copy()
+    cv2.rectangle(overlay, (0, 0), (360, hud_h), (0, 0, 0), -1)
+    cv2.addWeighted(overlay, 0.45, frame, 0.55, 0, frame)
+
+    cv2.putText(frame, f"Quadro: {frame_count}", (10, 25),
+                cv2.FONT_HERSHEY_SIMPLEX, 0.65, (200, 200, 200), 2)
+
+    y = 53
+    alerts = []
+    for text, alert_text, alert_color in statuses:
+        color = alert_color if alert_text else (0, 220, 80)
+        cv2.putText(frame, text, (10, y), cv2.FONT_HERSHEY_SIMPLEX, 0.62, color, 2)
+        y += 28
+        if alert_text:
+            alerts.append((alert_text, alert_color))
+
+    bar_h = 40
+    for i, (alert_text, alert_color) in enumerate(reversed(alerts)):
+        bottom = height - i * bar_h
+        cv2.rectangle(frame, (0, bottom - bar_h), (frame.shape[1], bottom), (0, 0, 0), -1)
+        cv2.putText(frame, alert_text, (10, bottom - 12),
+                    cv2.FONT_HERSHEY_SIMPLEX, 0.8, alert_color, 2)
+
+
+class CombinedAnalyzer:
+    """Executa vários detectores sobre o mesmo vídeo com um único decode."""
+
+    OUTPUT_VIDEO = "resultado_geral.mp4"
+
+    def __init__(self, detectors, keyframe_interval=None):
+        self.detectors = list(detectors)
+        self.keyframe_interval = keyframe_interval
+
+    def analyze(self, video_path, model_path=None, save_output=True):
+        """Retorna {MODEL_FOLDER: resultado de detect_video} dos detectores com modelo."""
+        if not os.path.exists(video_path):
+            print(f"Vídeo não encontrado: {video_path}")
+            return {}
+
+        active = []
+        for detector in self.detectors:
+            path = detector._resolve_model_path(model_path)
+            if path is None:
+                continue
+            detector._reset_state()
+            active.append((detector, detector._load_model(path)))
+        if not active:
+            return {}
+
+        cap = cv2.VideoCapture(video_path)
+        if not cap.isOpened():
+            print(f"Não foi possível abrir o vídeo: {video_path}")
+            return {}
+
+        width = int(cap.get(cv2.CAP_PROP_FRAME_WIDTH))
+        height = int(cap.get(cv2.CAP_PROP_FRAME_HEIGHT))
+        fps = cap.get(cv2.CAP_PROP_FPS) or 20
+
+        saida_dir = os.path.join(PROJECT_ROOT, "saida")
+        os.makedirs(saida_dir, exist_ok=True)
+
+        out = None
+        if save_output:
+            out = cv2.VideoWriter(
+                os.path.join(saida_dir, self.OUTPUT_VIDEO),
+                cv2.VideoWriter_fourcc(*"mp4v"),
+                fps,
+                (width, height),
+            )
+
+        samplers = [d._make_sampler(width, height, self.keyframe_interval) for d, _ in active]
+        leader = samplers[0]
+
+        names = ", ".join(d.MODEL_NAME for d, _ in active)
+        print(f"Iniciando análise combinada [{names}] ...")
+        print(f"Vídeo: {os.path.basename(video_path)} | {width}x{height} @ {fps:.1f}fps")
+
+        frame_count = 0
+        decode_s = 0.0
+        infer_s = 0.0
+        started = time.perf_counter()
+        try:
+            with ThreadPoolExecutor(max_workers=len(active)) as pool:
+                while True:
+                    t0 = time.perf_counter()
+                    ret, frame = cap.read()
+                    decode_s += time.perf_counter() - t0
+                    if not ret:
+                        break
+                    if frame is None or frame.size == 0:
+                        continue
+
+                    frame_count += 1
+                    t0 = time.perf_counter()
+                    thumb = leader.thumbnail(frame) if leader else None
+                    key = leader is None or leader.is_keyframe(thumb)
+                    # Cada modelo só é usado por uma tarefa por vez; o frame é só lido
+                    futures = [
+                        pool.submit(detector._predict, model, frame, width, height) if key else None
+                        for detector, model in active
+                    ]
+                    annotated = frame.copy()
+                    statuses = []
+                    for (detector, _), sampler, future in zip(active, samplers, futures):
+                        if future is None:
+                            results = sampler.track(frame, thumb)
+                        else:
+                            results = future.result()
+                            if sampler is not None:
+                                sampler.set_keyframe(thumb, results)
+                        hud = detector._update_state(frame_count, results)
+                        statuses.append(detector._status(hud))
+                        if results and len(results) > 0:
+                            annotated = results[0].plot(img=annotated)
+                    infer_s += time.perf_counter() - t0
+
+                    if out:
+                        _draw_combined_hud(annotated, frame_count, statuses, height)
+                        out.write(annotated)
+        finally:
+            cap.release()
+            if out:
+                out.release()
+
+        elapsed = time.perf_counter() - started
+        print(f"\nAnálise combinada: {frame_count} frames em {elapsed:.1f}s "
+              f"({frame_count / max(elapsed, 1e-9):.1f} fps) | "
+              f"decode {decode_s:.1f}s, inferência + anotação {infer_s:.1f}s")
+        if leader:
+            print(leader.summary())
+
+        summaries = {}
+        for detector, _ in active:
+            print(f"[{detector.MODEL_FOLDER}] {detector._filter_summary()}")
+            detector_dir = os.path.join(saida_dir, detector.MODEL_FOLDER)
+            os.makedirs(detector_dir, exist_ok=True)
+            summaries[detector.MODEL_FOLDER] = detector._finish(frame_count, fps, video_path, detector_dir)
+        if out:
+            print(f"\nVídeo anotado combinado: saida/{self.OUTPUT_VIDEO}")
+        return summaries
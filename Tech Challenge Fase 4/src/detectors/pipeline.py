@@ -0,0 +1,130 @@
+"""Threads de decode e de escrita para o modo em lote de detect_video.
+
+No modo sequencial cada frame é lido, inferido, anotado e gravado antes do
+próximo ser lido — decode, inferência e encode nunca se sobrepõem. Aqui:
+
+    FrameReader  (thread)  cap.read() → fila limitada
+    detect_video (chamador) lotes de B frames → uma chamada YOLO → estado
+    FrameWriter  (thread)  fila limitada → anotação + HUD → VideoWriter
+
+As filas limitadas seguram a memória quando um estágio é mais lento que os
+outros. A ordem dos frames é preservada: há um único produtor, um único
+consumidor e os lotes são processados em sequência.
+"""
+import queue
+import threading
+import time
+
+_END = object()
+
+
+def _put(q, item, stop):
+    """put bloqueante que desiste se `stop` for sinalizado (evita deadlock)."""
+    while not stop.is_set():
+        try:
+            q.put(item, timeout=0.1)
+            return True
+        except queue.Full:
+            continue
+    return False
+
+
+class FrameReader(threading.Thread):
+    """Decodifica o vídeo em segundo plano e entrega os frames em lotes."""
+
+    def __init__(self, cap, maxsize=32):
+        super().__init__(daemon=True)
+        self._cap = cap
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self.frames = 0
+        self.busy_s = 0.0
+
+    def run(self):
+        try:
+            while not self._stop.is_set():
+                t0 = time.perf_counter()
+                ret, frame = self._cap.read()
+                self.busy_s += time.perf_counter() - t0
+                if not ret:
+                    break
+                if frame is None or frame.size == 0:
+                    continue
+                self.frames += 1
+                if not _put(self._queue, frame, self._stop):
+                    break
+        finally:
+            _put(self._queue, _END, self._stop)
+
+    def batches(self, size):
+        """Gera listas de até `size` frames, na ordem do vídeo."""
+        batch = []
+        while True:
+            frame = self._queue.get()
+            if frame is _END:
+                break
+            batch.append(frame)
+            if len(batch) == size:
+                yield batch
+                batch = []
+        if batch:
+            yield batch
+
+    def close(self):
+        self._stop.set()
+        self.join()
+
+
+class FrameWriter(threading.Thread):
+    """Anota e grava os frames em segundo plano, na ordem em que foram enviados."""
+
+    def __init__(self, render, out, maxsize=32):
+        super().__init__(daemon=True)
+        self._render = render
+        self._out = out
+        self._queue = queue.Queue(maxsize=maxsize)
+        self._stop = threading.Event()
+        self.error = None
+        self.frames = 0
+        self.busy_s = 0.0
+
+    def run(self):
+        while True:
+            try:
+                item = self._queue.get(timeout=0.1)
+            except queue.Empty:
+                if self._stop.is_set():
+                    break
+                continue
+            if item is _END:
+                break
+            if self.error is not None or self._stop.is_set():
+                continue  # só esvazia a fila para não travar o chamador
+            try:
+                t0 = time.perf_counter()
+                annotated = self._render(*item)
+                if self._out:
+                    self._out.write(annotated)
+                self.busy_s += time.perf_counter() - t0
+                self.frames += 1
+            except Exception as e:
+                self.error = e
+
+    def submit(self, *item):
+        _put(self._queue, item, self._stop)
+
+    def close(self):
+        """Espera a fila esvaziar; relança o erro da thread, se houver."""
+        _put(self._queue, _END, self._stop)
+        self.join()
+        if self.error is not None:
+            raise self.error
+
+    def abort(self):
+        """Descarta o que ainda está na fila (usado quando a inferência falha)."""
+        self._stop.set()
+        self.join()
+
+
+def stage_fps(frames, busy_s):
+    return frames / busy_s if busy_s > 0 else 0.0
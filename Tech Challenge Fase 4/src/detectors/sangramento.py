@@ -16,6 +16,7 @@ class SangramentoDetector(BaseDetector):
     CLASSES = [0]
     NAMES_PTBR = {0: "Sangramento"}
     DATASET_YAML = "download_dataset/dataset_sangramento.yaml"
+    HUD_LABEL = "Sangramento"
 
     EPOCHS     = _ei("BLEED_TRAIN_EPOCHS",     _ei("TRAIN_EPOCHS", 100))
     IMGSZ      = _ei("BLEED_TRAIN_IMGSZ",      _ei("TRAIN_IMGSZ", 640))
@@ -82,13 +83,29 @@ class SangramentoDetector(BaseDetector):
 
         return anomaly, alert_text, alert_color
 
-    def _draw_hud(self, frame, frame_count, num_detections, avg_recent, alert_text, alert_color, height):
+    def _update_state(self, frame_count, results):
+        # O HUD guarda o streak do próprio frame: no modo em lote a anotação
+        # roda em outra thread, quando o histórico já avançou
+        return super()._update_state(frame_count, results) + (self._bleeding_streak(),)
+
+    def _draw_state(self, frame, frame_count, hud, height):
+        num_detections, avg_recent, alert_text, alert_color, streak = hud
+        self._draw_hud(frame, frame_count, num_detections, avg_recent, alert_text, alert_color, height, streak)
+
+    def _status(self, hud):
+        num_detections, _, alert_text, alert_color, streak = hud
+        text = f"{self.HUD_LABEL}: {'SIM' if num_detections > 0 else 'NAO'} ({streak}q)"
+        return text, alert_text, alert_color
+
+    def _draw_hud(self, frame, frame_count, num_detections, avg_recent, alert_text, alert_color, height,
+                  streak=None):
         import cv2
         overlay = frame.copy()
         cv2.rectangle(overlay, (0, 0), (370, 110), (0, 0, 0), -1)
         cv2.addWeighted(overlay, 0.45, frame, 0.55, 0, frame)
 
-        streak = self._bleeding_streak()
+        if streak is None:
+            streak = self._bleeding_streak()
         det_color = (0, 0, 255) if num_detections > 0 else (0, 200, 0)
         cv2.putText(frame, f"Sangramento: {'SIM' if num_detections > 0 else 'NAO'}", (10, 30),
                     cv2.FONT_HERSHEY_SIMPLEX, 0.8, det_color, 2)